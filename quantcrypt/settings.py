@@ -82,6 +82,56 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Computed portfolio sections, keyed by account data version. Shared by
+    # the web processes, run_import_worker and precompute_portfolios, so it
+    # must not be process-local; create the table with
+    # `python manage.py createcachetable` (Redis works as well).
+    'portfolio': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'portfolio_cache',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+PORTFOLIO_CACHE_ALIAS = 'portfolio'
+
+# Accounts with more closed trades than this get analytics from a single
+# chunked pass (constant memory) instead of full column arrays
+PORTFOLIO_STREAMING_THRESHOLD = 500000
+
+# Currency trades are valued in, and the notional exposure (in that currency)
+# separating low/medium and medium/high risk positions; see DEFAULT_RISK_BUCKETS
+# in wev/symbols.py for how these relate to the old lot-size cut-offs
+PORTFOLIO_ACCOUNT_CURRENCY = 'USD'
+PORTFOLIO_RISK_BUCKETS = (15000, 75000)
+
+# Memory-mapped trade column files per account, written after imports;
+# set to None to always load columns from the database
+PORTFOLIO_COLUMN_STORE_DIR = BASE_DIR / 'column_store'
+
+# Parquet archive of closed trades, partitioned by account and month;
+# archive_trades moves trades older than PORTFOLIO_ARCHIVE_AFTER_DAYS here
+PORTFOLIO_ARCHIVE_DIR = BASE_DIR / 'trade_archive'
+PORTFOLIO_ARCHIVE_AFTER_DAYS = 365
+
+# How import events reach portfolio_events streams: 'database' (through
+# the PortfolioEvent table, so events from import_worker reach every web
+# process), 'local' (same process only) or 'cache' (through the portfolio
+# cache)
+PORTFOLIO_EVENT_CHANNEL = 'database'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -120,6 +170,10 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [ BASE_DIR / "static" ]
 
+# Uploaded files (trade import CSVs waiting for run_import_worker)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -0,0 +1,198 @@
+# aggregate.py - Per-account statistics merged into user and firm views
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterable
+
+import django
+import numpy as np
+
+from wev.montecarlo import worker_context
+from wev.portfolio_cache import cache_key, get_portfolio_cache
+from wev.streaming import TDigest
+
+# Snapshot counters summed across accounts
+COUNTER_FIELDS = (
+    'trade_count', 'winning_trades', 'losing_trades', 'gross_profit', 'gross_loss',
+    'total_commission', 'total_volume',
+)
+SYMBOL_FIELDS = ('trade_count', 'winning_trades', 'total_profit', 'total_volume')
+QUANTILES = (0.01, 0.05, 0.5, 0.95, 0.99)
+# Below this many accounts a process pool costs more than it saves
+POOL_MIN_ACCOUNTS = 8
+
+
+def init_django_worker() -> None:
+    """Pool initializer; a forkserver or spawned worker has to set Django up itself"""
+    django.setup()
+
+
+def account_stats(account_id: int) -> Dict[str, Any]:
+    """Mergeable statistics of one account; runs in pool workers"""
+    from wev.column_store import open_column_store
+    from wev.utils import PortfolioAnalyzer, PortfolioSnapshot, SymbolSnapshot, TradingAccount
+
+    account = TradingAccount.objects.get(pk=account_id)
+    # Counters and symbol totals come from the rollups; only P&L is read per trade
+    snapshot = PortfolioSnapshot.current(account)
+    columns = open_column_store(account)
+    if columns is None:
+        columns = PortfolioAnalyzer(account).trade_columns(fields=('close_time', 'profit'))
+    profit = columns.profit_filled
+    days, daily = columns.group_sum(columns.close_day, profit)
+
+    digest = TDigest()
+    digest.update(profit)
+    symbols = {
+        row['symbol']: {field: float(row[field]) for field in SYMBOL_FIELDS}
+        for row in SymbolSnapshot.objects.filter(account=account).values('symbol', *SYMBOL_FIELDS)
+    }
+    return {
+        'account_id': account.pk,
+        'user_id': account.user_id,
+        'account_name': account.account_name,
+        'data_version': account.data_version,
+        'counters': {field: float(getattr(snapshot, field)) for field in COUNTER_FIELDS},
+        'max_drawdown': float(snapshot.max_drawdown),
+        'symbols': symbols,
+        'daily_pnl': {int(day): float(pnl) for day, pnl in zip(days, daily)},
+        'profit_digest': digest.to_dict(),
+    }
+
+
+def merge_stats(stats: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine account statistics by adding counters, symbol totals and daily P&L and merging digests"""
+    counters = dict.fromkeys(COUNTER_FIELDS, 0.0)
+    symbols = defaultdict(lambda: dict.fromkeys(SYMBOL_FIELDS, 0.0))
+    daily = defaultdict(float)
+    digest = TDigest()
+    accounts = []
+    worst_drawdown = 0.0
+
+    for account in stats:
+        accounts.append(account['account_id'])
+        for field in COUNTER_FIELDS:
+            counters[field] += account['counters'][field]
+        for symbol, totals in account['symbols'].items():
+            for field in SYMBOL_FIELDS:
+                symbols[symbol][field] += totals[field]
+        for day, pnl in account['daily_pnl'].items():
+            daily[int(day)] += pnl
+        digest.merge(TDigest.from_dict(account['profit_digest']))
+        worst_drawdown = max(worst_drawdown, account['max_drawdown'])
+
+    return {
+        'accounts': accounts,
+        'counters': counters,
+        'symbols': dict(symbols),
+        'daily_pnl': dict(daily),
+        'profit_digest': digest,
+        'worst_account_drawdown': worst_drawdown,
+    }
+
+
+def stats_view(merged: Dict[str, Any], top_symbols: int = 10) -> Dict[str, Any]:
+    """JSON-ready summary of merged statistics"""
+    counters = merged['counters']
+    trades = int(counters['trade_count'])
+    total_profit = counters['gross_profit'] - counters['gross_loss']
+    digest = merged['profit_digest']
+
+    # Accounts' daily P&L summed per day: the combined book's daily risk
+    daily = np.array([merged['daily_pnl'][day] for day in sorted(merged['daily_pnl'])])
+    var_95 = float(-np.percentile(daily, 5)) if len(daily) else 0.0
+    equity = np.cumsum(daily)
+    peak = np.maximum.accumulate(np.maximum(equity, 0)) if len(daily) else equity
+
+    symbols = sorted(merged['symbols'].items(), key=lambda item: -item[1]['trade_count'])
+    return {
+        'accounts': len(merged['accounts']),
+        'total_trades': trades,
+        'winning_trades': int(counters['winning_trades']),
+        'losing_trades': int(counters['losing_trades']),
+        'win_rate': round(counters['winning_trades'] / trades * 100, 1) if trades else 0,
+        'total_profit': round(total_profit, 2),
+        'total_commission': round(counters['total_commission'], 2),
+        'total_volume': round(counters['total_volume'], 2),
+        'profit_factor': round(counters['gross_profit'] / counters['gross_loss'], 2) if counters['gross_loss'] else 0,
+        'trade_profit_quantiles': {f"p{q * 100:g}": round(digest.quantile(q), 2) for q in QUANTILES},
+        'daily_var_95': round(max(var_95, 0.0), 2),
+        'combined_max_drawdown': round(float((peak - equity).max()), 2) if len(daily) else 0.0,
+        'worst_account_drawdown': round(merged['worst_account_drawdown'], 2),
+        'top_symbols': [
+            {
+                'symbol': symbol,
+                'trades': int(totals['trade_count']),
+                'win_rate': round(totals['winning_trades'] / totals['trade_count'] * 100, 1)
+                if totals['trade_count'] else 0,
+                'profit': round(totals['total_profit'], 2),
+                'volume': round(totals['total_volume'], 2),
+            }
+            for symbol, totals in symbols[:top_symbols]
+        ],
+    }
+
+
+class MultiAccountAnalyzer:
+    """Portfolio statistics across many accounts, computed per account in parallel.
+
+    Each account contributes mergeable statistics (counters, symbol
+    totals, daily P&L, a t-digest of trade P&L) built from its snapshot
+    and column files, so user and firm views never rescan trades. Imports
+    and precompute_portfolios store them in the portfolio cache; with
+    ``compute_missing=False`` (web views) accounts not cached yet are
+    listed in ``pending`` instead of being computed.
+    """
+
+    def __init__(self, accounts, workers: int = None, compute_missing: bool = True):
+        self.accounts = list(accounts.order_by('pk').only('pk', 'user_id', 'account_name', 'data_version'))
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.compute_missing = compute_missing
+        self.pending = []
+        self._stats = None
+
+    @property
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-account statistics, cached per data version; misses fan out to a process pool"""
+        if self._stats is None:
+            cache = get_portfolio_cache()
+            keys = {account.pk: cache_key(account, 'account_stats') for account in self.accounts}
+            found = cache.get_many(list(keys.values()))
+            missing = [pk for pk, key in keys.items() if key not in found]
+            if not self.compute_missing:
+                self.pending, missing = missing, []
+
+            if len(missing) >= POOL_MIN_ACCOUNTS and self.workers > 1:
+                # Workers aren't forked from this process, so they open their own database connections
+                workers = min(self.workers, len(missing))
+                chunksize = max(1, len(missing) // (workers * 4))
+                with ProcessPoolExecutor(max_workers=workers, mp_context=worker_context(),
+                                         initializer=init_django_worker) as pool:
+                    computed = list(pool.map(account_stats, missing, chunksize=chunksize))
+            else:
+                computed = [account_stats(pk) for pk in missing]
+
+            fresh = {keys[pk]: stats for pk, stats in zip(missing, computed)}
+            if fresh:
+                cache.set_many(fresh)
+            found.update(fresh)
+            self._stats = [found[keys[account.pk]] for account in self.accounts if keys[account.pk] in found]
+        return self._stats
+
+    def account_views(self) -> List[Dict[str, Any]]:
+        return [
+            {'account_id': stats['account_id'], 'account_name': stats['account_name'],
+             **stats_view(merge_stats([stats]), top_symbols=3)}
+            for stats in self.stats
+        ]
+
+    def user_views(self) -> Dict[int, Dict[str, Any]]:
+        """Merged view per account owner"""
+        by_user = defaultdict(list)
+        for stats in self.stats:
+            by_user[stats['user_id']].append(stats)
+        return {user_id: stats_view(merge_stats(group)) for user_id, group in by_user.items()}
+
+    def firm_view(self) -> Dict[str, Any]:
+        """Merged view of every account"""
+        return stats_view(merge_stats(self.stats))
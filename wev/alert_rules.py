@@ -0,0 +1,146 @@
+# alert_rules.py - Risk alert rules declared as data and evaluated in bulk
+from collections import defaultdict
+from typing import Dict, List, Any, Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+COMPARATORS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+}
+SEVERITIES = ('success', 'info', 'warning', 'danger')
+
+# Metrics alert_metrics produces; a rule on a metric an account lacks never fires
+METRICS = (
+    'total_trades', 'win_rate', 'total_profit', 'top_symbol_share', 'max_drawdown', 'drawdown_pct',
+    'max_pair_correlation', 'currency_concentration',
+)
+# Metrics taken from the correlation section; their rules' alerts ride along with it
+EXPOSURE_METRICS = ('max_pair_correlation', 'currency_concentration')
+
+
+class AlertRule(NamedTuple):
+    """metric <comparator> threshold raises an alert of ``severity`` once min_trades are closed"""
+    name: str
+    metric: str
+    comparator: str
+    threshold: float
+    severity: str = 'warning'
+    # str.format template over the account's metrics
+    message: str = ''
+    min_trades: int = 0
+    enabled: bool = True
+
+    def format(self, metrics: Dict[str, Any]) -> str:
+        try:
+            if self.message:
+                return self.message.format(**metrics)
+        except (KeyError, IndexError, ValueError):
+            pass
+        return f"{self.name}: {self.metric} {metrics.get(self.metric)} {self.comparator} {self.threshold:g}"
+
+
+# The checks _generate_risk_alerts used to hard-code; stored rules of the same name replace them
+DEFAULT_RULES = (
+    AlertRule('symbol_concentration', 'top_symbol_share', '>', 80, 'warning',
+              "High concentration in {top_symbol} ({top_symbol_trades} trades)"),
+    AlertRule('low_win_rate', 'win_rate', '<', 40, 'danger',
+              "Low win rate: {win_rate:.1f}% - Review strategy", min_trades=11),
+    AlertRule('high_win_rate', 'win_rate', '>', 70, 'success',
+              "Excellent win rate: {win_rate:.1f}%", min_trades=11),
+    AlertRule('correlated_symbols', 'max_pair_correlation', '>=', 0.7, 'warning',
+              "Correlated exposure: {correlated_pair} move {pair_relation} "
+              "(correlation {pair_correlation:.2f} over {pair_shared_days} days)"),
+    AlertRule('currency_concentration', 'currency_concentration', '>=', 60, 'warning',
+              "Concentrated {currency} exposure: net {currency_side} {currency_net:,.0f} across "
+              "{currency_symbols} symbols ({currency_concentration:.0f}% of gross notional)"),
+)
+
+
+def alert_metrics(totals: Dict[str, Any], symbol_trades: Dict[str, int], max_drawdown: float = None,
+                  initial_balance: float = None, exposure: Dict[str, Any] = None) -> Dict[str, Any]:
+    """One account's metrics (and the values alert messages mention) from precomputed totals"""
+    trades = totals['total_trades']
+    metrics = {
+        'total_trades': trades,
+        # nan compares False, so no win-rate rule fires on an empty account
+        'win_rate': totals['winning_trades'] / trades * 100 if trades else float('nan'),
+        'total_profit': float(totals['gross_profit'] - totals['gross_loss']),
+    }
+    if symbol_trades and trades:
+        top_symbol = max(symbol_trades, key=symbol_trades.get)
+        metrics.update(
+            top_symbol=top_symbol,
+            top_symbol_trades=symbol_trades[top_symbol],
+            top_symbol_share=symbol_trades[top_symbol] / trades * 100,
+        )
+    if max_drawdown is not None:
+        metrics['max_drawdown'] = float(max_drawdown)
+        if initial_balance:
+            metrics['drawdown_pct'] = float(max_drawdown) / float(initial_balance) * 100
+    metrics.update(exposure or {})
+    return metrics
+
+
+def exposure_rules(rules: List[AlertRule], overrides: Dict[int, Dict[str, AlertRule]]) -> Tuple[List[AlertRule], Dict[int, Dict[str, AlertRule]]]:
+    """The subset of resolved rules that test exposure metrics"""
+    rules = [rule for rule in rules if rule.metric in EXPOSURE_METRICS]
+    # An override onto another metric still replaces the global rule, so keep it, disabled
+    overrides = {
+        account: {
+            name: rule if rule.metric in EXPOSURE_METRICS else rule._replace(enabled=False)
+            for name, rule in account_rules.items()
+        }
+        for account, account_rules in overrides.items()
+    }
+    return rules, overrides
+
+
+def resolve_rules(stored: Iterable[Tuple[Optional[int], AlertRule]]) -> Tuple[List[AlertRule], Dict[int, Dict[str, AlertRule]]]:
+    """Global rules (defaults replaced by stored rules of the same name) and per-account overrides"""
+    rules = {rule.name: rule for rule in DEFAULT_RULES}
+    overrides = defaultdict(dict)
+    for account_id, rule in stored:
+        if account_id is None:
+            rules[rule.name] = rule
+        else:
+            overrides[account_id][rule.name] = rule
+    return list(rules.values()), dict(overrides)
+
+
+def evaluate_rules(metrics: Dict[int, Dict[str, Any]], rules: List[AlertRule],
+                   overrides: Dict[int, Dict[str, AlertRule]] = None) -> Dict[int, List[Dict[str, str]]]:
+    """Alerts per account; each rule is one vectorized comparison across all accounts"""
+    overrides = overrides or {}
+    accounts = list(metrics)
+    alerts = {account: [] for account in accounts}
+    trades = np.array([metrics[account].get('total_trades', 0) for account in accounts], dtype=np.float64)
+
+    names = list(dict.fromkeys(
+        [rule.name for rule in rules] + [name for rules_ in overrides.values() for name in rules_]
+    ))
+    defaults = {rule.name: rule for rule in rules}
+    for name in names:
+        effective = [overrides.get(account, {}).get(name, defaults.get(name)) for account in accounts]
+        # An override may change the metric or comparator, so compare per (metric, comparator) group
+        groups = defaultdict(list)
+        for i, rule in enumerate(effective):
+            if rule is not None and rule.enabled and rule.comparator in COMPARATORS:
+                groups[(rule.metric, rule.comparator)].append(i)
+
+        for (metric, comparator), members in groups.items():
+            members = np.array(members)
+            values = np.array(
+                [metrics[accounts[i]].get(metric, np.nan) for i in members], dtype=np.float64
+            )
+            thresholds = np.array([effective[i].threshold for i in members], dtype=np.float64)
+            min_trades = np.array([effective[i].min_trades for i in members], dtype=np.float64)
+            # nan (metric not available) compares False
+            with np.errstate(invalid='ignore'):
+                fired = COMPARATORS[comparator](values, thresholds) & (trades[members] >= min_trades)
+            for i in members[fired]:
+                rule = effective[i]
+                alerts[accounts[i]].append({'type': rule.severity, 'message': rule.format(metrics[accounts[i]])})
+    return alerts
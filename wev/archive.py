@@ -0,0 +1,221 @@
+# archive.py - Parquet archive of old closed trades, partitioned by account and month
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from wev.columnar import TradeColumns
+
+# Every imported trade field, so archived rows lose nothing but their pk
+ARCHIVE_FIELDS = (
+    'trade_id', 'symbol', 'side', 'volume', 'open_price', 'close_price', 'stop_loss',
+    'take_profit', 'open_time', 'close_time', 'commission', 'swap', 'profit', 'reason',
+)
+ARCHIVE_TEXT_FIELDS = ('trade_id', 'symbol', 'side', 'reason')
+ARCHIVE_TIME_FIELDS = ('open_time', 'close_time')
+# Decimal places of the Trade fields; stored as decimal128 so values round-trip exactly
+ARCHIVE_DECIMAL_SCALES = {
+    'volume': 2, 'open_price': 5, 'close_price': 5, 'stop_loss': 5, 'take_profit': 5,
+    'commission': 2, 'swap': 2, 'profit': 2,
+}
+ARCHIVE_DECIMAL_PRECISION = 18
+
+
+def _pyarrow():
+    """Import pyarrow on first use; it is only needed once archiving is turned on"""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImproperlyConfigured("The trade archive requires pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def archive_root() -> Optional[Path]:
+    """Directory of the archive, None when archiving is disabled"""
+    root = getattr(settings, 'PORTFOLIO_ARCHIVE_DIR', None)
+    return Path(root) if root else None
+
+
+def account_archive(account_id: int) -> Optional[Path]:
+    root = archive_root()
+    return root / f"account={account_id}" if root else None
+
+
+def has_archive(account_id: int) -> bool:
+    path = account_archive(account_id)
+    return path is not None and path.exists()
+
+
+def archive_months(account_id: int) -> List[str]:
+    """'YYYY-MM' month partitions of an account's archive, oldest first"""
+    if not has_archive(account_id):
+        return []
+    return sorted(path.name.split('=', 1)[1] for path in account_archive(account_id).glob('month=*'))
+
+
+def month_range(month: str) -> Tuple[datetime, datetime]:
+    """[start, end) of a 'YYYY-MM' UTC month"""
+    start = datetime.strptime(month, '%Y-%m').replace(tzinfo=dt_timezone.utc)
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+def archive_schema(pa):
+    """Arrow schema of the archive files: exact decimals, UTC microsecond timestamps"""
+    types = {}
+    for field in ARCHIVE_FIELDS:
+        if field in ARCHIVE_TEXT_FIELDS:
+            types[field] = pa.string()
+        elif field in ARCHIVE_TIME_FIELDS:
+            types[field] = pa.timestamp('us', tz='UTC')
+        else:
+            types[field] = pa.decimal128(ARCHIVE_DECIMAL_PRECISION, ARCHIVE_DECIMAL_SCALES[field])
+    return pa.schema([(field, types[field]) for field in ARCHIVE_FIELDS])
+
+
+def write_archive_chunk(account_id: int, rows: list, part: str) -> int:
+    """Write values_list rows (ARCHIVE_FIELDS order) as one Parquet file per close month.
+
+    ``part`` names the files, so re-running an interrupted chunk
+    overwrites its files instead of duplicating rows.
+    """
+    pa = _pyarrow()
+    if not rows:
+        return 0
+    schema = archive_schema(pa)
+    # Decimal fields stay Decimal, so the decimal128 columns hold the exact database values
+    df = pd.DataFrame(rows, columns=ARCHIVE_FIELDS)
+    for field in ARCHIVE_TIME_FIELDS:
+        df[field] = pd.to_datetime(df[field], utc=True)
+    months = df['close_time'].dt.strftime('%Y-%m')
+
+    for month, group in df.groupby(months, sort=True):
+        directory = account_archive(account_id) / f"month={month}"
+        directory.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(group.sort_values('close_time', kind='stable'),
+                                     schema=schema, preserve_index=False)
+        tmp = directory / f".part-{part}.parquet.tmp"
+        pa.parquet.write_table(table, tmp, compression='zstd')
+        tmp.replace(directory / f"part-{part}.parquet")
+    return len(df)
+
+
+def read_archive(account_id: int, fields: Tuple[str, ...] = TradeColumns.FIELDS,
+                 start: datetime = None, end: datetime = None) -> Optional[TradeColumns]:
+    """Archived trades of an account as TradeColumns, oldest close first.
+
+    Only ``fields`` are read (column pruning). A start/end range skips
+    whole month directories and, through row-group statistics, the
+    parts of files outside [start, end) (predicate pushdown).
+    """
+    table = _read_table(account_id, fields, start, end)
+    if table is None:
+        return None
+    pa = _pyarrow()
+
+    columns = {}
+    for field in fields:
+        column = table.column(field)
+        if field in TradeColumns.TIME_FIELDS:
+            # Arrow timestamps -> epoch seconds, as TradeColumns.from_rows produces
+            micros = column.cast(pa.timestamp('us', tz='UTC')).cast(pa.int64())
+            columns[field] = micros.to_numpy(zero_copy_only=False) / 1e6
+        elif field in TradeColumns.NUMERIC_FIELDS:
+            columns[field] = column.cast(pa.float64()).to_numpy(zero_copy_only=False)
+        else:
+            columns[field] = np.array(column.to_pylist(), dtype=object)
+    return TradeColumns(columns)
+
+
+def _read_table(account_id: int, fields: Tuple[str, ...], start: datetime = None, end: datetime = None,
+                **equal) -> Optional['pyarrow.Table']:
+    """Archived rows closing in [start, end) whose ``equal`` fields match, sorted by close time"""
+    if not has_archive(account_id):
+        return None
+    pa = _pyarrow()
+    ds = pa.dataset.dataset(account_archive(account_id), format='parquet', partitioning='hive')
+
+    # Month partitions are UTC months
+    start = start.astimezone(dt_timezone.utc) if start is not None else None
+    end = end.astimezone(dt_timezone.utc) if end is not None else None
+    conditions = []
+    if start is not None:
+        conditions.append((pa.dataset.field('month') >= start.strftime('%Y-%m')) &
+                          (pa.dataset.field('close_time') >= pa.scalar(start, pa.timestamp('us', tz='UTC'))))
+    if end is not None:
+        conditions.append((pa.dataset.field('month') <= end.strftime('%Y-%m')) &
+                          (pa.dataset.field('close_time') < pa.scalar(end, pa.timestamp('us', tz='UTC'))))
+    for field, value in equal.items():
+        if value is not None:
+            conditions.append(pa.dataset.field(field) == value)
+    condition = None
+    for part in conditions:
+        condition = part if condition is None else condition & part
+
+    table = ds.to_table(columns=list(fields), filter=condition)
+    if table.num_rows:
+        table = table.sort_by([('close_time', 'ascending'), ('trade_id', 'ascending')]
+                              if 'trade_id' in fields else 'close_time')
+    return table
+
+
+def iter_archive_months(account_id: int, fields: Tuple[str, ...] = TradeColumns.FIELDS):
+    """Archived trades one month partition at a time, oldest first, for constant-memory scans"""
+    for month in archive_months(account_id):
+        columns = read_archive(account_id, fields, *month_range(month))
+        if columns is not None and len(columns):
+            yield columns
+
+
+def iter_archive_records(account_id: int, fields: Tuple[str, ...] = ARCHIVE_FIELDS,
+                         start: datetime = None, end: datetime = None, descending: bool = False,
+                         **equal) -> Iterator[List[Dict[str, Any]]]:
+    """Archived trades as exact rows (Decimal, aware datetime), one month partition per list.
+
+    Rows are ordered by (close_time, trade_id), newest first when
+    ``descending``, so a caller can stop after the months it needs.
+    """
+    months = archive_months(account_id)
+    for month in reversed(months) if descending else months:
+        month_start, month_end = month_range(month)
+        if (start is not None and month_end <= start) or (end is not None and month_start >= end):
+            continue
+        bounds = (max(filter(None, (start, month_start))), min(filter(None, (end, month_end))))
+        table = _read_table(account_id, tuple(dict.fromkeys(fields + ('trade_id', 'close_time'))),
+                            *bounds, **equal)
+        if table is None or not table.num_rows:
+            continue
+        rows = table.to_pylist()
+        yield rows[::-1] if descending else rows
+
+
+def read_archive_frame(account_id: int, fields: Tuple[str, ...]) -> Optional[pd.DataFrame]:
+    """Archived trades as a DataFrame: float measures, UTC close times; None without an archive"""
+    table = _read_table(account_id, fields)
+    if table is None:
+        return None
+    pa = _pyarrow()
+    for i, field in enumerate(table.column_names):
+        if field in ARCHIVE_DECIMAL_SCALES:
+            table = table.set_column(i, field, table.column(field).cast(pa.float64()))
+    return table.to_pandas()
+
+
+def merge_columns(archived: Optional[TradeColumns], hot: TradeColumns) -> TradeColumns:
+    """Archived and hot trades in one close-time order"""
+    if archived is None or not len(archived):
+        return hot
+    if not len(hot):
+        return archived
+    merged = {
+        field: np.concatenate((archived.columns[field], hot.columns[field]))
+        for field in hot.columns
+    }
+    # Stable, so equal close times keep archive-then-hot (pk) order
+    order = np.argsort(merged['close_time'], kind='mergesort')
+    return TradeColumns({field: values[order] for field, values in merged.items()})
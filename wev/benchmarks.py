@@ -0,0 +1,150 @@
+# benchmarks.py - Synthetic trade generator and timing helpers for benchmark_portfolio
+import csv
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Callable, Iterator
+
+from django.db import connection
+
+# Same header, in the same order, as the broker export (wev/closedPositionsTab.csv)
+CSV_COLUMNS = [
+    'ID', 'Symbol', 'Open time', 'Volume', 'Side', 'Close time', 'Open price', 'Close Price',
+    'Stop loss', 'Take profit', 'Swap', 'Commission', 'Profit', 'Reason',
+]
+
+CURRENCIES = ['EUR', 'GBP', 'USD', 'JPY', 'AUD', 'NZD', 'CAD', 'CHF', 'SGD', 'NOK', 'SEK']
+METALS = ['XAUUSD', 'XAGUSD']
+
+
+def synthetic_symbols(count: int) -> List[str]:
+    """Metals first, then currency pairs, then numbered instruments if more are asked for"""
+    symbols = list(METALS)
+    symbols += [base + quote for base in CURRENCIES for quote in CURRENCIES if base != quote]
+    symbols += [f"IDX{i:03d}" for i in range(max(count - len(symbols), 0))]
+    return symbols[:count]
+
+
+def _instrument_specs(symbols: List[str]) -> Dict[str, np.ndarray]:
+    """Starting price, pip size and contract size per symbol, roughly realistic"""
+    price = np.where(
+        [s.startswith('XAU') for s in symbols], 3300.0,
+        np.where([s.startswith('XAG') for s in symbols], 38.0,
+                 np.where(['JPY' in s for s in symbols], 150.0, 1.2)),
+    )
+    pip = np.where(['JPY' in s for s in symbols], 0.01,
+                   np.where([s.startswith('XAU') for s in symbols], 0.1,
+                            np.where([s.startswith('XAG') for s in symbols], 0.001, 0.0001)))
+    contract = np.where([s.startswith('XAU') for s in symbols], 100.0,
+                        np.where([s.startswith('XAG') for s in symbols], 5000.0, 100000.0))
+    return {'price': price, 'pip': pip, 'contract': contract}
+
+
+def generate_trades(count: int, symbols: int = 20, seed: int = 0, chunk_size: int = 100000,
+                    start: str = '2020-01-01') -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of closed trades in the broker CSV layout, chunk by chunk.
+
+    Trades are spread evenly over time from ``start`` and generated with
+    vectorized NumPy calls, so 10M rows never sit in memory at once.
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array(synthetic_symbols(symbols))
+    specs = _instrument_specs(list(names))
+    start_ms = pd.Timestamp(start).value // 10 ** 6
+    spacing_ms = 60_000  # one new position a minute on average
+
+    for offset in range(0, count, chunk_size):
+        n = min(chunk_size, count - offset)
+        index = np.arange(offset, offset + n)
+        sym = rng.integers(0, len(names), n)
+
+        open_ms = start_ms + index * spacing_ms + rng.integers(0, spacing_ms, n)
+        close_ms = open_ms + rng.exponential(30 * 60_000, n).astype(np.int64) + 1000
+        volume = np.round(rng.choice([0.01, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0], n), 2)
+        buy = rng.random(n) < 0.5
+        direction = np.where(buy, 1.0, -1.0)
+
+        pip = specs['pip'][sym]
+        open_price = specs['price'][sym] * (1 + rng.normal(0, 0.05, n))
+        stop_pips = rng.integers(10, 60, n)
+        take_pips = rng.integers(10, 90, n)
+        stop_loss = open_price - direction * stop_pips * pip
+        take_profit = open_price + direction * take_pips * pip
+
+        # Outcome: take profit, stop loss, or a manual close somewhere between
+        outcome = rng.choice(3, n, p=[0.45, 0.40, 0.15])
+        manual = open_price + direction * rng.uniform(-stop_pips, take_pips) * pip
+        close_price = np.choose(outcome, [take_profit, stop_loss, manual])
+        reason = np.array(['Take Profit', 'Stop Loss', 'User'])[outcome]
+
+        profit = (close_price - open_price) * direction * volume * specs['contract'][sym]
+        profit = np.where(['JPY' in s for s in names[sym]], profit / 150.0, profit)
+        commission = -np.round(volume * 5, 2)
+        swap = np.where(close_ms - open_ms > 86_400_000, -np.round(volume * 2, 2), 0.0)
+        decimals = np.where(pip < 0.001, 5, np.where(pip < 0.05, 3, 2))
+
+        yield pd.DataFrame({
+            'ID': np.char.add('S', np.char.zfill(index.astype(str), 17)),
+            'Symbol': names[sym],
+            'Open time': np.datetime_as_string(open_ms.astype('datetime64[ms]'), unit='ms'),
+            'Volume': volume,
+            'Side': np.where(buy, 'BUY', 'SELL'),
+            'Close time': np.datetime_as_string(close_ms.astype('datetime64[ms]'), unit='ms'),
+            'Open price': _round_each(open_price, decimals),
+            'Close Price': _round_each(close_price, decimals),
+            'Stop loss': _round_each(stop_loss, decimals),
+            'Take profit': _round_each(take_profit, decimals),
+            'Swap': swap,
+            'Commission': commission,
+            'Profit': np.round(profit, 2),
+            'Reason': reason,
+        }, columns=CSV_COLUMNS)
+
+
+def _round_each(values: np.ndarray, decimals: np.ndarray) -> np.ndarray:
+    """Round each value to its own number of decimals"""
+    scale = 10.0 ** decimals
+    return np.round(values * scale) / scale
+
+
+def write_trades_csv(path, count: int, **kwargs) -> None:
+    """Write a synthetic broker export of ``count`` trades to ``path``"""
+    with open(path, 'w', newline='') as f:
+        header = True
+        for chunk in generate_trades(count, **kwargs):
+            chunk.to_csv(f, index=False, header=header, quoting=csv.QUOTE_MINIMAL)
+            header = False
+
+
+class QueryCounter:
+    """Counts SQL statements without keeping them (connection.execute_wrapper)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(func: Callable[[], Any], track_memory: bool = True) -> Dict[str, Any]:
+    """Wall time, SQL statement count and peak traced memory of one call"""
+    counter = QueryCounter()
+    if track_memory:
+        tracemalloc.start()
+    try:
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            func()
+            seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if track_memory else None
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+
+    return {
+        'seconds': round(seconds, 6),
+        'queries': counter.count,
+        'peak_memory_mb': round(peak / 2 ** 20, 3) if peak is not None else None,
+    }
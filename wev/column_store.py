@@ -0,0 +1,104 @@
+# column_store.py - Memory-mapped per-account trade column files
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+from wev.columnar import CodedColumn, TradeColumns
+
+# Layout of <store dir>/<account pk>/v<data version>/
+FLOAT_FIELDS = TradeColumns.NUMERIC_FIELDS            # float64, NULL as nan
+TIME_FIELDS = TradeColumns.TIME_FIELDS                # float64 epoch seconds, as TradeColumns holds them
+CODED_FIELDS = ('symbol', 'side')                     # int32 codes + sorted vocabulary in meta.json
+TEXT_FIELDS = ('trade_id',)                           # fixed-width unicode
+FORMAT_VERSION = 2
+
+
+def store_root() -> Optional[Path]:
+    """Directory holding the column files, None when the store is disabled"""
+    root = getattr(settings, 'PORTFOLIO_COLUMN_STORE_DIR', None)
+    return Path(root) if root else None
+
+
+def store_path(account) -> Optional[Path]:
+    root = store_root()
+    if root is None:
+        return None
+    return root / str(account.pk) / f"v{account.data_version}"
+
+
+def write_column_store(account, columns: TradeColumns) -> Optional[Path]:
+    """Write an account's closed-trade columns as files for its data version.
+
+    Files go to a temporary directory that is renamed into place, so
+    readers never see a partial version. Older versions are removed.
+    """
+    path = store_path(account)
+    if path is None:
+        return None
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = Path(tempfile.mkdtemp(dir=path.parent, prefix='.tmp-'))
+    try:
+        meta = {'format': FORMAT_VERSION, 'rows': len(columns), 'vocab': {}}
+        for field in FLOAT_FIELDS + TIME_FIELDS:
+            np.save(tmp / f"{field}.npy", columns.columns[field].astype(np.float64))
+        for field in CODED_FIELDS:
+            vocab, codes = columns.group_by(columns.columns[field].astype(str))
+            np.save(tmp / f"{field}.npy", codes.astype(np.int32))
+            meta['vocab'][field] = vocab.tolist()
+        for field in TEXT_FIELDS:
+            np.save(tmp / f"{field}.npy", columns.columns[field].astype(str))
+        (tmp / 'meta.json').write_text(json.dumps(meta))
+
+        # Trades written while reading belong to a newer version; don't label them with this one
+        current = type(account).objects.filter(pk=account.pk).values_list('data_version', flat=True).first()
+        if current != account.data_version:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return None
+
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # Another worker already wrote this version
+            shutil.rmtree(tmp, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    for old in path.parent.glob('v*'):
+        if old.name[1:].isdigit() and int(old.name[1:]) < account.data_version:
+            shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def open_column_store(account) -> Optional[TradeColumns]:
+    """TradeColumns backed by the account's column files, or None if there are none for its version.
+
+    Every column is memory-mapped read-only, so every process shares one
+    page-cached copy and nothing is read until used. Symbol and side stay
+    codes (CodedColumn) and trade ids fixed-width text; strings are only
+    built for the rows an analyzer hands out.
+    """
+    path = store_path(account)
+    if path is None or not (path / 'meta.json').exists():
+        return None
+    try:
+        meta = json.loads((path / 'meta.json').read_text())
+        if meta.get('format') != FORMAT_VERSION:
+            return None
+        columns = {}
+        for field in FLOAT_FIELDS + TIME_FIELDS + TEXT_FIELDS:
+            columns[field] = np.load(path / f"{field}.npy", mmap_mode='r')
+        for field in CODED_FIELDS:
+            codes = np.load(path / f"{field}.npy", mmap_mode='r')
+            columns[field] = CodedColumn(codes, meta['vocab'][field])
+    except (OSError, ValueError, KeyError):
+        # Removed by a newer writer mid-read, or damaged; fall back to the database
+        return None
+    return TradeColumns(columns)
@@ -0,0 +1,160 @@
+# columnar.py - Columnar trade engine
+import numpy as np
+from typing import Dict, List, Any, Tuple
+
+
+class CodedColumn:
+    """String column held as integer codes into a sorted vocabulary.
+
+    Slices and masks keep the codes (a memory-mapped column stays
+    mapped), grouping runs on the codes, and strings are only produced
+    for the rows actually read out.
+    """
+
+    def __init__(self, codes: np.ndarray, vocab):
+        self.codes = codes
+        self.vocab = np.asarray(vocab, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if np.isscalar(index):
+            return self.vocab[self.codes[index]]
+        return CodedColumn(self.codes[index], self.vocab)
+
+    def __eq__(self, other) -> np.ndarray:
+        """Rows equal to one string, compared as codes"""
+        code = np.flatnonzero(self.vocab == other)
+        return self.codes == (code[0] if len(code) else -1)
+
+    def __ne__(self, other) -> np.ndarray:
+        return ~(self == other)
+
+    __hash__ = None
+
+    def decode(self) -> np.ndarray:
+        """Object array of the strings; one pointer per row into the shared vocabulary"""
+        if not len(self.vocab):
+            return np.zeros(len(self.codes), dtype=object)
+        return self.vocab[self.codes]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        values = self.decode()
+        return values if dtype is None else values.astype(dtype)
+
+    def astype(self, dtype) -> np.ndarray:
+        return self.decode().astype(dtype)
+
+    def unique_inverse(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Codes in use and each row's position among them, in O(n)"""
+        used = np.flatnonzero(np.bincount(self.codes, minlength=len(self.vocab)))
+        position = np.zeros(len(self.vocab), dtype=np.int64)
+        position[used] = np.arange(len(used))
+        return self.vocab[used], position[self.codes]
+
+
+def group_keys(keys) -> Tuple[np.ndarray, np.ndarray]:
+    """(unique keys, inverse index) of an array or CodedColumn"""
+    if isinstance(keys, CodedColumn):
+        return keys.unique_inverse()
+    if not len(keys):
+        return keys, np.zeros(0, dtype=np.int64)
+    return np.unique(keys, return_inverse=True)
+
+
+class TradeColumns:
+    """Closed trades of one account held as NumPy column arrays.
+
+    Rows are loaded with a single ``values_list`` query, ordered by close
+    time (oldest first), so every analytics method can work off the same
+    arrays instead of issuing its own queries.
+    """
+
+    FIELDS = (
+        'trade_id', 'symbol', 'side', 'volume', 'open_price', 'close_price',
+        'open_time', 'close_time', 'commission', 'swap', 'profit',
+    )
+    NUMERIC_FIELDS = ('volume', 'open_price', 'close_price', 'commission', 'swap', 'profit')
+    TIME_FIELDS = ('open_time', 'close_time')
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        for name, values in columns.items():
+            setattr(self, name, values)
+
+    def __len__(self) -> int:
+        return len(self.close_time)
+
+    @classmethod
+    def from_queryset(cls, queryset, fields: Tuple[str, ...] = FIELDS) -> 'TradeColumns':
+        """Load the queryset once with a narrow projection"""
+        rows = list(
+            queryset.order_by('close_time', 'pk').values_list(*fields)
+        )
+        return cls.from_rows(rows, fields)
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple], fields: Tuple[str, ...] = FIELDS) -> 'TradeColumns':
+        """Build column arrays from ``values_list`` tuples in ``fields`` order"""
+        raw = dict(zip(fields, zip(*rows))) if rows else {f: () for f in fields}
+
+        columns = {}
+        for field, values in raw.items():
+            if field in cls.NUMERIC_FIELDS:
+                # Decimal -> float, NULL -> nan
+                columns[field] = np.array(values, dtype=np.float64)
+            elif field in cls.TIME_FIELDS:
+                # Aware datetimes -> UTC epoch seconds
+                columns[field] = np.array(
+                    [v.timestamp() if v is not None else np.nan for v in values],
+                    dtype=np.float64,
+                )
+            else:
+                columns[field] = np.array(values, dtype=object)
+        return cls(columns)
+
+    @property
+    def profit_filled(self) -> np.ndarray:
+        """Profit with NULL treated as zero, as SQL SUM does"""
+        return np.nan_to_num(self.profit)
+
+    @property
+    def close_day(self) -> np.ndarray:
+        """UTC day number of each close time"""
+        return np.floor_divide(self.close_time, 86400).astype(np.int64)
+
+    @property
+    def close_hour(self) -> np.ndarray:
+        """UTC hour of day of each close time"""
+        return (np.floor_divide(self.close_time, 3600) % 24).astype(np.int64)
+
+    @property
+    def close_month(self) -> np.ndarray:
+        """'YYYY-MM' label of each close time"""
+        months = self.close_time.astype('datetime64[s]').astype('datetime64[M]')
+        return np.datetime_as_string(months, unit='M')
+
+    def group_by(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (unique keys, inverse index) for a key column"""
+        return group_keys(keys)
+
+    def group_sum(self, keys: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Sum values per key in one vectorized pass"""
+        unique, inverse = self.group_by(keys)
+        return unique, np.bincount(inverse, weights=values, minlength=len(unique))
+
+    def group_count(self, keys: np.ndarray, mask: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Count rows per key, optionally only where mask is set"""
+        unique, inverse = self.group_by(keys)
+        weights = None if mask is None else mask.astype(np.float64)
+        counts = np.bincount(inverse, weights=weights, minlength=len(unique))
+        return unique, counts.astype(np.int64)
+
+    def tail(self, n: int) -> List[Dict[str, Any]]:
+        """Most recent n rows as dicts, newest first"""
+        start = max(len(self) - n, 0)
+        return [
+            {field: self.columns[field][i] for field in self.FIELDS}
+            for i in range(len(self) - 1, start - 1, -1)
+        ]
@@ -0,0 +1,70 @@
+# downsample.py - Shape-preserving downsampling for chart series
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Indices kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. Between them, each bucket
+    keeps the point forming the largest triangle with the previously kept
+    point and the average of the next bucket, so peaks and troughs survive.
+    """
+    size = len(x)
+    if points >= size or size <= 2:
+        return np.arange(size)
+    if points < 3:
+        return np.array([0, size - 1])[:max(points, 0)]
+
+    # points - 2 buckets over the interior indices 1 .. size - 2
+    edges = np.linspace(1, size - 1, points - 1).astype(np.int64)
+    kept = np.empty(points, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = size - 1
+
+    previous = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+            avg_x = x[next_lo:next_hi].mean()
+            avg_y = y[next_lo:next_hi].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        ax, ay = x[previous], y[previous]
+        area = np.abs((ax - avg_x) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y - ay))
+        previous = lo + int(np.argmax(area))
+        kept[i + 1] = previous
+    return kept
+
+
+def min_max(y: np.ndarray, points: int) -> np.ndarray:
+    """Endpoints plus the minimum and maximum of each of (points - 2) // 2 equal-size buckets"""
+    size = len(y)
+    if points >= size or size <= 2:
+        return np.arange(size)
+    if points < 4:
+        # No room for a bucket's min and max next to the endpoints
+        return np.array([0, size - 1])[:max(points, 0)]
+
+    buckets = (points - 2) // 2
+    edges = np.linspace(0, size, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    # reduceat gives each bucket's extreme value; recover its first index per bucket
+    lows = np.minimum.reduceat(y, starts)
+    highs = np.maximum.reduceat(y, starts)
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+    index = np.arange(size)
+    first_low = np.full(buckets, size)
+    first_high = np.full(buckets, size)
+    np.minimum.at(first_low, bucket[y == lows[bucket]], index[y == lows[bucket]])
+    np.minimum.at(first_high, bucket[y == highs[bucket]], index[y == highs[bucket]])
+
+    kept = np.unique(np.concatenate(([0, size - 1], first_low, first_high)))
+    return kept[kept < size]
+
+
+DOWNSAMPLERS = {
+    'lttb': lambda x, y, points: lttb(x, y, points),
+    'minmax': lambda x, y, points: min_max(y, points),
+}
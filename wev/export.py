@@ -0,0 +1,105 @@
+# export.py - Streamed CSV / NDJSON exports
+import csv
+import io
+import itertools
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from typing import Dict, List, Any, Iterable, Iterator
+
+# Rows fetched per database round trip, and rows per chunk written to the response
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def broker_time(value: datetime) -> str:
+    """UTC timestamp in the broker export layout, e.g. 2025-08-13T07:38:10.669"""
+    return value.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]
+
+
+def csv_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return broker_time(value)
+    return value
+
+
+def json_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _batched(rows: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def trade_csv_stream(queryset, column_mapping: Dict[str, str], chunk_size: int = EXPORT_CHUNK_SIZE,
+                     archived: Iterable[tuple] = ()) -> Iterator[str]:
+    """CSV text, header first, with one column per column_mapping entry (CSV header -> field).
+
+    ``archived`` rows (same field order) come before the queryset's.
+    Rows come from a server-side iterator and leave in chunks, so memory
+    does not grow with the account.
+    """
+    headers = list(column_mapping)
+    fields = [column_mapping[header] for header in headers]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    yield _drain(buffer)
+
+    rows = itertools.chain(archived, queryset.values_list(*fields).iterator(chunk_size=chunk_size))
+    for batch in _batched(rows, chunk_size):
+        writer.writerows([csv_value(value) for value in row] for row in batch)
+        yield _drain(buffer)
+
+
+def trade_ndjson_stream(queryset, fields: List[str], chunk_size: int = EXPORT_CHUNK_SIZE,
+                        archived: Iterable[tuple] = ()) -> Iterator[str]:
+    """One JSON object per trade and line, ``archived`` rows first"""
+    rows = itertools.chain(archived, queryset.values_list(*fields).iterator(chunk_size=chunk_size))
+    for batch in _batched(rows, chunk_size):
+        yield ''.join(
+            json.dumps({field: json_value(value) for field, value in zip(fields, row)}) + '\n'
+            for row in batch
+        )
+
+
+def records_csv_stream(records: Iterable[Dict[str, Any]], columns: List[str]) -> Iterator[str]:
+    """CSV of already computed rows, e.g. a pivot"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield _drain(buffer)
+    for batch in _batched(records, EXPORT_CHUNK_SIZE):
+        writer.writerows([csv_value(record.get(column)) for column in columns] for record in batch)
+        yield _drain(buffer)
+
+
+def records_ndjson_stream(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for batch in _batched(records, EXPORT_CHUNK_SIZE):
+        yield ''.join(json.dumps(record, default=json_value) + '\n' for record in batch)
+
+
+def _drain(buffer: io.StringIO) -> str:
+    """Return what was written to buffer and empty it"""
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
@@ -0,0 +1,139 @@
+# exposure.py - Cross-symbol correlation and net currency exposure
+import numpy as np
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from typing import Dict, List, Any, Tuple
+
+from wev.columnar import TradeColumns, group_keys
+from wev.symbols import notional_exposure
+
+# Pairs need at least this many days on which both symbols traded
+MIN_SHARED_DAYS = 10
+
+
+def correlation_section(days, today: date = None) -> str:
+    """Cache section of a correlation window; it names the window's end date, so it rolls over at UTC midnight"""
+    today = today or datetime.now(dt_timezone.utc).date()
+    return f"correlation:{days}:{today.isoformat()}"
+
+
+def correlation_since(days: int, today: date = None) -> datetime:
+    """Start of the ``days``-day window ending today: UTC midnight ``days`` days ago"""
+    today = today or datetime.now(dt_timezone.utc).date()
+    return datetime.combine(today - timedelta(days=days), time.min, tzinfo=dt_timezone.utc)
+
+
+def currency_legs(symbol: str) -> Tuple[str, str]:
+    """(base, quote) of a six-letter pair such as EURUSD or XAUUSD; other symbols are one asset"""
+    if len(symbol) == 6 and symbol.isalpha():
+        return symbol[:3], symbol[3:]
+    return symbol, None
+
+
+def daily_pnl_matrix(columns: TradeColumns) -> Dict[str, Any]:
+    """Days x symbols P&L matrix, aligned on the union of trading days, in one bincount"""
+    symbols, symbol_index = columns.group_by(columns.symbol)
+    days, day_index = columns.group_by(columns.close_day)
+    cells = np.bincount(
+        day_index * len(symbols) + symbol_index,
+        weights=columns.profit_filled,
+        minlength=len(days) * len(symbols),
+    )
+    return {'symbols': symbols, 'days': days, 'pnl': cells.reshape(len(days), len(symbols))}
+
+
+def correlation_matrix(pnl: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Pairwise Pearson correlation of the columns and the days both columns traded"""
+    active = (pnl != 0).astype(np.int64)
+    shared_days = active.T @ active
+    if pnl.shape[0] < 2:
+        return np.eye(pnl.shape[1]), shared_days
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = np.corrcoef(pnl, rowvar=False)
+    correlation = np.atleast_2d(np.nan_to_num(correlation))
+    np.fill_diagonal(correlation, 1.0)
+    return correlation, shared_days
+
+
+def net_currency_exposure(symbols: np.ndarray, sides: np.ndarray, volumes: np.ndarray,
+                          prices: np.ndarray) -> Dict[str, Any]:
+    """Net notional (account currency) per currency or asset: long base, short quote.
+
+    Signed notional is summed per symbol, then mapped onto currencies with
+    a symbols x currencies matrix of +1 (base) / -1 (quote) legs. ``stacked``
+    counts the symbols adding to each currency's net direction.
+    """
+    if not len(symbols):
+        return {'net': {}, 'stacked': {}, 'gross_notional': 0.0}
+    direction = np.where(sides == 'SELL', -1.0, 1.0)
+    signed = direction * notional_exposure(symbols, volumes, prices)
+    unique, inverse = group_keys(symbols)
+    per_symbol = np.bincount(inverse, weights=np.nan_to_num(signed), minlength=len(unique))
+
+    legs = [currency_legs(symbol) for symbol in unique]
+    currencies = sorted({leg for pair in legs for leg in pair if leg})
+    position = {currency: i for i, currency in enumerate(currencies)}
+    incidence = np.zeros((len(unique), len(currencies)))
+    for row, (base, quote) in enumerate(legs):
+        incidence[row, position[base]] = 1.0
+        if quote:
+            incidence[row, position[quote]] = -1.0
+
+    net = per_symbol @ incidence
+    contributions = per_symbol[:, None] * incidence
+    stacked = ((np.sign(contributions) == np.sign(net)) & (contributions != 0)).sum(axis=0)
+    return {
+        'net': {currency: round(float(amount), 2) for currency, amount in zip(currencies, net)},
+        'stacked': {currency: int(count) for currency, count in zip(currencies, stacked)},
+        'gross_notional': round(float(np.abs(per_symbol).sum()), 2),
+    }
+
+
+def correlated_pairs(symbols: np.ndarray, correlation: np.ndarray, shared_days: np.ndarray,
+                     limit: int = 10) -> List[Dict[str, Any]]:
+    """Most correlated symbol pairs (by |correlation|) with enough shared days"""
+    upper_i, upper_j = np.triu_indices(len(symbols), k=1)
+    strength = np.abs(correlation[upper_i, upper_j])
+    eligible = np.flatnonzero(shared_days[upper_i, upper_j] >= MIN_SHARED_DAYS)
+    # Filter before ranking, so ineligible pairs can't take places within the limit
+    order = eligible[np.argsort(-strength[eligible], kind='stable')]
+    return [
+        {
+            'symbols': [str(symbols[upper_i[k]]), str(symbols[upper_j[k]])],
+            'correlation': round(float(correlation[upper_i[k], upper_j[k]]), 3),
+            'shared_days': int(shared_days[upper_i[k], upper_j[k]]),
+        }
+        for k in order[:limit]
+    ]
+
+
+def exposure_metrics(pairs: List[Dict[str, Any]], exposure: Dict[str, Any]) -> Dict[str, Any]:
+    """Alert-rule metrics: the strongest pair correlation and the most concentrated currency"""
+    metrics = {}
+    if pairs:
+        # correlated_pairs is ordered by |correlation|
+        pair = pairs[0]
+        metrics.update(
+            max_pair_correlation=abs(pair['correlation']),
+            correlated_pair=' and '.join(pair['symbols']),
+            pair_correlation=pair['correlation'],
+            pair_relation='together' if pair['correlation'] > 0 else 'in opposite directions',
+            pair_shared_days=pair['shared_days'],
+        )
+
+    # Only currencies several symbols push the same way, e.g. long XAUUSD and short USDJPY
+    gross = exposure['gross_notional']
+    stacked = [
+        (abs(amount) / gross * 100, currency, amount)
+        for currency, amount in exposure['net'].items()
+        if exposure['stacked'][currency] >= 2 and gross > 0
+    ]
+    if stacked:
+        share, currency, amount = max(stacked)
+        metrics.update(
+            currency_concentration=share,
+            currency=currency,
+            currency_side='long' if amount > 0 else 'short',
+            currency_net=abs(amount),
+            currency_symbols=exposure['stacked'][currency],
+        )
+    return metrics
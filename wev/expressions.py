@@ -0,0 +1,47 @@
+# expressions.py - Database expressions for trade analytics
+from django.db.models import Aggregate, FloatField, Func
+
+
+class DurationHours(Func):
+    """Hours between two datetime columns, computed by the database"""
+
+    output_field = FloatField()
+    arity = 2
+
+    # PostgreSQL (and the default for other backends)
+    template = 'EXTRACT(EPOCH FROM (%(expressions)s)) / 3600.0'
+    arg_joiner = ' - '
+
+    def __init__(self, start, end, **extra):
+        # Stored as (end, start) so the default template reads "end - start"
+        super().__init__(end, start, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='(julianday(%(expressions)s)) * 24.0',
+            arg_joiner=') - julianday(',
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        # TIMESTAMPDIFF takes (unit, start, end)
+        end, start = self.get_source_expressions()
+        end_sql, end_params = compiler.compile(end)
+        start_sql, start_params = compiler.compile(start)
+        return (
+            f"TIMESTAMPDIFF(MICROSECOND, {start_sql}, {end_sql}) / 3600000000.0",
+            (*start_params, *end_params),
+        )
+
+
+class PercentileCont(Aggregate):
+    """Continuous percentile (ordered-set aggregate, PostgreSQL)"""
+
+    function = 'PERCENTILE_CONT'
+    name = 'PercentileCont'
+    output_field = FloatField()
+    template = '%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, expression, percentile: float, **extra):
+        super().__init__(expression, percentile=float(percentile), **extra)
@@ -0,0 +1,171 @@
+# history.py - Keyset-paginated trade history
+import base64
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Any, Optional, Tuple
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from wev.archive import iter_archive_records
+
+# Only these columns are read; pk is needed for the cursor
+HISTORY_FIELDS = (
+    'pk', 'trade_id', 'symbol', 'side', 'volume', 'open_price', 'close_price',
+    'open_time', 'close_time', 'commission', 'swap', 'profit', 'reason',
+)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(close_time: datetime, key, archived: bool = False) -> str:
+    """Opaque token for the position after a trade: (close_time, pk), or (close_time, trade_id) if archived"""
+    position = [close_time.isoformat(), key] + (['archive'] if archived else [])
+    raw = json.dumps(position).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Any, bool]:
+    """Inverse of encode_cursor; ValueError on anything malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        close_time, key, *source = json.loads(raw)
+        parsed = parse_datetime(close_time)
+    except (TypeError, ValueError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+    archived = source == ['archive']
+    if parsed is None or not isinstance(key, str if archived else int) or source not in ([], ['archive']):
+        raise ValueError("Invalid cursor")
+    return parsed, key, archived
+
+
+def parse_bound(value: Optional[str], end: bool = False) -> Optional[datetime]:
+    """Date or datetime query parameter as an aware datetime.
+
+    A bare date as the end bound covers that whole day.
+    """
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+        moment = parse_datetime(value) if day is None else None
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    elif moment is None:
+        raise ValueError(f"Invalid date: {value}")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def format_trade(row: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-ready trade from a values(*HISTORY_FIELDS) row"""
+    formatted = {'id': row['trade_id']}
+    for field in HISTORY_FIELDS[2:]:
+        value = row[field]
+        if isinstance(value, Decimal):
+            value = float(value)
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        formatted[field] = value
+    return formatted
+
+
+class TradeHistory:
+    """Closed trades newest first, paged by a (close_time, id) keyset cursor.
+
+    Each page is a range scan starting at the cursor, so page 1000 costs
+    the same as page 1, unlike OFFSET paging. With ``archive_account``
+    archived trades are merged in, read newest month first until the
+    page is full; at equal close times table rows come first.
+    """
+
+    def __init__(self, queryset, symbol: str = None, side: str = None,
+                 start: datetime = None, end: datetime = None, archive_account: int = None):
+        self.archive_account = archive_account
+        self.filters = {'symbol': symbol or None, 'side': side.upper() if side else None}
+        self.start, self.end = start, end
+        queryset = queryset.filter(close_time__isnull=False)
+        # symbol rides the (account, symbol) index, the range the close_time index
+        if symbol:
+            queryset = queryset.filter(symbol=symbol)
+        if side:
+            queryset = queryset.filter(side=side.upper())
+        if start is not None:
+            queryset = queryset.filter(close_time__gte=start)
+        if end is not None:
+            queryset = queryset.filter(close_time__lt=end)
+        self.queryset = queryset.order_by('-close_time', '-pk')
+
+    def page(self, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+        """One page of trades and the cursor of the next one (None on the last page)"""
+        limit = min(max(int(limit), 1), MAX_PAGE_SIZE)
+        queryset = self.queryset
+        position = decode_cursor(cursor) if cursor else None
+        if position is not None:
+            close_time, key, archived = position
+            # An archive cursor is past every table row at its close time
+            after = Q(close_time__lt=close_time) if archived else (
+                Q(close_time__lt=close_time) | Q(close_time=close_time, pk__lt=key)
+            )
+            queryset = queryset.filter(after)
+
+        # One extra row tells whether another page exists
+        rows = list(queryset.values(*HISTORY_FIELDS)[:limit + 1])
+        if self.archive_account is not None:
+            rows = sorted(
+                rows + self._archive_rows(position, limit + 1),
+                key=lambda row: (row['close_time'], 'pk' in row, row.get('pk', row['trade_id'])),
+                reverse=True,
+            )[:limit + 1]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = (encode_cursor(last['close_time'], last['pk']) if 'pk' in last
+                           else encode_cursor(last['close_time'], last['trade_id'], archived=True))
+
+        return {
+            'trades': [format_trade(row) for row in rows],
+            'next_cursor': next_cursor,
+        }
+
+    def _archive_rows(self, position: Optional[Tuple[datetime, Any, bool]], count: int) -> list:
+        """Archived rows after the cursor position, newest month first, until at least ``count`` are read"""
+        end = self.end
+        if position is not None:
+            close_time, key, archived = position
+            bound = close_time + timedelta(microseconds=1)
+            end = min(end, bound) if end is not None else bound
+
+        rows = []
+        for month in iter_archive_records(self.archive_account, HISTORY_FIELDS[1:], self.start, end,
+                                          descending=True, **self.filters):
+            if position is not None:
+                # A table cursor at close_time still has every archived row of that time ahead
+                month = [
+                    row for row in month
+                    if row['close_time'] < close_time
+                    or (row['close_time'] == close_time and (not archived or row['trade_id'] < key))
+                ]
+            rows.extend(month)
+            if len(rows) >= count:
+                break
+        return rows
+
+
+def history_params(params) -> Dict[str, Any]:
+    """TradeHistory filters from a request's GET parameters"""
+    return {
+        'symbol': params.get('symbol') or None,
+        'side': params.get('side') or None,
+        'start': parse_bound(params.get('start')),
+        'end': parse_bound(params.get('end'), end=True),
+    }
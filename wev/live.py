@@ -0,0 +1,264 @@
+# live.py - Portfolio change events pushed to open dashboards over Server-Sent Events
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from typing import Dict, List, Any, AsyncIterator, Optional
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from wev.portfolio_cache import get_portfolio_cache
+
+# Recent events kept per account so a reconnecting client can replay from Last-Event-ID
+EVENT_BUFFER = 100
+# Events queued per connection; a client that falls further behind loses the oldest
+SUBSCRIBER_QUEUE = 100
+# Idle seconds before a comment line keeps proxies from closing the stream
+KEEPALIVE_SECONDS = 15
+# How often a CacheChannel subscriber checks the account's sequence key
+CACHE_POLL_SECONDS = 1.0
+# How long a CacheChannel event stays readable
+CACHE_EVENT_TTL = 300
+# How often a process's DatabaseChannel poller looks for new events
+DB_POLL_SECONDS = 1.0
+# How long a DatabaseChannel event stays replayable
+DB_EVENT_TTL = 3600
+# Newest trades carried by one 'trades' event
+LIVE_TRADE_LIMIT = 50
+
+
+def _offer(queue: asyncio.Queue, record: Dict[str, Any]) -> None:
+    """put_nowait that drops the oldest event instead of failing when the queue is full"""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(record)
+
+
+class LocalChannel:
+    """In-process pub/sub: publishers in any thread, subscribers on an event loop.
+
+    Only reaches clients connected to the process that published, so it
+    suits a single ASGI process that also runs the imports.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._history = defaultdict(lambda: deque(maxlen=EVENT_BUFFER))
+        self._sequence = defaultdict(int)
+
+    def publish(self, account_id: int, event: str, data: Dict[str, Any]) -> int:
+        with self._lock:
+            self._sequence[account_id] += 1
+            record = {'id': self._sequence[account_id], 'event': event, 'data': data}
+            self._history[account_id].append(record)
+            subscribers = list(self._subscribers[account_id])
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, record)
+        return record['id']
+
+    async def subscribe(self, account_id: int, last_id: int = None,
+                        timeout: float = KEEPALIVE_SECONDS) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Events for the account as they are published; None after ``timeout`` idle seconds"""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(SUBSCRIBER_QUEUE))
+        # Registering and reading the backlog under one lock means no event is missed or repeated
+        with self._lock:
+            self._subscribers[account_id].add(subscriber)
+            backlog = [
+                record for record in self._history[account_id]
+                if last_id is not None and record['id'] > last_id
+            ]
+        try:
+            for record in backlog:
+                yield record
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), timeout)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._subscribers[account_id].discard(subscriber)
+
+
+class CacheChannel:
+    """Cross-process stand-in over the portfolio cache.
+
+    Publishers increment a per-account sequence key and store the event
+    under it; subscribers poll the sequence key and read what they missed.
+    Needs a cache shared by all processes (Redis, Memcached).
+    """
+
+    def _key(self, account_id: int, sequence: int = None) -> str:
+        key = f"portfolio:events:{account_id}"
+        return key if sequence is None else f"{key}:{sequence}"
+
+    def publish(self, account_id: int, event: str, data: Dict[str, Any]) -> int:
+        cache = get_portfolio_cache()
+        cache.add(self._key(account_id), 0, None)
+        sequence = cache.incr(self._key(account_id))
+        cache.set(self._key(account_id, sequence),
+                  {'id': sequence, 'event': event, 'data': data}, CACHE_EVENT_TTL)
+        return sequence
+
+    async def subscribe(self, account_id: int, last_id: int = None,
+                        timeout: float = KEEPALIVE_SECONDS) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Events for the account as they are published; None after ``timeout`` idle seconds"""
+        cache = get_portfolio_cache()
+        current = await cache.aget(self._key(account_id), 0)
+        # A sequence ahead of the key means the key was evicted; start over from it
+        last = current if last_id is None or last_id > current else last_id
+        idle = 0.0
+        while True:
+            current = await cache.aget(self._key(account_id), 0)
+            if current < last:
+                last = current
+            if current > last:
+                keys = [self._key(account_id, sequence) for sequence in range(last + 1, current + 1)]
+                found = await cache.aget_many(keys)
+                for key in keys:
+                    if key in found:
+                        yield found[key]
+                last, idle = current, 0.0
+                continue
+            await asyncio.sleep(CACHE_POLL_SECONDS)
+            idle += CACHE_POLL_SECONDS
+            if idle >= timeout:
+                idle = 0.0
+                yield None
+
+
+class DatabaseChannel:
+    """Cross-process channel over the PortfolioEvent table, like the ImportJob queue.
+
+    Publishers (import workers included) insert a row whose id is the
+    event id. One poller thread per process reads rows newer than the
+    last it saw for accounts with subscribers here and fans them out as
+    LocalChannel does; a reconnecting client replays rows after its
+    Last-Event-ID. Rows older than DB_EVENT_TTL are pruned on publish.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._poller = None
+
+    def _model(self):
+        # Looked up lazily; wev.utils, which defines the model, imports this module
+        return apps.get_model('wev', 'PortfolioEvent')
+
+    def publish(self, account_id: int, event: str, data: Dict[str, Any]) -> int:
+        events = self._model().objects
+        row = events.create(account_id=account_id, event=event, data=data)
+        events.filter(account_id=account_id,
+                      created_at__lt=timezone.now() - timedelta(seconds=DB_EVENT_TTL)).delete()
+        return row.pk
+
+    def _backlog(self, account_id: int, last_id: int) -> List[Dict[str, Any]]:
+        rows = self._model().objects.filter(account_id=account_id, pk__gt=last_id).order_by('pk')
+        return [row.as_record() for row in rows[:EVENT_BUFFER]]
+
+    def _poll(self) -> None:
+        """Poller thread: deliver new rows of subscribed accounts to this process's subscribers"""
+        events = self._model().objects
+        last_seen = None
+        while True:
+            with self._lock:
+                accounts = [account for account, subscribers in self._subscribers.items() if subscribers]
+            rows = []
+            try:
+                if last_seen is None:
+                    # Start at the newest event; anything older is the backlog's job
+                    last_seen = events.order_by('-pk').values_list('pk', flat=True).first() or 0
+                elif accounts:
+                    rows = list(events.filter(pk__gt=last_seen, account_id__in=accounts).order_by('pk'))
+            except DatabaseError:
+                pass
+            finally:
+                close_old_connections()
+            for row in rows:
+                last_seen = row.pk
+                record = row.as_record()
+                with self._lock:
+                    subscribers = list(self._subscribers[row.account_id])
+                for loop, queue in subscribers:
+                    loop.call_soon_threadsafe(_offer, queue, record)
+            time.sleep(DB_POLL_SECONDS)
+
+    async def subscribe(self, account_id: int, last_id: int = None,
+                        timeout: float = KEEPALIVE_SECONDS) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Events for the account as they are published; None after ``timeout`` idle seconds"""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(SUBSCRIBER_QUEUE))
+        with self._lock:
+            self._subscribers[account_id].add(subscriber)
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(target=self._poll, name='portfolio-events', daemon=True)
+                self._poller.start()
+        try:
+            # Registered first, so the poller may repeat a backlog row; ids drop repeats
+            sent = last_id
+            if last_id is not None:
+                for record in await sync_to_async(self._backlog)(account_id, last_id):
+                    sent = record['id']
+                    yield record
+            while True:
+                try:
+                    record = await asyncio.wait_for(subscriber[1].get(), timeout)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if sent is None or record['id'] > sent:
+                    sent = record['id']
+                    yield record
+        finally:
+            with self._lock:
+                self._subscribers[account_id].discard(subscriber)
+
+
+CHANNELS = {
+    'database': DatabaseChannel,
+    'local': LocalChannel,
+    'cache': CacheChannel,
+}
+_channel = None
+
+
+def get_channel():
+    """The channel named by PORTFOLIO_EVENT_CHANNEL ('database' by default)"""
+    global _channel
+    if _channel is None:
+        name = getattr(settings, 'PORTFOLIO_EVENT_CHANNEL', 'database')
+        if name not in CHANNELS:
+            raise ValueError(f"Unknown event channel: {name}")
+        _channel = CHANNELS[name]()
+    return _channel
+
+
+def publish_event(account_id: int, event: str, data: Dict[str, Any]) -> int:
+    """Send an event to every dashboard subscribed to the account"""
+    return get_channel().publish(account_id, event, data)
+
+
+def sse_message(record: Dict[str, Any]) -> str:
+    """One Server-Sent Events message"""
+    data = json.dumps(record['data'], cls=DjangoJSONEncoder)
+    return f"id: {record['id']}\nevent: {record['event']}\ndata: {data}\n\n"
+
+
+async def event_stream(account_id: int, last_id: int = None,
+                       initial: Dict[str, Any] = None) -> AsyncIterator[str]:
+    """SSE body: optional initial summary, then events as they arrive, with keep-alive comments"""
+    yield f"retry: {KEEPALIVE_SECONDS * 1000}\n\n"
+    if initial is not None:
+        # Not numbered, so it doesn't disturb the client's Last-Event-ID
+        data = json.dumps(initial, cls=DjangoJSONEncoder)
+        yield f"event: summary\ndata: {data}\n\n"
+    async for record in get_channel().subscribe(account_id, last_id):
+        yield ': keep-alive\n\n' if record is None else sse_message(record)
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from wev.archive import ARCHIVE_FIELDS, archive_root, write_archive_chunk
+from wev.column_store import write_column_store
+from wev.utils import (
+    ArchivedTradeId, PortfolioAnalyzer, PortfolioSnapshot, Trade, TradingAccount, deferred_version_bump,
+)
+
+
+class Command(BaseCommand):
+    help = "Move closed trades older than a cutoff into the Parquet archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int,
+                            default=getattr(settings, 'PORTFOLIO_ARCHIVE_AFTER_DAYS', 365),
+                            help="Archive trades closed more than this many days ago")
+        parser.add_argument('--account', type=int, action='append', dest='accounts',
+                            help="Only archive this account id (repeatable)")
+        parser.add_argument('--chunk-size', type=int, default=50000,
+                            help="Trades written and deleted per step")
+
+    def handle(self, *args, **options):
+        if archive_root() is None:
+            raise CommandError("PORTFOLIO_ARCHIVE_DIR is not set")
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+
+        accounts = TradingAccount.objects.all()
+        if options['accounts']:
+            accounts = accounts.filter(pk__in=options['accounts'])
+
+        for account in accounts:
+            archived = self.archive_account(account, cutoff, options['chunk_size'])
+            if archived:
+                self.stdout.write(f"Account {account.pk}: archived {archived} trades closed before {cutoff:%Y-%m-%d}")
+
+    def archive_account(self, account, cutoff, chunk_size: int) -> int:
+        old_trades = Trade.objects.filter(account=account, close_time__lt=cutoff).order_by('pk')
+        archived = 0
+        # The delete signals of every chunk add up to one data version bump
+        with deferred_version_bump():
+            while True:
+                rows = list(old_trades.values_list('pk', *ARCHIVE_FIELDS)[:chunk_size])
+                if not rows:
+                    break
+                first_pk, last_pk = rows[0][0], rows[-1][0]
+                # Files are written before the rows go, and named by pk range, so an
+                # interrupted run overwrites rather than duplicates on retry
+                write_archive_chunk(account.pk, [row[1:] for row in rows], part=f"{first_pk}-{last_pk}")
+                with transaction.atomic():
+                    # Same lock as CSVTradeProcessor, so an import sees the ids or the rows
+                    TradingAccount.objects.select_for_update().filter(pk=account.pk).exists()
+                    ArchivedTradeId.objects.bulk_create(
+                        [ArchivedTradeId(account=account, trade_id=row[1]) for row in rows],
+                        batch_size=chunk_size, ignore_conflicts=True,
+                    )
+                    old_trades.filter(pk__gte=first_pk, pk__lte=last_pk).delete()
+                archived += len(rows)
+
+        if archived:
+            account.refresh_from_db()
+            # Totals are unchanged, but rebuild them against the new version and
+            # refresh the column files, which now combine archive and table
+            PortfolioSnapshot.rebuild(account)
+            write_column_store(account, PortfolioAnalyzer(account, use_column_store=False).columns)
+        return archived
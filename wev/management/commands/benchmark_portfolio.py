@@ -0,0 +1,125 @@
+import json
+import os
+import platform
+import tempfile
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from wev.benchmarks import measure, write_trades_csv
+from wev.utils import CSVTradeProcessor, PortfolioAnalyzer, TradingAccount
+
+
+# (name, analyzer keyword arguments, method, method keyword arguments) timed on a cold
+# analyzer at every scale
+ANALYZER_BENCHMARKS = [
+    ('get_portfolio_summary', {}, 'get_portfolio_summary', {}),
+    ('get_portfolio_summary[full_scan]', {'use_snapshot': False}, 'get_portfolio_summary', {}),
+    ('get_advanced_analytics', {'streaming': False}, 'get_advanced_analytics', {}),
+    ('get_advanced_analytics[streaming]', {'streaming': True}, 'get_advanced_analytics', {}),
+    ('get_risk_metrics', {'streaming': False}, 'get_risk_metrics', {}),
+    ('get_risk_metrics[streaming]', {'streaming': True}, 'get_risk_metrics', {}),
+    ('get_rolling_metrics', {}, 'get_rolling_metrics', {}),
+    ('get_pivot[symbol,month]', {}, 'get_pivot', {'dimensions': ['symbol', 'month']}),
+    ('get_pivot[hour,weekday]', {}, 'get_pivot', {'dimensions': ['hour', 'weekday']}),
+    ('get_trade_history', {}, 'get_trade_history', {}),
+    ('get_trade_history[symbol]', {}, 'get_trade_history', {'symbol': 'EURUSD'}),
+    ('get_equity_curve', {}, 'get_equity_curve', {}),
+    ('get_equity_curve[minmax]', {}, 'get_equity_curve', {'method': 'minmax'}),
+    ('get_monte_carlo', {}, 'get_monte_carlo', {}),
+    ('get_monte_carlo[permute]', {}, 'get_monte_carlo', {'method': 'permute'}),
+    # Synthetic trades start in 2020, so use the widest window the API accepts
+    ('get_correlation_exposure', {}, 'get_correlation_exposure', {'days': 3650}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time CSV import and every public PortfolioAnalyzer method on synthetic accounts. "
+        "Data is written inside a transaction that is rolled back, but run it against a "
+        "scratch database: large sizes take a while and lock tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help="Comma-separated trade counts (up to 10000000)")
+        parser.add_argument('--symbols', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=3,
+                            help="Runs per analyzer method; the fastest is reported")
+        parser.add_argument('--chunk-size', type=int, default=CSVTradeProcessor.CHUNK_SIZE)
+        parser.add_argument('--no-memory', action='store_true',
+                            help="Skip tracemalloc, which slows allocation-heavy code")
+        parser.add_argument('--output', help="Write results as JSON to this path")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        track_memory = not options['no_memory']
+        results = []
+
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'trades.csv')
+                write_trades_csv(path, size, symbols=options['symbols'], seed=options['seed'])
+                results.extend(self.run_size(size, path, options, track_memory))
+
+        report = {
+            'started_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'database': connection.vendor,
+            'symbols': options['symbols'],
+            'seed': options['seed'],
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Wrote {len(results)} results to {options['output']}")
+
+    def run_size(self, size, path, options, track_memory):
+        """Import one synthetic file and time the analyzer, then roll everything back"""
+        results = []
+        with transaction.atomic():
+            user = User.objects.create(username=f"benchmark-{timezone.now().timestamp()}")
+            account = TradingAccount.objects.create(
+                user=user, account_name='Benchmark', broker='Synthetic', account_type='demo',
+                initial_balance=0, current_balance=0,
+            )
+
+            processor = CSVTradeProcessor(account, chunk_size=options['chunk_size'])
+            results.append(self.record(size, 'CSVTradeProcessor.process_csv',
+                                       measure(lambda: processor.process_csv(path), track_memory)))
+            account.refresh_from_db()
+
+            # Equity curves and correlation go through the portfolio cache; a
+            # dummy backend keeps every run cold
+            caches = {**settings.CACHES, 'benchmark': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+            with override_settings(CACHES=caches, PORTFOLIO_CACHE_ALIAS='benchmark'):
+                for name, kwargs, method, method_kwargs in ANALYZER_BENCHMARKS:
+                    runs = [
+                        measure(lambda: getattr(PortfolioAnalyzer(account, **kwargs), method)(**method_kwargs),
+                                track_memory)
+                        for _ in range(options['repeat'])
+                    ]
+                    best = min(runs, key=lambda run: run['seconds'])
+                    best['runs'] = len(runs)
+                    results.append(self.record(size, name, best))
+
+            transaction.set_rollback(True)
+        return results
+
+    def record(self, size, operation, measurement):
+        result = {'trades': size, 'operation': operation, **measurement}
+        memory = f"{result['peak_memory_mb']:>9.1f} MB" if result['peak_memory_mb'] is not None else ''
+        self.stdout.write(
+            f"{size:>10} {operation:<40} {result['seconds']:>10.4f}s {result['queries']:>7} queries {memory}"
+        )
+        return result
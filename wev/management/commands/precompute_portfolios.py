@@ -0,0 +1,95 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from wev.aggregate import account_stats, init_django_worker
+from wev.portfolio_cache import cache_key, get_portfolio_cache, is_process_local
+from wev.utils import COLUMN_SECTIONS, PORTFOLIO_SECTIONS, PortfolioAnalyzer, TradingAccount
+
+
+def precompute_account(account_id: int, sections: tuple):
+    """Compute an account's sections and merge statistics into the portfolio cache; returns its trade count"""
+    account = TradingAccount.objects.get(pk=account_id)
+    analyzer = PortfolioAnalyzer(account)
+    # One load of the snapshot and columns shared by every section
+    analyzer.load(columns=any(section in COLUMN_SECTIONS for section in sections))
+    values = {
+        cache_key(account, section): getattr(analyzer, PORTFOLIO_SECTIONS[section])()
+        for section in sections
+    }
+    # What the overview and firm views merge
+    values[cache_key(account, 'account_stats')] = account_stats(account.pk)
+    get_portfolio_cache().set_many(values)
+    return analyzer.snapshot.trade_count
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute portfolio_api sections and the per-account statistics firm_risk_api merges "
+        "for every active account into the portfolio cache, "
+        "skipping accounts whose data version is already cached. Schedule it nightly; the cache "
+        "must be shared with the web processes, so a process-local backend is refused."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sections', default='summary,analytics,risk',
+                            help=f"Comma-separated sections from: {', '.join(PORTFOLIO_SECTIONS)}")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes (1 runs in this process)")
+        parser.add_argument('--account', type=int, action='append', dest='accounts',
+                            help="Only precompute this account id (repeatable)")
+        parser.add_argument('--force', action='store_true',
+                            help="Recompute even when the data version is already cached")
+
+    def handle(self, *args, **options):
+        sections = tuple(section.strip() for section in options['sections'].split(',') if section.strip())
+        unknown = [section for section in sections if section not in PORTFOLIO_SECTIONS]
+        if unknown or not sections:
+            raise CommandError(f"Unknown sections: {', '.join(unknown) or '(none)'}")
+        cache = get_portfolio_cache()
+        if is_process_local(cache):
+            # Results would vanish with this process and never reach a web worker
+            raise CommandError(
+                f"The portfolio cache ({type(cache).__name__}) is local to this process; "
+                "configure a shared backend such as DatabaseCache or Redis"
+            )
+
+        accounts = TradingAccount.objects.filter(is_active=True)
+        if options['accounts']:
+            accounts = accounts.filter(pk__in=options['accounts'])
+        accounts = list(accounts.order_by('pk').only('pk', 'data_version'))
+        account_ids = [account.pk for account in accounts]
+        if not options['force']:
+            # Keys carry the data version, so an account with every section cached is unchanged
+            keys = {account.pk: [cache_key(account, section) for section in sections + ('account_stats',)]
+                    for account in accounts}
+            cached = cache.get_many([key for account_keys in keys.values() for key in account_keys])
+            account_ids = [pk for pk in account_ids if not all(key in cached for key in keys[pk])]
+
+        task = partial(precompute_account, sections=sections)
+        workers = max(1, min(options['workers'], len(account_ids)))
+        started = time.perf_counter()
+        if workers > 1:
+            # Forked workers must not share this process's database connections
+            connections.close_all()
+            chunksize = max(1, len(account_ids) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_django_worker) as pool:
+                trade_counts = list(pool.map(task, account_ids, chunksize=chunksize))
+        else:
+            trade_counts = [task(account_id) for account_id in account_ids]
+        elapsed = max(time.perf_counter() - started, 1e-9)
+
+        trades = sum(trade_counts)
+        if options['verbosity'] > 1:
+            for account_id, count in zip(account_ids, trade_counts):
+                self.stdout.write(f"Account {account_id}: {count} trades")
+
+        self.stdout.write(
+            f"{len(account_ids)} accounts computed, {len(accounts) - len(account_ids)} unchanged, "
+            f"{workers} workers, {elapsed:.2f}s: "
+            f"{len(account_ids) / elapsed:.1f} accounts/s, {trades / elapsed:,.0f} trades/s"
+        )
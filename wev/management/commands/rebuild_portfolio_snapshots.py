@@ -0,0 +1,67 @@
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from wev.utils import PortfolioAnalyzer, PortfolioSnapshot, TradingAccount
+
+
+class Command(BaseCommand):
+    help = "Recompute PortfolioSnapshot rollups from scratch, optionally checking them against a full scan"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--account', type=int, action='append', dest='accounts',
+                            help="Only rebuild this account id (repeatable)")
+        parser.add_argument('--verify', action='store_true',
+                            help="Compare each rebuilt snapshot with the full-scan summary")
+
+    def handle(self, *args, **options):
+        accounts = TradingAccount.objects.all()
+        if options['accounts']:
+            accounts = accounts.filter(pk__in=options['accounts'])
+
+        mismatched = 0
+        for account in accounts:
+            snapshot = PortfolioSnapshot.rebuild(account)
+            self.stdout.write(f"Account {account.pk}: {snapshot.trade_count} trades at v{snapshot.data_version}")
+
+            if options['verify']:
+                differences = self.compare(account, snapshot)
+                for difference in differences:
+                    self.stderr.write(f"  {difference}")
+                mismatched += bool(differences)
+
+        if mismatched:
+            raise CommandError(f"{mismatched} snapshot(s) do not match the full scan")
+
+    def compare(self, account, snapshot):
+        """List fields where the snapshot disagrees with a full scan"""
+        scan = PortfolioAnalyzer(account, use_snapshot=False, use_column_store=False)
+        rollup = PortfolioAnalyzer(account)
+        rollup._snapshot = snapshot
+
+        expected = scan.get_portfolio_summary()
+        actual = rollup.get_portfolio_summary()
+        differences = [
+            f"{key}: snapshot {actual[key]!r} != scan {expected[key]!r}"
+            for key in expected
+            if key not in ('symbol_stats', 'recent_trades') and actual[key] != expected[key]
+        ]
+
+        by_symbol = lambda stats: sorted(stats, key=lambda x: x['symbol'])
+        if by_symbol(actual['symbol_stats']) != by_symbol(expected['symbol_stats']):
+            differences.append("symbol_stats differ")
+
+        # Equity path in close-time order
+        cumulative = np.cumsum(scan.columns.profit_filled)
+        if len(cumulative):
+            peak = np.maximum.accumulate(np.maximum(cumulative, 0))
+            equity_expected = {
+                'equity': cumulative[-1],
+                'peak_equity': peak[-1],
+                'current_drawdown': peak[-1] - cumulative[-1],
+                'max_drawdown': (peak - cumulative).max(),
+            }
+            for field, value in equity_expected.items():
+                if round(float(getattr(snapshot, field)), 2) != round(float(value), 2):
+                    differences.append(f"{field}: snapshot {getattr(snapshot, field)} != scan {value:.2f}")
+
+        return differences
@@ -0,0 +1,37 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from wev.utils import CSVTradeProcessor, ImportJob
+
+
+class Command(BaseCommand):
+    help = "Process queued CSV trade imports from the ImportJob table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the queue once and exit instead of polling")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to wait when the queue is empty")
+        parser.add_argument('--stale-after', type=int, default=900,
+                            help="Requeue running jobs with no progress for this many seconds")
+        parser.add_argument('--chunk-size', type=int, default=CSVTradeProcessor.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options['stale_after'])
+
+        while True:
+            job = ImportJob.claim_next(stale_after=stale_after)
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Import {job.pk}: started for account {job.account_id}")
+            CSVTradeProcessor(job.account, chunk_size=options['chunk_size']).process_job(job)
+            self.stdout.write(
+                f"Import {job.pk}: {job.status} - {job.processed} processed, "
+                f"{job.skipped} skipped, {job.error_count} errors"
+            )
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wev', '0002_programregister'),
+        ('wev', '0002_programregister_package'),
+        ('wev', '0002_programregister_serviceinterest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TradingAccount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account_name', models.CharField(max_length=100)),
+                ('broker', models.CharField(max_length=50)),
+                ('account_type', models.CharField(choices=[('demo', 'Demo'), ('live', 'Live')], max_length=20)),
+                ('initial_balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('current_balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Trade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trade_id', models.CharField(max_length=50)),
+                ('symbol', models.CharField(max_length=20)),
+                ('side', models.CharField(choices=[('BUY', 'Buy'), ('SELL', 'Sell')], max_length=4)),
+                ('volume', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('open_price', models.DecimalField(decimal_places=5, max_digits=12)),
+                ('close_price', models.DecimalField(blank=True, decimal_places=5, max_digits=12, null=True)),
+                ('stop_loss', models.DecimalField(blank=True, decimal_places=5, max_digits=12, null=True)),
+                ('take_profit', models.DecimalField(blank=True, decimal_places=5, max_digits=12, null=True)),
+                ('open_time', models.DateTimeField()),
+                ('close_time', models.DateTimeField(blank=True, null=True)),
+                ('commission', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('swap', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('profit', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('reason', models.CharField(blank=True, max_length=20)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='wev.tradingaccount')),
+            ],
+            options={
+                'ordering': ['-close_time', '-open_time'],
+                'indexes': [models.Index(fields=['account', 'symbol'], name='wev_trade_account_ee9375_idx'), models.Index(fields=['close_time'], name='wev_trade_close_t_bbef33_idx'), models.Index(fields=['profit'], name='wev_trade_profit_c57668_idx')],
+                'constraints': [models.UniqueConstraint(fields=('account', 'trade_id'), name='unique_account_trade_id')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wev', '0004_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradingaccount',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
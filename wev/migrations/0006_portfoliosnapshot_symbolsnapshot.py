@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-17 09:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wev', '0005_tradingaccount_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_version', models.PositiveIntegerField(default=0)),
+                ('trade_count', models.PositiveIntegerField(default=0)),
+                ('winning_trades', models.PositiveIntegerField(default=0)),
+                ('losing_trades', models.PositiveIntegerField(default=0)),
+                ('gross_profit', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('gross_loss', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_commission', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_volume', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('equity', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('peak_equity', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('current_drawdown', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('max_drawdown', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('equity_stale', models.BooleanField(default=False)),
+                ('last_close_time', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='wev.tradingaccount')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SymbolSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=20)),
+                ('trade_count', models.PositiveIntegerField(default=0)),
+                ('winning_trades', models.PositiveIntegerField(default=0)),
+                ('total_profit', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_volume', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='symbol_snapshots', to='wev.tradingaccount')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('account', 'symbol'), name='unique_account_symbol_snapshot')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-17 09:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wev', '0006_portfoliosnapshot_symbolsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SymbolSpec',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=20, unique=True)),
+                ('pip_size', models.DecimalField(decimal_places=6, max_digits=12)),
+            ],
+            options={
+                'ordering': ['symbol'],
+            },
+        ),
+    ]
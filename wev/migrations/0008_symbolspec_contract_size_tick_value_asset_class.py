@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wev', '0007_symbolspec'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='symbolspec',
+            name='contract_size',
+            field=models.DecimalField(decimal_places=4, default=100000, max_digits=16),
+        ),
+        migrations.AddField(
+            model_name='symbolspec',
+            name='tick_value',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='symbolspec',
+            name='asset_class',
+            field=models.CharField(choices=[('forex', 'Forex'), ('metal', 'Metal'), ('index', 'Index'), ('commodity', 'Commodity'), ('crypto', 'Crypto'), ('other', 'Other')], default='forex', max_length=20),
+        ),
+    ]
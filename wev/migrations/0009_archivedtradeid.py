@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wev', '0008_symbolspec_contract_size_tick_value_asset_class'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTradeId',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trade_id', models.CharField(max_length=50)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_trade_ids', to='wev.tradingaccount')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('account', 'trade_id'), name='unique_account_archived_trade_id')],
+            },
+        ),
+    ]
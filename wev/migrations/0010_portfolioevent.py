@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:15
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wev', '0009_archivedtradeid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=20)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='wev.tradingaccount')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['account', 'id'], name='wev_portfol_account_d5b2c6_idx'), models.Index(fields=['created_at'], name='wev_portfol_created_37a508_idx')],
+            },
+        ),
+    ]
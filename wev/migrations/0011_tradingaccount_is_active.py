@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wev', '0010_portfolioevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradingaccount',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+    ]
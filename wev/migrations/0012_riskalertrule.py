@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wev', '0011_tradingaccount_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskAlertRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.SlugField()),
+                ('metric', models.CharField(choices=[('total_trades', 'total_trades'), ('win_rate', 'win_rate'), ('total_profit', 'total_profit'), ('top_symbol_share', 'top_symbol_share'), ('max_drawdown', 'max_drawdown'), ('drawdown_pct', 'drawdown_pct'), ('max_pair_correlation', 'max_pair_correlation'), ('currency_concentration', 'currency_concentration')], max_length=50)),
+                ('comparator', models.CharField(choices=[('>', '>'), ('>=', '>='), ('<', '<'), ('<=', '<=')], max_length=2)),
+                ('threshold', models.FloatField()),
+                ('severity', models.CharField(choices=[('success', 'Success'), ('info', 'Info'), ('warning', 'Warning'), ('danger', 'Danger')], default='warning', max_length=10)),
+                ('message', models.CharField(blank=True, max_length=255)),
+                ('min_trades', models.PositiveIntegerField(default=0)),
+                ('enabled', models.BooleanField(default=True)),
+                ('account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alert_rules', to='wev.tradingaccount')),
+            ],
+            options={
+                'ordering': ['name'],
+                'constraints': [models.UniqueConstraint(fields=('account', 'name'), name='unique_account_alert_rule'), models.UniqueConstraint(condition=models.Q(('account__isnull', True)), fields=('name',), name='unique_global_alert_rule')],
+            },
+        ),
+    ]
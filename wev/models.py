@@ -94,3 +94,10 @@ class ProgramRegister(models.Model):
     twitter = models.CharField(max_length=100, blank=True, null=True)
 
     registered_at = models.DateTimeField(auto_now_add=True)
+
+
+# The trading models are defined with their analytics in utils.py; importing them here registers them with the app
+from wev.utils import (  # noqa: E402,F401
+    ArchivedTradeId, ImportJob, PortfolioEvent, PortfolioSnapshot, RiskAlertRule, SymbolSnapshot, SymbolSpec,
+    Trade, TradingAccount,
+)
@@ -0,0 +1,188 @@
+# montecarlo.py - Bootstrap / permutation simulation of per-trade P&L paths
+import multiprocessing
+import os
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Any, Optional
+
+from wev.streaming import TDigest
+
+METHODS = ('bootstrap', 'permute')
+BAND_PERCENTILES = (5, 25, 50, 75, 95)
+SUMMARY_PERCENTILES = (5, 50, 95, 99)
+
+# Values held at once per batch: paths x horizon, or paths x trades when permuting
+BATCH_CELLS = 2_000_000
+# Paths per task; tasks are seeded independently, so results don't depend on worker count
+TASK_PATHS = 5000
+# Below this many paths a process pool costs more than it saves
+POOL_MIN_PATHS = 20000
+# Points on the equity-band x axis
+BAND_STEPS = 100
+
+
+def band_steps(horizon: int) -> np.ndarray:
+    """Trade counts (1-based) at which equity bands are reported"""
+    return np.unique(np.linspace(1, horizon, min(horizon, BAND_STEPS)).astype(np.int64))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def worker_context():
+    """Multiprocessing context for worker pools: forkserver, or spawn where there is none.
+
+    Never a fork of a threaded web process, whose locks and database
+    connections the child would inherit.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Worker pool shared by every simulation in this process, started on first use; workers only run numpy code"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=worker_context())
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget a broken pool so the next simulation starts a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def simulate_batch(pnl: np.ndarray, paths: int, horizon: int, method: str,
+                   rng: np.random.Generator) -> np.ndarray:
+    """paths x horizon array of simulated per-trade P&L"""
+    if method == 'bootstrap':
+        # Draw trades with replacement
+        return pnl[rng.integers(0, len(pnl), size=(paths, horizon))]
+    # Reorder the actual trades; horizon is capped at the trade count
+    return rng.permuted(np.broadcast_to(pnl, (paths, len(pnl))), axis=1)[:, :horizon]
+
+
+def _run_task(pnl: np.ndarray, paths: int, horizon: int, method: str,
+              seed: np.random.SeedSequence, ruin_loss: Optional[float]) -> Dict[str, Any]:
+    """Simulate ``paths`` paths in batches and return mergeable accumulators"""
+    rng = np.random.default_rng(seed)
+    steps = band_steps(horizon) - 1
+    # A permutation shuffles every trade even when the horizon is shorter
+    width = len(pnl) if method == 'permute' else horizon
+    batch_paths = max(1, BATCH_CELLS // width)
+
+    bands = [TDigest() for _ in steps]
+    drawdowns = TDigest()
+    finals = TDigest()
+    drawdown_sum = 0.0
+    ruined = 0
+
+    for start in range(0, paths, batch_paths):
+        batch = simulate_batch(pnl, min(batch_paths, paths - start), horizon, method, rng)
+        equity = np.cumsum(batch, axis=1)
+        # Peak starts at the opening balance (zero P&L)
+        peak = np.maximum.accumulate(np.maximum(equity, 0), axis=1)
+        max_drawdown = (peak - equity).max(axis=1)
+
+        drawdowns.update(max_drawdown)
+        finals.update(equity[:, -1])
+        drawdown_sum += float(max_drawdown.sum())
+        if ruin_loss is not None:
+            ruined += int((equity.min(axis=1) <= -ruin_loss).sum())
+        for digest, step in zip(bands, steps):
+            digest.update(equity[:, step])
+
+    return {
+        'paths': paths,
+        'ruined': ruined,
+        'drawdown_sum': drawdown_sum,
+        'drawdowns': drawdowns.to_dict(),
+        'finals': finals.to_dict(),
+        'bands': [digest.to_dict() for digest in bands],
+    }
+
+
+def _merge(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    merged = results[0]
+    drawdowns = TDigest.from_dict(merged['drawdowns'])
+    finals = TDigest.from_dict(merged['finals'])
+    bands = [TDigest.from_dict(band) for band in merged['bands']]
+    for result in results[1:]:
+        merged['paths'] += result['paths']
+        merged['ruined'] += result['ruined']
+        merged['drawdown_sum'] += result['drawdown_sum']
+        drawdowns.merge(TDigest.from_dict(result['drawdowns']))
+        finals.merge(TDigest.from_dict(result['finals']))
+        for digest, band in zip(bands, result['bands']):
+            digest.merge(TDigest.from_dict(band))
+    merged.update(drawdowns=drawdowns, finals=finals, bands=bands)
+    return merged
+
+
+def monte_carlo(pnl: np.ndarray, paths: int = 10000, method: str = 'bootstrap', seed: int = 0,
+                horizon: int = None, ruin_loss: float = None, workers: int = None) -> Dict[str, Any]:
+    """Distribution of drawdown, final P&L and equity paths from resampled trades.
+
+    ``bootstrap`` draws trades with replacement, ``permute`` shuffles the
+    actual sequence. The same seed gives the same result however many
+    worker processes run the tasks.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    pnl = np.asarray(pnl, dtype=np.float64)
+    if not len(pnl) or paths < 1:
+        return {}
+    horizon = len(pnl) if horizon is None else int(horizon)
+    if method == 'permute':
+        horizon = min(horizon, len(pnl))
+    if horizon < 1:
+        raise ValueError("horizon must be at least 1")
+
+    sizes = [min(TASK_PATHS, paths - start) for start in range(0, paths, TASK_PATHS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(pnl, size, horizon, method, task_seed, ruin_loss) for size, task_seed in zip(sizes, seeds)]
+
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    results = None
+    if paths >= POOL_MIN_PATHS and workers > 1 and len(tasks) > 1:
+        pool = get_pool()
+        try:
+            results = list(pool.map(_run_task, *zip(*tasks)))
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); finish in this process
+            _discard_pool(pool)
+    if results is None:
+        results = [_run_task(*task) for task in tasks]
+    merged = _merge(results)
+
+    steps = band_steps(horizon)
+    return {
+        'method': method,
+        'paths': merged['paths'],
+        'trades_per_path': horizon,
+        'seed': seed,
+        'risk_of_ruin': round(merged['ruined'] / merged['paths'] * 100, 2) if ruin_loss is not None else None,
+        'ruin_loss': round(ruin_loss, 2) if ruin_loss is not None else None,
+        'expected_max_drawdown': round(merged['drawdown_sum'] / merged['paths'], 2),
+        'max_drawdown_percentiles': {
+            str(p): round(merged['drawdowns'].quantile(p / 100), 2) for p in SUMMARY_PERCENTILES
+        },
+        'final_pnl_percentiles': {
+            str(p): round(merged['finals'].quantile(p / 100), 2) for p in SUMMARY_PERCENTILES
+        },
+        'equity_bands': {
+            'trades': steps.tolist(),
+            **{
+                f"p{p}": [round(digest.quantile(p / 100), 2) for digest in merged['bands']]
+                for p in BAND_PERCENTILES
+            },
+        },
+    }
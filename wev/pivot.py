@@ -0,0 +1,173 @@
+# pivot.py - SQL pivot cube over closed trades
+from decimal import Decimal
+from typing import Dict, List, Any, Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+import pandas as pd
+from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay, TruncMonth
+from django.utils import timezone
+
+# Dimension name -> expression builder; time dimensions use close_time in the pivot's timezone
+DIMENSIONS = {
+    'symbol': lambda tz: F('symbol'),
+    'side': lambda tz: F('side'),
+    'reason': lambda tz: F('reason'),
+    'hour': lambda tz: ExtractHour('close_time', tzinfo=tz),
+    'weekday': lambda tz: ExtractIsoWeekDay('close_time', tzinfo=tz),  # 1 = Monday
+    'month': lambda tz: TruncMonth('close_time', tzinfo=tz),
+}
+
+# Measure name -> aggregate; wins/losses are conditional counts in the same GROUP BY
+MEASURES = {
+    'count': lambda: Count('pk'),
+    'wins': lambda: Count('pk', filter=Q(profit__gt=0)),
+    'losses': lambda: Count('pk', filter=Q(profit__lt=0)),
+    'profit': lambda: Sum('profit'),
+    'avg_profit': lambda: Avg('profit'),
+    'volume': lambda: Sum('volume'),
+}
+
+DEFAULT_MEASURES = ('count', 'wins', 'profit')
+# Archived trade columns a pivot reads to merge in archived trades
+ARCHIVE_FIELDS = ('symbol', 'side', 'reason', 'close_time', 'profit', 'volume')
+
+
+class PivotQuery:
+    """One pivot request: group closed trades by dimensions and aggregate measures.
+
+    The whole request compiles to a single GROUP BY query. Output keys
+    are prefixed so a dimension and a measure never collide.
+    """
+
+    def __init__(self, dimensions: Sequence[str], measures: Sequence[str] = DEFAULT_MEASURES,
+                 tz: str = None):
+        self.dimensions = list(dict.fromkeys(dimensions))
+        self.measures = list(dict.fromkeys(measures))
+        self.tz_name = tz or timezone.get_default_timezone_name()
+
+        unknown = [d for d in self.dimensions if d not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown dimension(s): {', '.join(unknown)}")
+        unknown = [m for m in self.measures if m not in MEASURES]
+        if unknown:
+            raise ValueError(f"Unknown measure(s): {', '.join(unknown)}")
+        if not self.measures:
+            raise ValueError("At least one measure is required")
+        try:
+            self.tz = ZoneInfo(self.tz_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown timezone: {self.tz_name}")
+
+    @property
+    def cache_section(self) -> str:
+        """Section name for cached_section; one entry per distinct request"""
+        return f"pivot:{','.join(self.dimensions)}:{','.join(self.measures)}:{self.tz_name}"
+
+    def run(self, queryset, archived: pd.DataFrame = None) -> Dict[str, Any]:
+        """Execute against a trade queryset and return rows sorted by dimension values.
+
+        ``archived`` (ARCHIVE_FIELDS of archived trades) is grouped the same
+        way in pandas and added to the query's groups.
+        """
+        dims = {f"d_{name}": DIMENSIONS[name](self.tz) for name in self.dimensions}
+        aggs = {f"m_{name}": MEASURES[name]() for name in self.measures}
+        merge = archived is not None and len(archived) > 0
+        if merge:
+            # An average only merges as a sum and a count
+            aggs.update(h_profit_sum=Sum('profit'), h_profit_count=Count('profit'))
+
+        if dims:
+            # Clear any ordering first, otherwise its columns join the GROUP BY
+            rows = (
+                queryset.order_by()
+                .annotate(**dims)
+                .values(*dims)
+                .annotate(**aggs)
+                .order_by(*dims)
+            )
+        else:
+            # No dimensions: the grand total row
+            rows = [queryset.order_by().aggregate(**aggs)]
+        if merge:
+            rows = self._merge_archived(rows, archived)
+
+        return {
+            'dimensions': self.dimensions,
+            'measures': self.measures,
+            'timezone': self.tz_name,
+            'rows': [self._format_row(row) for row in rows],
+        }
+
+    def _merge_archived(self, rows, archived: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Query rows plus archived trades' aggregates, summed group by group"""
+        profit = archived['profit']
+        values = pd.DataFrame({
+            'm_count': np.ones(len(archived), dtype=np.int64),
+            'm_wins': (profit > 0).astype(np.int64),
+            'm_losses': (profit < 0).astype(np.int64),
+            'm_profit': profit,
+            'm_volume': archived['volume'],
+            'h_profit_sum': profit,
+            'h_profit_count': profit.notna().astype(np.int64),
+        }, index=archived.index)
+        local = archived['close_time'].dt.tz_convert(self.tz)
+        keys = {
+            'symbol': archived['symbol'], 'side': archived['side'], 'reason': archived['reason'],
+            'hour': local.dt.hour, 'weekday': local.dt.weekday + 1, 'month': local.dt.strftime('%Y-%m'),
+        }
+        columns = ['m_count', 'm_wins', 'm_losses', 'm_profit', 'm_volume', 'h_profit_sum', 'h_profit_count']
+
+        def python(value):
+            if isinstance(value, Decimal):
+                return float(value)
+            if isinstance(value, np.generic):
+                value = value.item()
+            return None if isinstance(value, float) and np.isnan(value) else value
+
+        merged = {}
+        for row in rows:
+            key = tuple(self._dimension_value(name, row[f"d_{name}"]) for name in self.dimensions)
+            merged[key] = {column: python(row.get(column)) for column in columns}
+        if self.dimensions:
+            grouped = values.groupby([keys[name].rename(name) for name in self.dimensions], dropna=False).sum()
+            # itertuples keeps each column's dtype, so counts stay integers
+            groups = [(key if isinstance(key, tuple) else (key,), totals)
+                      for key, *totals in grouped[columns].itertuples()]
+        else:
+            groups = [((), [values[column].sum() for column in columns])]
+        for key, totals in groups:
+            totals_row = merged.setdefault(tuple(python(value) for value in key), {})
+            for column, total in zip(columns, totals):
+                totals_row[column] = (totals_row.get(column) or 0) + python(total)
+
+        result = []
+        for key in sorted(merged, key=lambda key: [(value is None, value) for value in key]):
+            row = merged[key]
+            count = row['h_profit_count']
+            row['m_avg_profit'] = row['h_profit_sum'] / count if count else None
+            row.update({f"d_{name}": value for name, value in zip(self.dimensions, key)})
+            result.append(row)
+        return result
+
+    def _dimension_value(self, name: str, value: Any) -> Any:
+        if name == 'month' and value is not None and not isinstance(value, str):
+            return value.strftime('%Y-%m')
+        return value
+
+    def _format_row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        formatted = {}
+        for name in self.dimensions:
+            formatted[name] = self._dimension_value(name, row[f"d_{name}"])
+        for name in self.measures:
+            value = row[f"m_{name}"]
+            if isinstance(value, (Decimal, float)):
+                value = round(float(value), 2)
+            formatted[name] = value if value is not None else 0
+        return formatted
+
+
+def pivot_param(value: str) -> List[str]:
+    """Split a comma-separated query parameter into names"""
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
@@ -0,0 +1,78 @@
+# portfolio_cache.py - Versioned cache for computed portfolio data
+import hashlib
+import time
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Sections whose payload holds evaluated alert rules; their keys also carry the rules version
+RULE_SECTIONS = {'risk'}
+RULES_VERSION_KEY = 'portfolio:alert_rules:version'
+
+
+def get_portfolio_cache():
+    """Cache backend holding computed portfolio sections"""
+    return caches[getattr(settings, 'PORTFOLIO_CACHE_ALIAS', 'default')]
+
+
+def is_process_local(cache) -> bool:
+    """Whether other processes (web workers, run_import_worker) can't see this cache's entries"""
+    return isinstance(cache, (LocMemCache, DummyCache))
+
+
+def rules_version() -> int:
+    """Version of the stored alert rules, shared by every process through the portfolio cache"""
+    cache = get_portfolio_cache()
+    version = cache.get(RULES_VERSION_KEY)
+    if version is None:
+        # Never set, or evicted: a timestamp can't repeat a version already used in keys
+        cache.add(RULES_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(RULES_VERSION_KEY)
+    return version
+
+
+def bump_rules_version() -> None:
+    """Invalidate every section holding evaluated alerts, leaving the rest of the cache alone"""
+    cache = get_portfolio_cache()
+    try:
+        cache.incr(RULES_VERSION_KEY)
+    except ValueError:
+        cache.set(RULES_VERSION_KEY, time.time_ns(), None)
+
+
+def cache_key(account, section: str) -> str:
+    """Key for one section (or comma-joined sections) of one account at its current data version.
+
+    Writing trades bumps ``account.data_version``, so stale entries are
+    never read again and simply expire or get culled. Sections with
+    alerts also carry the rules version, which rule changes bump.
+    """
+    key = f"portfolio:{account.pk}:v{account.data_version}:{section}"
+    if RULE_SECTIONS.intersection(section.split(',')):
+        key = f"{key}:r{rules_version()}"
+    return key
+
+
+def portfolio_etag(account, section: str, rules: bool = False) -> str:
+    """ETag for a section; changes exactly when the cached value would.
+
+    ``rules`` marks a response that adds evaluated alerts to the section.
+    """
+    key = cache_key(account, section)
+    if rules:
+        key = f"{key}:r{rules_version()}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def cached_section(account, section: str, compute: Callable[[], Any]) -> Any:
+    """Return the cached section, computing and storing it on a miss"""
+    cache = get_portfolio_cache()
+    key = cache_key(account, section)
+    data = cache.get(key)
+    if data is None:
+        data = compute()
+        cache.set(key, data)
+    return data
@@ -0,0 +1,183 @@
+# risk.py - Vectorized risk metrics over the equity curve
+import numpy as np
+from datetime import date
+from typing import Dict, Any, Optional
+
+from wev.columnar import TradeColumns
+
+# Assuming risk-free rate of 2% annually (simplified)
+DAILY_RISK_FREE_RATE = 0.02 / 365
+
+# Daily returns used for Sharpe, Sortino and VaR
+LOOKBACK_DAYS = 60
+
+
+def _day_to_date(day: np.int64) -> date:
+    """UTC day number -> date"""
+    return np.datetime64(int(day), 'D').astype(date)
+
+
+def sharpe_ratio(returns: np.ndarray, risk_free_rate: float = DAILY_RISK_FREE_RATE) -> float:
+    """Mean excess return over the standard deviation of returns"""
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < 2:
+        return 0
+    std_dev = returns.std()
+    if std_dev == 0:
+        return 0
+    return float((returns.mean() - risk_free_rate) / std_dev)
+
+
+def sortino_ratio(returns: np.ndarray, risk_free_rate: float = DAILY_RISK_FREE_RATE) -> float:
+    """Mean excess return over the downside deviation"""
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < 2:
+        return 0
+    excess = returns - risk_free_rate
+    downside = np.sqrt(np.mean(np.minimum(excess, 0) ** 2))
+    if downside == 0:
+        return 0
+    return float(excess.mean() / downside)
+
+
+def drawdown_series(equity: np.ndarray) -> Dict[str, np.ndarray]:
+    """Running peak and drawdown (absolute and % of a positive peak)"""
+    peak = np.maximum.accumulate(equity)
+    drawdown = peak - equity
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown_pct = np.where(peak > 0, drawdown / peak * 100, 0)
+    return {'peak': peak, 'drawdown': drawdown, 'drawdown_pct': drawdown_pct}
+
+
+def max_drawdown(equity: np.ndarray, times: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """Largest drawdown of an equity curve, with the peak and trough positions.
+
+    Drawdowns are ranked by percentage of their peak. A curve that never
+    had a positive peak has no percentages, so there the largest fall in
+    amount is taken. Every field describes that one drawdown.
+    """
+    result = {'max_drawdown': 0, 'max_drawdown_amount': 0, 'peak_index': None, 'trough_index': None,
+              'peak_time': None, 'trough_time': None}
+    if not len(equity):
+        return result
+
+    series = drawdown_series(equity)
+    ranking = series['drawdown_pct'] if series['drawdown_pct'].max() > 0 else series['drawdown']
+    trough = int(np.argmax(ranking))
+    if series['drawdown'][trough] <= 0:
+        return result
+    # Peak is the last point before the trough where equity equalled the running peak
+    peak = int(np.flatnonzero(equity[:trough + 1] == series['peak'][trough])[-1])
+
+    result.update(
+        max_drawdown=float(series['drawdown_pct'][trough]),
+        max_drawdown_amount=float(series['drawdown'][trough]),
+        peak_index=peak,
+        trough_index=trough,
+    )
+    if times is not None:
+        result['peak_time'] = float(times[peak])
+        result['trough_time'] = float(times[trough])
+    return result
+
+
+def max_drawdown_amount(equity: np.ndarray) -> float:
+    """Largest fall from a running peak in account currency, whatever its percentage"""
+    if not len(equity):
+        return 0
+    return float(drawdown_series(equity)['drawdown'].max())
+
+
+def drawdown_dates(result: Dict[str, Any]) -> Dict[str, Any]:
+    """max_drawdown result with peak_time and trough_time as UTC dates"""
+    for key in ('peak_time', 'trough_time'):
+        if result[key] is not None:
+            result[key] = _day_to_date(np.int64(result[key] // 86400))
+    return result
+
+
+def value_at_risk(returns: np.ndarray, confidence_level: float = 0.95) -> float:
+    """Historical VaR: loss at the (1 - confidence) empirical quantile"""
+    returns = np.sort(np.asarray(returns, dtype=np.float64))
+    if not len(returns):
+        return 0
+    index = min(int((1 - confidence_level) * len(returns)), len(returns) - 1)
+    return max(float(-returns[index]), 0)
+
+
+def conditional_value_at_risk(returns: np.ndarray, confidence_level: float = 0.95) -> float:
+    """Historical CVaR: average loss over the tail at and beyond VaR"""
+    returns = np.sort(np.asarray(returns, dtype=np.float64))
+    if not len(returns):
+        return 0
+    index = min(int((1 - confidence_level) * len(returns)), len(returns) - 1)
+    return max(float(-returns[:index + 1].mean()), 0)
+
+
+def volume_consistency(volumes: np.ndarray) -> float:
+    """Consistency score: 100 minus the coefficient of variation in percent"""
+    volumes = np.asarray(volumes, dtype=np.float64)
+    if len(volumes) < 2:
+        return 100
+    return consistency_score(volumes.mean(), volumes.std())
+
+
+def consistency_score(mean: float, std: float) -> float:
+    """100 minus the coefficient of variation in percent, floored at 0"""
+    if mean == 0:
+        return 0
+    cv = std / mean  # Coefficient of variation
+    return float(max(0, 100 - (cv * 100)))
+
+
+class RiskEngine:
+    """Daily P&L series and equity curves for one account, built once in date order"""
+
+    def __init__(self, columns: TradeColumns, lookback_days: int = LOOKBACK_DAYS):
+        self.lookback_days = lookback_days
+
+        # Per-trade equity, skipping trades with no P&L as the dashboard always has
+        profit = columns.profit_filled
+        traded = profit != 0
+        self.trade_times = columns.close_time[traded]
+        self.trade_equity = np.cumsum(profit[traded])
+
+        # Daily P&L in date order (close_time is already sorted)
+        self.days, self.daily_pnl = columns.group_sum(columns.close_day, profit)
+        self.daily_equity = np.cumsum(self.daily_pnl)
+
+    @classmethod
+    def from_columns(cls, columns: TradeColumns, **kwargs) -> 'RiskEngine':
+        return cls(columns, **kwargs)
+
+    @property
+    def recent_returns(self) -> np.ndarray:
+        """Daily P&L of the most recent lookback_days trading days, oldest first"""
+        return self.daily_pnl[-self.lookback_days:]
+
+    def sharpe_ratio(self) -> float:
+        return sharpe_ratio(self.recent_returns)
+
+    def sortino_ratio(self) -> float:
+        return sortino_ratio(self.recent_returns)
+
+    def value_at_risk(self, confidence_level: float = 0.95) -> float:
+        return value_at_risk(self.recent_returns, confidence_level)
+
+    def conditional_value_at_risk(self, confidence_level: float = 0.95) -> float:
+        return conditional_value_at_risk(self.recent_returns, confidence_level)
+
+    def max_drawdown(self) -> Dict[str, Any]:
+        """Max drawdown of the per-trade equity curve with peak/trough dates"""
+        return drawdown_dates(max_drawdown(self.trade_equity, self.trade_times))
+
+    def max_drawdown_amount(self) -> float:
+        return max_drawdown_amount(self.trade_equity)
+
+    def daily_series(self) -> Dict[str, list]:
+        """Daily P&L and equity for charting"""
+        return {
+            'dates': [_day_to_date(day).isoformat() for day in self.days],
+            'pnl': np.round(self.daily_pnl, 2).tolist(),
+            'equity': np.round(self.daily_equity, 2).tolist(),
+        }
@@ -0,0 +1,133 @@
+# rolling.py - Rolling-window metrics backed by prefix sums
+import numpy as np
+from datetime import date
+from typing import Dict, Any, Iterable
+
+from wev.columnar import TradeColumns
+from wev.risk import DAILY_RISK_FREE_RATE
+
+
+def sliding_max(values: np.ndarray, width: int) -> np.ndarray:
+    """Maximum of every run of ``width`` consecutive values, in O(n) (van Herk/Gil-Werman).
+
+    Within blocks of ``width`` values, a window is the suffix of one block
+    and the prefix of the next, so its maximum is one of two running maxima.
+    """
+    count = len(values) - width + 1
+    if count <= 0:
+        return np.zeros(0)
+    blocks = -(-len(values) // width)
+    grid = np.full(blocks * width, -np.inf)
+    grid[:len(values)] = values
+    grid = grid.reshape(blocks, width)
+    prefix = np.maximum.accumulate(grid, axis=1).ravel()
+    suffix = np.maximum.accumulate(grid[:, ::-1], axis=1)[:, ::-1].ravel()
+    return np.maximum(suffix[:count], prefix[width - 1:width - 1 + count])
+
+
+class RollingMetrics:
+    """Prefix sums over a dense (calendar-day) daily P&L series.
+
+    Every statistic of a window [start, end] is a difference of two prefix
+    sums, so a single window costs O(1) and a full rolling series is one
+    vectorized pass over the days. Sharpe only counts days with closed
+    trades, as RiskEngine does; the zero-filled days just keep windows
+    aligned to the calendar.
+    """
+
+    def __init__(self, first_day: int, pnl: np.ndarray, trades: np.ndarray, wins: np.ndarray):
+        self.first_day = first_day
+        self.pnl = pnl
+        self.equity = np.cumsum(pnl)
+        # Prefix arrays have a leading zero so window sums are P[end + 1] - P[start]
+        self.sum_pnl = np.concatenate(([0.0], np.cumsum(pnl)))
+        self.sum_pnl_sq = np.concatenate(([0.0], np.cumsum(pnl ** 2)))
+        self.sum_trades = np.concatenate(([0], np.cumsum(trades)))
+        self.sum_wins = np.concatenate(([0], np.cumsum(wins)))
+        self.sum_trading_days = np.concatenate(([0], np.cumsum(trades > 0)))
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    @classmethod
+    def from_columns(cls, columns: TradeColumns) -> 'RollingMetrics':
+        """Bucket closed trades into calendar days, zero-filling days without trades"""
+        if not len(columns):
+            empty = np.zeros(0)
+            return cls(0, empty, empty.astype(np.int64), empty.astype(np.int64))
+
+        day = columns.close_day
+        first_day = int(day.min())
+        offset = day - first_day
+        length = int(offset.max()) + 1
+        pnl = np.bincount(offset, weights=columns.profit_filled, minlength=length)
+        trades = np.bincount(offset, minlength=length)
+        wins = np.bincount(offset, weights=(columns.profit > 0), minlength=length).astype(np.int64)
+        return cls(first_day, pnl, trades, wins)
+
+    def day_index(self, day: date) -> int:
+        """Position of a calendar date in the dense series"""
+        return int((np.datetime64(day, 'D') - np.datetime64(self.first_day, 'D')).astype(np.int64))
+
+    def window(self, start: date, end: date) -> Dict[str, Any]:
+        """Statistics for one inclusive date range in O(1)"""
+        lo = min(max(self.day_index(start), 0), len(self))
+        hi = min(max(self.day_index(end) + 1, lo), len(self))
+        return self._stats(np.array([lo]), np.array([hi]), index=0)
+
+    def series(self, window_days: int) -> Dict[str, Any]:
+        """Trailing window_days statistics for every day, in one pass"""
+        hi = np.arange(1, len(self) + 1)
+        lo = np.maximum(hi - window_days, 0)
+        stats = self._stats(lo, hi)
+        stats['drawdown'] = self._trailing_drawdown(window_days)
+        return stats
+
+    def dates(self) -> list:
+        """ISO dates of the dense series"""
+        days = np.arange(self.first_day, self.first_day + len(self)).astype('datetime64[D]')
+        return np.datetime_as_string(days, unit='D').tolist()
+
+    def _stats(self, lo: np.ndarray, hi: np.ndarray, index: int = None) -> Dict[str, Any]:
+        """Window sums for half-open [lo, hi) day ranges"""
+        # Days without trades add nothing to the P&L sums, so only the count differs
+        days = self.sum_trading_days[hi] - self.sum_trading_days[lo]
+        pnl = self.sum_pnl[hi] - self.sum_pnl[lo]
+        pnl_sq = self.sum_pnl_sq[hi] - self.sum_pnl_sq[lo]
+        trades = self.sum_trades[hi] - self.sum_trades[lo]
+        wins = self.sum_wins[hi] - self.sum_wins[lo]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(days > 0, pnl / days, 0)
+            variance = np.maximum(np.where(days > 0, pnl_sq / days, 0) - mean ** 2, 0)
+            std = np.sqrt(variance)
+            sharpe = np.where((days > 1) & (std > 0), (mean - DAILY_RISK_FREE_RATE) / std, 0)
+            win_rate = np.where(trades > 0, wins / trades * 100, 0)
+
+        stats = {
+            'pnl': np.round(pnl, 2),
+            'trades': trades,
+            'win_rate': np.round(win_rate, 1),
+            'sharpe_ratio': np.round(sharpe, 2),
+        }
+        if index is not None:
+            return {key: value[index].item() for key, value in stats.items()}
+        return {key: value.tolist() for key, value in stats.items()}
+
+    def _trailing_drawdown(self, window_days: int) -> list:
+        """Drawdown from the highest equity within each trailing window"""
+        if not len(self):
+            return []
+        # Equity before the first day is zero, so pad the front with zeros
+        padded = np.concatenate((np.zeros(window_days), self.equity))
+        peak = sliding_max(padded, window_days + 1)
+        return np.round(peak - self.equity, 2).tolist()
+
+
+def rolling_series(columns: TradeColumns, windows: Iterable[int]) -> Dict[str, Any]:
+    """Rolling series for several window lengths from one set of prefix sums"""
+    metrics = RollingMetrics.from_columns(columns)
+    return {
+        'dates': metrics.dates(),
+        'windows': {str(window_days): metrics.series(window_days) for window_days in windows},
+    }
@@ -0,0 +1,347 @@
+# streaming.py - Constant-memory analytics over a trade iterator
+import numpy as np
+from collections import deque
+from itertools import islice
+from typing import Dict, Any, Iterable, Tuple
+
+from wev.columnar import TradeColumns
+from wev.risk import (
+    LOOKBACK_DAYS, conditional_value_at_risk, consistency_score, drawdown_dates, sharpe_ratio,
+    sortino_ratio, value_at_risk,
+)
+from wev.symbols import bucket_percentages, notional_exposure, risk_bucket_counts
+
+
+class Welford:
+    """Running count, mean and variance; batches and other instances merge exactly"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold in a batch (Chan et al. parallel update)"""
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        batch_mean = values.mean()
+        batch_m2 = ((values - batch_mean) ** 2).sum()
+        self._combine(len(values), batch_mean, batch_m2)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+    def merge(self, other: 'Welford') -> None:
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+    def _combine(self, count: int, mean: float, m2: float) -> None:
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        """Population variance"""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return self.variance ** 0.5
+
+
+class TDigest:
+    """Mergeable quantile sketch with a bounded number of centroids.
+
+    Points are buffered and periodically compressed: after sorting,
+    each centroid covers at most one unit of the arcsine scale function,
+    which keeps the tails (where VaR lives) at fine resolution.
+    """
+
+    def __init__(self, compression: int = 100):
+        self.compression = compression
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+        self._buffer = []
+        self._buffered = 0
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self._buffer.append(values)
+        self._buffered += len(values)
+        self.count += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        if self._buffered > 10 * self.compression:
+            self._compress()
+
+    def merge(self, other: 'TDigest') -> None:
+        other._compress()
+        if not other.count:
+            return
+        self._compress()
+        self.means = np.concatenate((self.means, other.means))
+        self.weights = np.concatenate((self.weights, other.weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(force=True)
+
+    def _compress(self, force: bool = False) -> None:
+        if not self._buffer and not force:
+            return
+        means = np.concatenate([self.means] + self._buffer)
+        weights = np.concatenate([self.weights] + [np.ones(len(b)) for b in self._buffer])
+        self._buffer = []
+        self._buffered = 0
+        if not len(means):
+            return
+
+        order = np.argsort(means, kind='mergesort')
+        means = means[order]
+        weights = weights[order]
+        total = weights.sum()
+        # Quantile at each point's centre mapped onto k = c/(2*pi) * asin(2q - 1)
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        cluster = np.floor(k - k.min()).astype(np.int64)
+        _, cluster = np.unique(cluster, return_inverse=True)
+
+        merged_weights = np.bincount(cluster, weights=weights)
+        self.means = np.bincount(cluster, weights=means * weights) / merged_weights
+        self.weights = merged_weights
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile (0 <= q <= 1)"""
+        self._compress()
+        if not self.count:
+            return 0.0
+        if len(self.means) == 1:
+            return float(self.means[0])
+        # Centroid centres on the cumulative-weight axis, anchored at min/max
+        centres = (np.cumsum(self.weights) - self.weights / 2) / self.count
+        xs = np.concatenate(([0.0], centres, [1.0]))
+        ys = np.concatenate(([self.min], self.means, [self.max]))
+        return float(np.interp(q, xs, ys))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain representation, e.g. for pickling across processes or caching"""
+        self._compress()
+        return {
+            'compression': self.compression,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'count': self.count,
+            'min': float(self.min),
+            'max': float(self.max),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TDigest':
+        digest = cls(data['compression'])
+        digest.means = np.asarray(data['means'], dtype=np.float64)
+        digest.weights = np.asarray(data['weights'], dtype=np.float64)
+        digest.count = data['count']
+        digest.min = data['min']
+        digest.max = data['max']
+        return digest
+
+
+class RunningDrawdown:
+    """Max drawdown of a cumulative P&L stream, picked the way risk.max_drawdown picks it.
+
+    Tracks both the largest drawdown by % of a positive peak and the
+    largest by amount, with their peak and trough times, since which one
+    is reported depends on whether a positive peak ever occurs.
+    """
+
+    def __init__(self):
+        self.equity = 0.0
+        self.peak = -np.inf
+        self.peak_time = np.nan
+        # (percent, amount, peak time, trough time)
+        self.by_pct = (0.0, 0.0, None, None)
+        self.by_amount = (0.0, 0.0, None, None)
+
+    def update(self, pnl: np.ndarray, times: np.ndarray) -> None:
+        if not len(pnl):
+            return
+        equity = self.equity + np.cumsum(pnl)
+        peak = np.maximum(np.maximum.accumulate(equity), self.peak)
+        # Time of the last point at the running peak, carried in from earlier batches
+        at_peak = np.maximum.accumulate(np.where(equity == peak, np.arange(len(equity)), -1))
+        peak_times = np.where(at_peak >= 0, times[np.maximum(at_peak, 0)], self.peak_time)
+
+        drawdown = peak - equity
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown_pct = np.where(peak > 0, drawdown / peak * 100, 0)
+        # Strictly greater keeps the first occurrence, as argmax does
+        i = int(np.argmax(drawdown_pct))
+        if drawdown_pct[i] > self.by_pct[0]:
+            self.by_pct = (float(drawdown_pct[i]), float(drawdown[i]), float(peak_times[i]), float(times[i]))
+        i = int(np.argmax(drawdown))
+        if drawdown[i] > self.by_amount[1]:
+            self.by_amount = (float(drawdown_pct[i]), float(drawdown[i]), float(peak_times[i]), float(times[i]))
+
+        self.equity = float(equity[-1])
+        self.peak = float(peak[-1])
+        self.peak_time = float(peak_times[-1])
+
+    def result(self) -> Dict[str, Any]:
+        """risk.max_drawdown's fields; positions within the stream are not kept"""
+        pct, amount, peak_time, trough_time = self.by_pct if self.by_pct[0] > 0 else self.by_amount
+        return {
+            'max_drawdown': pct,
+            'max_drawdown_amount': amount,
+            'peak_index': None,
+            'trough_index': None,
+            'peak_time': peak_time,
+            'trough_time': trough_time,
+        }
+
+
+class DailyPnL:
+    """Closes daily P&L buckets from a close-time ordered stream"""
+
+    def __init__(self, lookback_days: int = LOOKBACK_DAYS):
+        self.recent = deque(maxlen=lookback_days)
+        self._day = None
+        self._pnl = 0.0
+
+    def update(self, days: np.ndarray, pnl: np.ndarray) -> None:
+        if not len(days):
+            return
+        unique, starts = np.unique(days, return_index=True)
+        sums = np.add.reduceat(pnl, starts)
+        if unique[0] == self._day:
+            sums[0] += self._pnl
+        elif self._day is not None:
+            self._emit([self._pnl])
+        # Every bucket but the last is complete
+        self._emit(sums[:-1])
+        self._day = unique[-1]
+        self._pnl = float(sums[-1])
+
+    def finish(self) -> None:
+        if self._day is not None:
+            self._emit([self._pnl])
+            self._day = None
+
+    def _emit(self, values) -> None:
+        self.recent.extend(np.asarray(values, dtype=np.float64).tolist())
+
+
+class StreamingAnalytics:
+    """One pass over a close-time ordered trade stream with constant memory.
+
+    Produces the same keys as PortfolioAnalyzer.get_advanced_analytics and
+    the distribution/sizing parts of get_risk_metrics.
+    """
+
+    FIELDS = ('symbol', 'volume', 'open_price', 'open_time', 'close_time', 'profit')
+
+    def __init__(self):
+        self.trades = 0
+        self.duration = Welford()
+        self.volume = Welford()
+        self.drawdown = RunningDrawdown()
+        self.daily = DailyPnL()
+        self.hourly = np.zeros(24)
+        self.monthly = {}
+        self.risk_buckets = np.zeros(4, dtype=np.int64)
+
+    @classmethod
+    def from_queryset(cls, queryset, chunk_size: int = 20000,
+                      before: Iterable[TradeColumns] = ()) -> 'StreamingAnalytics':
+        """Stream a queryset's narrow projection in chunks, after any ``before`` batches"""
+        rows = (
+            queryset.order_by('close_time', 'pk')
+            .values_list(*cls.FIELDS)
+            .iterator(chunk_size=chunk_size)
+        )
+        return cls.from_rows(rows, chunk_size, before)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple], chunk_size: int = 20000,
+                  before: Iterable[TradeColumns] = ()) -> 'StreamingAnalytics':
+        analytics = cls()
+        # Older trades held elsewhere (e.g. the Parquet archive), oldest first
+        for batch in before:
+            analytics.update(batch)
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, chunk_size))
+            if not batch:
+                break
+            analytics.update(TradeColumns.from_rows(batch, cls.FIELDS))
+        analytics.daily.finish()
+        return analytics
+
+    def update(self, cols: TradeColumns) -> None:
+        """Fold in one batch of column arrays"""
+        profit = cols.profit_filled
+        self.trades += len(cols)
+        self.duration.update((cols.close_time - cols.open_time) / 3600)
+        self.volume.update(cols.volume)
+        traded = profit != 0
+        self.drawdown.update(profit[traded], cols.close_time[traded])
+        self.daily.update(cols.close_day, profit)
+        self.hourly += np.bincount(cols.close_hour, weights=profit, minlength=24)
+
+        months, sums = cols.group_sum(cols.close_month[traded], profit[traded])
+        for month, total in zip(months, sums):
+            self.monthly[month] = self.monthly.get(month, 0.0) + total
+
+        notional = notional_exposure(cols.symbol, cols.volume, cols.open_price)
+        self.risk_buckets += risk_bucket_counts(notional)
+
+    def get_advanced_analytics(self) -> Dict[str, Any]:
+        """Same keys and values as PortfolioAnalyzer.get_advanced_analytics, from the accumulators"""
+        if not self.trades:
+            return {}
+        returns = np.array(self.daily.recent)
+        drawdown = drawdown_dates(self.drawdown.result())
+        return {
+            'sharpe_ratio': round(sharpe_ratio(returns), 2),
+            'sortino_ratio': round(sortino_ratio(returns), 2),
+            'max_drawdown': round(drawdown['max_drawdown'], 2),
+            'max_drawdown_amount': round(drawdown['max_drawdown_amount'], 2),
+            'drawdown_peak_date': drawdown['peak_time'].isoformat() if drawdown['peak_time'] else None,
+            'drawdown_trough_date': drawdown['trough_time'].isoformat() if drawdown['trough_time'] else None,
+            'avg_duration_hours': round(float(self.duration.mean), 1),
+            'var_95': round(value_at_risk(returns, 0.95), 2),
+            'cvar_95': round(conditional_value_at_risk(returns, 0.95), 2),
+            'daily_returns': returns[-30:].tolist(),  # Last 30 days
+            'monthly_performance': [
+                {'month': str(month), 'profit': round(float(profit), 2)}
+                for month, profit in sorted(self.monthly.items())
+            ],
+            'hourly_performance': {hour: float(self.hourly[hour]) for hour in range(24)},
+        }
+
+    def get_risk_distribution(self) -> Dict[str, float]:
+        return bucket_percentages(self.risk_buckets.tolist())
+
+    def get_position_analysis(self) -> Dict[str, Any]:
+        if not self.trades:
+            return {}
+        volume = self.volume
+        consistency = consistency_score(volume.mean, volume.std) if volume.count > 1 else 100
+        return {
+            'avg_volume': round(float(volume.mean), 2),
+            'max_volume': float(volume.max),
+            'min_volume': float(volume.min),
+            'volume_consistency': round(float(consistency), 2),
+        }
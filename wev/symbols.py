@@ -0,0 +1,203 @@
+# symbols.py - Per-process registry of instrument contract specs
+import time
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional
+
+from django.apps import apps
+from django.conf import settings
+
+from wev.columnar import group_keys
+from wev.portfolio_cache import get_portfolio_cache
+
+
+class InstrumentSpec(NamedTuple):
+    symbol: str
+    pip_size: float
+    contract_size: float
+    # Account-currency value of one pip on one lot; None means quoted in account currency
+    tick_value: Optional[float]
+    asset_class: str
+
+    @property
+    def pip_multiplier(self) -> float:
+        """Pips per unit of price"""
+        return 1 / self.pip_size
+
+
+# Specs for symbols without a SymbolSpec row, by name pattern; first match wins
+FALLBACK_SPECS = (
+    # pattern, pip size, contract size, asset class
+    ('JPY', 0.01, 100000, 'forex'),
+    ('XAU', 0.1, 100, 'metal'),
+    ('GOLD', 0.1, 100, 'metal'),
+    ('XAG', 0.001, 5000, 'metal'),
+)
+DEFAULT_SPEC = (0.0001, 100000, 'forex')  # Standard forex
+
+
+def fallback_spec(symbol: str) -> InstrumentSpec:
+    """Spec guessed from the symbol name alone"""
+    for pattern, pip_size, contract_size, asset_class in FALLBACK_SPECS:
+        if pattern in symbol:
+            return InstrumentSpec(symbol, pip_size, contract_size, None, asset_class)
+    pip_size, contract_size, asset_class = DEFAULT_SPEC
+    return InstrumentSpec(symbol, pip_size, contract_size, None, asset_class)
+
+
+# Shared portfolio-cache counter bumped on every SymbolSpec change
+VERSION_KEY = 'symbol_specs:version'
+# Seconds between a process's checks of VERSION_KEY
+VERSION_CHECK_SECONDS = 5
+
+
+class SymbolRegistry:
+    """SymbolSpec rows held in memory, so lookups cost a dict access.
+
+    Loaded on first use and reloaded after ``ttl`` seconds. A SymbolSpec
+    change reloads this process at once and, through a version counter in
+    the shared portfolio cache, every other process within
+    VERSION_CHECK_SECONDS. Unknown symbols fall back to FALLBACK_SPECS.
+    """
+
+    def __init__(self, ttl: float = None):
+        self.ttl = ttl
+        self._specs = None
+        self._loaded_at = 0.0
+        self._version = None
+        self._checked_at = 0.0
+
+    @property
+    def specs(self) -> Dict[str, InstrumentSpec]:
+        ttl = self.ttl if self.ttl is not None else getattr(settings, 'SYMBOL_SPEC_TTL', 300)
+        now = time.monotonic()
+        if self._specs is not None and now - self._checked_at > VERSION_CHECK_SECONDS:
+            self._checked_at = now
+            if self._shared_version() != self._version:
+                self._specs = None
+        if self._specs is None or now - self._loaded_at > ttl:
+            self.load()
+        return self._specs
+
+    def _shared_version(self) -> int:
+        return get_portfolio_cache().get(VERSION_KEY, 0)
+
+    def load(self) -> None:
+        """Read every SymbolSpec row in one query"""
+        # Read before the rows, so a change made while loading triggers another load
+        self._version = self._shared_version()
+        self._checked_at = time.monotonic()
+        SymbolSpec = apps.get_model('wev', 'SymbolSpec')
+        rows = SymbolSpec.objects.values_list(
+            'symbol', 'pip_size', 'contract_size', 'tick_value', 'asset_class',
+        )
+        self._specs = {
+            symbol: InstrumentSpec(
+                symbol, float(pip_size), float(contract_size),
+                float(tick_value) if tick_value is not None else None, asset_class,
+            )
+            for symbol, pip_size, contract_size, tick_value, asset_class in rows
+        }
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        """Reload here on the next lookup, and in other processes at their next version check"""
+        self._specs = None
+        cache = get_portfolio_cache()
+        cache.add(VERSION_KEY, 0, None)
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            # Culled between add and incr; any value other than a process's own forces its reload
+            cache.set(VERSION_KEY, int(time.time()), None)
+
+    def get(self, symbol: str) -> InstrumentSpec:
+        spec = self.specs.get(symbol)
+        return spec if spec is not None else fallback_spec(symbol)
+
+    def pip_multiplier(self, symbol: str) -> float:
+        return self.get(symbol).pip_multiplier
+
+    def arrays(self, symbols: np.ndarray) -> Dict[str, np.ndarray]:
+        """Spec columns aligned with a symbol column, one lookup per distinct symbol"""
+        unique, inverse = group_keys(symbols)
+        return {field: values[inverse] for field, values in self.unique_arrays(unique).items()}
+
+    def unique_arrays(self, unique: np.ndarray) -> Dict[str, np.ndarray]:
+        """Spec columns for distinct symbols"""
+        specs = [self.get(symbol) for symbol in unique]
+        return {
+            'pip_size': np.array([s.pip_size for s in specs], dtype=np.float64),
+            'contract_size': np.array([s.contract_size for s in specs], dtype=np.float64),
+            'tick_value': np.array([s.tick_value if s.tick_value is not None else np.nan
+                                    for s in specs], dtype=np.float64),
+            'asset_class': np.array([s.asset_class for s in specs], dtype=object),
+        }
+
+
+symbol_registry = SymbolRegistry()
+
+
+# Currencies recognised as the quote leg of a six-letter pair
+QUOTE_CURRENCIES = frozenset({
+    'USD', 'EUR', 'GBP', 'JPY', 'CHF', 'AUD', 'NZD', 'CAD', 'SEK', 'NOK', 'DKK', 'PLN', 'HUF', 'CZK',
+    'TRY', 'ZAR', 'MXN', 'SGD', 'HKD', 'CNH',
+})
+
+
+def quote_currency(symbol: str) -> Optional[str]:
+    """Quote currency of a pair such as EURUSD or XAUUSD; None for symbols that aren't pairs"""
+    if len(symbol) == 6 and symbol.isalpha() and symbol[3:] in QUOTE_CURRENCIES:
+        return symbol[3:]
+    return None
+
+
+def notional_exposure(symbols: np.ndarray, volumes: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """Position size in account currency: lots x contract size x price, converted.
+
+    With a tick_value the quote -> account rate is tick_value / (pip size x
+    contract size). Without one, symbols whose base is the account currency
+    (USDJPY for a USD account) are worth lots x contract size, pairs quoted
+    in the account currency and symbols that aren't pairs are taken at lots
+    x contract size x price, and other pairs (EURJPY, EURGBP for a USD
+    account) have no rate to convert with and are NaN.
+    """
+    unique, inverse = group_keys(symbols)
+    specs = {field: values[inverse] for field, values in symbol_registry.unique_arrays(unique).items()}
+    account_currency = getattr(settings, 'PORTFOLIO_ACCOUNT_CURRENCY', 'USD')
+    units = volumes * specs['contract_size']
+
+    base_is_account = np.array([str(symbol).startswith(account_currency) for symbol in unique],
+                               dtype=bool)[inverse]
+    quote_is_foreign = np.array([quote_currency(str(symbol)) not in (None, account_currency)
+                                 for symbol in unique], dtype=bool)[inverse]
+    notional = np.where(base_is_account, units, np.where(quote_is_foreign, np.nan, units * prices))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = specs['tick_value'] / (specs['pip_size'] * specs['contract_size'])
+    return np.where(np.isnan(rate), notional, units * prices * rate)
+
+
+# Notional cut-offs between low/medium and medium/high risk, in account currency.
+# These replace the old 0.1 / 0.5 lot cut-offs: 0.1 and 0.5 lots of a USD-quoted
+# major (EURUSD, GBPUSD, AUDUSD at up to 1.50) or a USD-base pair fall in the
+# same bucket as before, but sizes just over an old cut-off may not (0.12 lots of
+# EURUSD at 1.10 is 13,200, still low), and metals and indices are bucketed by
+# value rather than lots (0.1 lots of XAUUSD at 3,300 is 33,000, medium).
+DEFAULT_RISK_BUCKETS = (15000, 75000)
+
+
+def risk_bucket_counts(notional: np.ndarray) -> List[int]:
+    """Trades per low/medium/high bucket of notional exposure, then trades with no notional"""
+    low_max, medium_max = getattr(settings, 'PORTFOLIO_RISK_BUCKETS', DEFAULT_RISK_BUCKETS)
+    unknown = int(np.isnan(notional).sum())
+    low = int((notional <= low_max).sum())
+    medium = int(((notional > low_max) & (notional <= medium_max)).sum())
+    return [low, medium, len(notional) - low - medium - unknown, unknown]
+
+
+def bucket_percentages(counts) -> Dict[str, float]:
+    """low/medium/high shares in percent, and the share of trades whose notional is unknown"""
+    total = sum(counts)
+    if not total:
+        return {'low': 0, 'medium': 0, 'high': 0, 'unknown': 0}
+    low, medium, high, unknown = (round(count / total * 100, 1) for count in counts)
+    return {'low': low, 'medium': medium, 'high': high, 'unknown': unknown}
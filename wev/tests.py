@@ -1,3 +1,329 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from wev.aggregate import MultiAccountAnalyzer
+from wev.alert_rules import DEFAULT_RULES, AlertRule, alert_metrics, evaluate_rules
+from wev.columnar import CodedColumn
+from wev.exposure import MIN_SHARED_DAYS, correlated_pairs
+from wev.portfolio_cache import cache_key
+from wev.risk import max_drawdown
+from wev.streaming import StreamingAnalytics
+from wev.symbols import notional_exposure, risk_bucket_counts
+from wev.utils import (
+    ArchivedTradeId, CSVTradeProcessor, PortfolioAnalyzer, PortfolioSnapshot, RiskAlertRule, SymbolSnapshot, Trade,
+    TradingAccount,
+)
+
+
+def create_account(name: str = 'Test account') -> TradingAccount:
+    user, _ = User.objects.get_or_create(username='trader')
+    return TradingAccount.objects.create(
+        user=user, account_name=name, broker='Test broker', account_type='demo',
+        initial_balance=Decimal('10000'), current_balance=Decimal('10000'),
+    )
+
+
+def synthetic_trades(account: TradingAccount, count: int, seed: int = 0, prefix: str = 'T') -> list:
+    """Closed trades a few hours apart with random P&L, some of them flat"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    trades = []
+    for i in range(count):
+        open_time = start + timedelta(hours=7 * i)
+        profit = Decimal(str(round(rng.normal(5, 60), 2))) if i % 9 else Decimal('0')
+        trades.append(Trade(
+            account=account, trade_id=f"{prefix}{i:06d}", symbol=['EURUSD', 'GBPUSD', 'XAUUSD'][i % 3],
+            side='BUY' if i % 2 else 'SELL', volume=Decimal('0.10'), open_price=Decimal('1.10000'),
+            close_price=Decimal('1.10100'), open_time=open_time, close_time=open_time + timedelta(hours=3),
+            commission=Decimal('-0.70'), profit=profit,
+        ))
+    return trades
+
+
+def trades_csv(trades: list) -> io.StringIO:
+    """Trades written in the broker export layout CSVTradeProcessor reads"""
+    mapping = CSVTradeProcessor.COLUMN_MAPPING
+    lines = [','.join(mapping)]
+    for trade in trades:
+        values = []
+        for field in mapping.values():
+            value = getattr(trade, field)
+            if isinstance(value, datetime):
+                value = value.strftime('%Y-%m-%d %H:%M:%S')
+            values.append('' if value is None else str(value))
+        lines.append(','.join(values))
+    return io.StringIO('\n'.join(lines) + '\n')
+
+
+class MaxDrawdownTests(SimpleTestCase):
+    def test_fields_describe_the_same_drawdown(self):
+        # A 10% fall of 100 outranks a later 5% fall of 150
+        equity = np.array([1000.0, 900.0, 3000.0, 2850.0])
+        result = max_drawdown(equity, times=np.arange(4) * 86400.0)
+        self.assertEqual((result['peak_index'], result['trough_index']), (0, 1))
+        self.assertAlmostEqual(result['max_drawdown'], 10.0)
+        self.assertAlmostEqual(result['max_drawdown_amount'], 100.0)
+        self.assertEqual((result['peak_time'], result['trough_time']), (0.0, 86400.0))
+
+    def test_no_positive_peak_uses_largest_fall(self):
+        equity = np.array([-50.0, -20.0, -120.0, -90.0])
+        result = max_drawdown(equity)
+        self.assertEqual((result['peak_index'], result['trough_index']), (1, 2))
+        self.assertEqual(result['max_drawdown'], 0)
+        self.assertAlmostEqual(result['max_drawdown_amount'], 100.0)
+
+    def test_rising_curve_has_no_drawdown(self):
+        result = max_drawdown(np.array([10.0, 20.0, 30.0]))
+        self.assertEqual(result['max_drawdown_amount'], 0)
+        self.assertIsNone(result['peak_index'])
+        self.assertIsNone(result['trough_index'])
+
+
+class NotionalExposureTests(TestCase):
+    def test_crosses_without_a_rate_are_not_bucketed(self):
+        symbols = np.array(['EURUSD', 'USDJPY', 'GBPJPY', 'EURGBP', 'NATGAS'], dtype=object)
+        notional = notional_exposure(symbols, np.full(5, 0.1), np.array([1.1, 150.0, 190.0, 0.85, 3.0]))
+        np.testing.assert_allclose(notional[[0, 1, 4]], [11000.0, 10000.0, 30000.0])
+        self.assertTrue(np.isnan(notional[2:4]).all())
+        self.assertEqual(risk_bucket_counts(notional), [2, 1, 0, 2])
+
+
+class CorrelatedPairsTests(SimpleTestCase):
+    def test_limit_counts_only_pairs_with_enough_shared_days(self):
+        symbols = np.array(['EURUSD', 'GBPUSD', 'XAUUSD'])
+        correlation = np.array([[1.0, 0.95, 0.4], [0.95, 1.0, -0.6], [0.4, -0.6, 1.0]])
+        # EURUSD/GBPUSD is the strongest pair but shares too few days
+        shared_days = np.full((3, 3), MIN_SHARED_DAYS)
+        shared_days[0, 1] = shared_days[1, 0] = MIN_SHARED_DAYS - 1
+        pairs = correlated_pairs(symbols, correlation, shared_days, limit=1)
+        self.assertEqual([pair['symbols'] for pair in pairs], [['GBPUSD', 'XAUUSD']])
+
+
+class StreamingParityTests(TestCase):
+    def test_streaming_matches_exact_analytics(self):
+        account = create_account()
+        Trade.objects.bulk_create(synthetic_trades(account, 400))
+        exact = PortfolioAnalyzer(account, use_snapshot=False, streaming=False,
+                                  use_column_store=False).get_advanced_analytics()
+        # Small chunks so drawdowns and days straddle batch boundaries
+        trades = Trade.objects.filter(account=account, close_time__isnull=False)
+        streamed = StreamingAnalytics.from_queryset(trades, chunk_size=37).get_advanced_analytics()
+
+        self.assertEqual(set(streamed), set(exact))
+        for key, value in exact.items():
+            if isinstance(value, float):
+                self.assertAlmostEqual(streamed[key], value, delta=0.011, msg=key)
+            elif key == 'daily_returns':
+                np.testing.assert_allclose(streamed[key], value)
+            elif key == 'hourly_performance':
+                self.assertEqual(set(streamed[key]), set(value))
+                np.testing.assert_allclose([streamed[key][hour] for hour in value], list(value.values()))
+            else:
+                self.assertEqual(streamed[key], value, msg=key)
+
+
+class SnapshotTests(TestCase):
+    COUNTERS = (
+        'trade_count', 'winning_trades', 'losing_trades', 'gross_profit', 'gross_loss',
+        'total_commission', 'total_volume', 'equity', 'peak_equity', 'current_drawdown',
+        'max_drawdown', 'last_close_time',
+    )
+
+    def snapshot_state(self, account: TradingAccount):
+        # current() rebuilds unless the account's data version matches
+        account.refresh_from_db()
+        snapshot = PortfolioSnapshot.current(account)
+        symbols = sorted(SymbolSnapshot.objects.filter(account=account).values_list(
+            'symbol', 'trade_count', 'winning_trades', 'total_profit', 'total_volume'))
+        return {field: getattr(snapshot, field) for field in self.COUNTERS}, symbols
+
+    def test_incremental_snapshot_matches_rebuild(self):
+        account = create_account()
+        trades = synthetic_trades(account, 300)
+        processor = CSVTradeProcessor(account, chunk_size=40)
+        processor.process_csv(trades_csv(trades[100:]))
+        # Earlier close times and some duplicates: the import rescans the stale equity path
+        result = processor.process_csv(trades_csv(trades[:150]))
+        self.assertEqual((result['processed'], result['skipped']), (100, 50))
+
+        incremental = self.snapshot_state(account)
+        PortfolioSnapshot.rebuild(account)
+        self.assertEqual(incremental, self.snapshot_state(account))
+
+
+class ImportDedupTests(TestCase):
+    def test_same_csv_imported_twice_stores_each_trade_once(self):
+        account = create_account()
+        trades = synthetic_trades(account, 90)
+        first = CSVTradeProcessor(account, chunk_size=25).process_csv(trades_csv(trades))
+        second = CSVTradeProcessor(account, chunk_size=25).process_csv(trades_csv(trades))
+        self.assertEqual((first['processed'], first['skipped']), (90, 0))
+        self.assertEqual((second['processed'], second['skipped']), (0, 90))
+        self.assertEqual(Trade.objects.filter(account=account).count(), 90)
+        # The table itself rejects a second row with the same account and trade id
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Trade.objects.bulk_create(synthetic_trades(account, 1))
+
+    def test_reimport_skips_stored_trades(self):
+        account = create_account()
+        trades = synthetic_trades(account, 120)
+        CSVTradeProcessor(account, chunk_size=50).process_csv(trades_csv(trades[:80]))
+        result = CSVTradeProcessor(account, chunk_size=50).process_csv(trades_csv(trades))
+        self.assertEqual((result['processed'], result['skipped']), (40, 80))
+        self.assertEqual(Trade.objects.filter(account=account).count(), 120)
+
+    def test_reimport_skips_archived_trades(self):
+        account = create_account()
+        trades = synthetic_trades(account, 200)
+        CSVTradeProcessor(account).process_csv(trades_csv(trades))
+        cutoff = datetime(2024, 1, 20, tzinfo=timezone.utc)
+        old_days = (datetime.now(timezone.utc) - cutoff).days
+        with tempfile.TemporaryDirectory() as archive, override_settings(PORTFOLIO_ARCHIVE_DIR=archive):
+            call_command('archive_trades', older_than_days=old_days, accounts=[account.pk], stdout=io.StringIO())
+            archived = ArchivedTradeId.objects.filter(account=account).count()
+            self.assertGreater(archived, 0)
+            self.assertEqual(Trade.objects.filter(account=account).count(), 200 - archived)
+
+            result = CSVTradeProcessor(account).process_csv(trades_csv(trades))
+            self.assertEqual((result['processed'], result['skipped']), (0, 200))
+            account.refresh_from_db()
+            analyzer = PortfolioAnalyzer(account, use_snapshot=False, use_column_store=False)
+            self.assertEqual(len(analyzer.columns), 200)
+            self.assertEqual(PortfolioSnapshot.current(account).trade_count, 200)
+
+
+class ColumnStoreTests(TestCase):
+    def test_memory_mapped_columns_match_database(self):
+        account = create_account()
+        with tempfile.TemporaryDirectory() as store, override_settings(PORTFOLIO_COLUMN_STORE_DIR=store):
+            CSVTradeProcessor(account).process_csv(trades_csv(synthetic_trades(account, 400)))
+            account.refresh_from_db()
+            mapped = PortfolioAnalyzer(account, use_snapshot=False)
+            loaded = PortfolioAnalyzer(account, use_snapshot=False, use_column_store=False)
+            self.assertIsInstance(mapped.columns.symbol, CodedColumn)
+            for method, kwargs in (
+                ('get_advanced_analytics', {}), ('get_risk_metrics', {}), ('get_symbol_trade_stats', {}),
+                ('get_correlation_exposure', {'days': 3650}), ('get_recent_trades', {}),
+            ):
+                self.assertEqual(
+                    json.dumps(getattr(mapped, method)(**kwargs), sort_keys=True, default=str),
+                    json.dumps(getattr(loaded, method)(**kwargs), sort_keys=True, default=str),
+                    method,
+                )
+
+
+class MonteCarloTests(TestCase):
+    def test_ruin_fraction_must_be_a_fraction(self):
+        account = create_account()
+        analyzer = PortfolioAnalyzer(account)
+        for ruin_fraction in (0, -0.5, 1.5, float('nan')):
+            with self.assertRaises(ValueError):
+                analyzer.get_monte_carlo(paths=10, ruin_fraction=ruin_fraction)
+
+
+class MultiAccountTests(TestCase):
+    def test_views_merge_statistics_cached_by_imports(self):
+        imported = [create_account('A'), create_account('B')]
+        for i, account in enumerate(imported):
+            CSVTradeProcessor(account).process_csv(trades_csv(synthetic_trades(account, 60, seed=i)))
+        # Trades written outside an import have no statistics cached yet
+        unimported = create_account('C')
+        Trade.objects.bulk_create(synthetic_trades(unimported, 30))
+
+        accounts = TradingAccount.objects.filter(pk__in=[account.pk for account in imported + [unimported]])
+        merged = MultiAccountAnalyzer(accounts, compute_missing=False)
+        self.assertEqual(merged.firm_view()['total_trades'], 120)
+        self.assertEqual(merged.pending, [unimported.pk])
+
+        computed = MultiAccountAnalyzer(accounts.exclude(pk=unimported.pk), workers=1)
+        self.assertEqual(merged.firm_view(), computed.firm_view())
+
+
+class AccountViewTests(TestCase):
+    def test_views_serve_the_account_in_the_url(self):
+        first, second = create_account('A'), create_account('B')
+        for i, account in enumerate((first, second)):
+            CSVTradeProcessor(account).process_csv(trades_csv(synthetic_trades(account, 20 + i, seed=i)))
+        self.client.force_login(first.user)
+        for account, trades in ((first, 20), (second, 21)):
+            response = self.client.get(reverse('trade_history_api', args=[account.pk]), {'limit': 100})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['trades']), trades)
+
+        other = User.objects.create(username='other')
+        foreign = TradingAccount.objects.create(
+            user=other, account_name='C', broker='Test broker', account_type='demo',
+            initial_balance=Decimal('10000'), current_balance=Decimal('10000'),
+        )
+        response = self.client.get(reverse('trade_history_api', args=[foreign.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class PortfolioApiTests(TransactionTestCase):
+    # Committed rows: portfolio_api computes sections in worker threads with their own connections
+    async def test_portfolio_api_sections_with_alerts(self):
+        account = await sync_to_async(create_account)()
+        await sync_to_async(CSVTradeProcessor(account).process_csv)(trades_csv(synthetic_trades(account, 30)))
+        await self.async_client.aforce_login(await User.objects.aget(pk=account.user_id))
+        url = reverse('portfolio_api', args=[account.pk])
+        for data_type, keys in (('risk', None), ('all', {'summary', 'trades', 'analytics', 'risk'})):
+            response = await self.async_client.get(url, {'type': data_type})
+            self.assertEqual(response.status_code, 200, data_type)
+            if keys:
+                self.assertEqual(set(response.json()), keys)
+            else:
+                self.assertIn('risk_alerts', response.json())
+            # The ETag covers the rules version, so the same request revalidates
+            cached = await self.async_client.get(url, {'type': data_type},
+                                                 headers={'if-none-match': response['ETag']})
+            self.assertEqual(cached.status_code, 304, data_type)
+
+
+class AlertRuleTests(TestCase):
+    def metrics(self, trades: int, wins: int):
+        totals = {'total_trades': trades, 'winning_trades': wins, 'gross_profit': 0, 'gross_loss': 0}
+        symbols = {'EURUSD': trades // 2, 'GBPUSD': trades - trades // 2} if trades else {}
+        return alert_metrics(totals, symbols)
+
+    def test_bulk_evaluation_matches_per_account(self):
+        metrics = {1: self.metrics(50, 10), 2: self.metrics(50, 45), 3: self.metrics(5, 0), 4: self.metrics(0, 0)}
+        overrides = {2: {'high_win_rate': AlertRule('high_win_rate', 'win_rate', '>', 95, 'success')},
+                     4: {'low_win_rate': AlertRule('low_win_rate', 'win_rate', '<', 40, 'danger')}}
+        bulk = evaluate_rules(metrics, list(DEFAULT_RULES), overrides)
+        for account, account_metrics in metrics.items():
+            single = evaluate_rules({account: account_metrics}, list(DEFAULT_RULES),
+                                    {account: overrides[account]} if account in overrides else {})
+            self.assertEqual(bulk[account], single[account])
+
+        self.assertEqual([alert['type'] for alert in bulk[1]], ['danger'])
+        # Overridden threshold not reached; too few trades; no trades even without min_trades
+        self.assertEqual(bulk[2], [])
+        self.assertEqual(bulk[3], [])
+        self.assertEqual(bulk[4], [])
+
+    def test_rule_change_keeps_data_version(self):
+        account = create_account()
+        CSVTradeProcessor(account).process_csv(trades_csv(synthetic_trades(account, 30)))
+        account.refresh_from_db()
+        version = account.data_version
+        risk_key, summary_key = cache_key(account, 'risk'), cache_key(account, 'summary')
+
+        RiskAlertRule.objects.create(name='low_win_rate', metric='win_rate', comparator='<', threshold=99,
+                                     severity='danger')
+        account.refresh_from_db()
+        self.assertEqual(account.data_version, version)
+        self.assertNotEqual(cache_key(account, 'risk'), risk_key)
+        self.assertEqual(cache_key(account, 'summary'), summary_key)
+        alerts = PortfolioAnalyzer(account).get_risk_metrics()['risk_alerts']
+        self.assertIn('danger', [alert['type'] for alert in alerts])
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import utils, views
 
 urlpatterns = [
      path('', views.home, name='home'),  # Optional Home C:\Users\admin\quantcrypt\wev\templates\about.html Page
@@ -15,6 +15,20 @@ urlpatterns = [
     path('Web-Development-Services/',views.web_ser,name='Web_Development_Services'),
     path('android-Development-Services/',views.and_ser,name='android_Development_Services'),
 
+    path('portfolio/accounts/', utils.accounts_overview_api, name='accounts_overview_api'),
+    path('portfolio/firm-risk/', utils.firm_risk_api, name='firm_risk_api'),
+    path('portfolio/<int:account_id>/api/', utils.portfolio_api, name='portfolio_api'),
+    path('portfolio/<int:account_id>/rolling/', utils.portfolio_rolling_api, name='portfolio_rolling_api'),
+    path('portfolio/<int:account_id>/pivot/', utils.portfolio_pivot_api, name='portfolio_pivot_api'),
+    path('portfolio/<int:account_id>/history/', utils.trade_history_api, name='trade_history_api'),
+    path('portfolio/<int:account_id>/export/', utils.portfolio_export, name='portfolio_export'),
+    path('portfolio/<int:account_id>/equity-curve/', utils.equity_curve_api, name='equity_curve_api'),
+    path('portfolio/<int:account_id>/monte-carlo/', utils.monte_carlo_api, name='monte_carlo_api'),
+    path('portfolio/<int:account_id>/correlation/', utils.correlation_exposure_api, name='correlation_exposure_api'),
+    path('portfolio/<int:account_id>/events/', utils.portfolio_events, name='portfolio_events'),
+    path('portfolio/<int:account_id>/import/', utils.upload_trades_csv, name='upload_trades_csv'),
+    path('portfolio/import/<int:job_id>/', utils.import_job_status, name='import_job_status'),
+
 
 ]
 
@@ -1,12 +1,57 @@
 # models.py
-from django.db import models
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.db.models import Avg, Case, Count, ExpressionWrapper, F, Max, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Now
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils import timezone
+from collections import defaultdict
+from contextlib import contextmanager
 from decimal import Decimal
+from datetime import datetime, timedelta, timezone as dt_timezone
+import csv
+import io
+import threading
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 
-from wev.urls import Trade
+from wev.aggregate import MultiAccountAnalyzer, account_stats
+from wev.alert_rules import (
+    AlertRule, COMPARATORS, METRICS, SEVERITIES, alert_metrics, evaluate_rules, exposure_rules, resolve_rules,
+)
+from wev.archive import (
+    has_archive, iter_archive_months, iter_archive_records, merge_columns, read_archive, read_archive_frame,
+)
+from wev.column_store import open_column_store, write_column_store
+from wev.columnar import TradeColumns
+from wev.downsample import DOWNSAMPLERS
+from wev.export import (
+    EXPORT_FORMATS, records_csv_stream, records_ndjson_stream, trade_csv_stream,
+    trade_ndjson_stream,
+)
+from wev.expressions import DurationHours, PercentileCont
+from wev.exposure import (
+    correlated_pairs, correlation_matrix, correlation_section, correlation_since, daily_pnl_matrix,
+    exposure_metrics, net_currency_exposure,
+)
+from wev.history import DEFAULT_PAGE_SIZE, HISTORY_FIELDS, TradeHistory, format_trade, history_params, parse_bound
+from wev.live import LIVE_TRADE_LIMIT, event_stream, publish_event
+from wev.montecarlo import monte_carlo
+from wev.pivot import ARCHIVE_FIELDS as PIVOT_ARCHIVE_FIELDS, DEFAULT_MEASURES, PivotQuery, pivot_param
+from wev.portfolio_cache import (
+    bump_rules_version, cache_key, cached_section, get_portfolio_cache, portfolio_etag,
+)
+from wev.risk import RiskEngine, sharpe_ratio, volume_consistency
+from wev.rolling import rolling_series
+from wev.streaming import StreamingAnalytics
+from wev.symbols import (
+    DEFAULT_SPEC, FALLBACK_SPECS, bucket_percentages, notional_exposure, risk_bucket_counts,
+    symbol_registry,
+)
 
 class TradingAccount(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -18,9 +63,199 @@ class TradingAccount(models.Model):
     ])
     initial_balance = models.DecimalField(max_digits=12, decimal_places=2)
     current_balance = models.DecimalField(max_digits=12, decimal_places=2)
+    # Inactive accounts are left out of overviews, firm risk and precomputation
+    is_active = models.BooleanField(default=True)
+    # Incremented whenever the account's trades change; keys cached analytics
+    data_version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def __str__(self):
+        return f"{self.account_name} ({self.broker})"
+
+
+def bump_data_version(account_id: int) -> None:
+    """Mark an account's trades as changed so cached analytics are not reused"""
+    TradingAccount.objects.filter(pk=account_id).update(data_version=models.F('data_version') + 1)
+
+
+_trade_writes = threading.local()
+
+
+@contextmanager
+def deferred_version_bump():
+    """Bump each account written to inside the block once on exit, instead of once per row"""
+    pending = _trade_writes.pending = set()
+    try:
+        yield
+    finally:
+        _trade_writes.pending = None
+        for account_id in pending:
+            bump_data_version(account_id)
+
+
+class ArchivedTradeId(models.Model):
+    """Trade id moved to the Parquet archive, so re-importing the trade doesn't insert it again"""
+    account = models.ForeignKey(TradingAccount, on_delete=models.CASCADE, related_name='archived_trade_ids')
+    trade_id = models.CharField(max_length=50)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'trade_id'], name='unique_account_archived_trade_id'),
+        ]
+
+    def __str__(self):
+        return f"{self.trade_id} (account {self.account_id})"
+
+
+class SymbolSpec(models.Model):
+    """Contract spec of one instrument; symbols without a row use FALLBACK_SPECS"""
+    ASSET_CLASSES = [
+        ('forex', 'Forex'),
+        ('metal', 'Metal'),
+        ('index', 'Index'),
+        ('commodity', 'Commodity'),
+        ('crypto', 'Crypto'),
+        ('other', 'Other'),
+    ]
+    
+    symbol = models.CharField(max_length=20, unique=True)
+    pip_size = models.DecimalField(max_digits=12, decimal_places=6)
+    contract_size = models.DecimalField(max_digits=16, decimal_places=4, default=100000)
+    # Account-currency value of one pip per lot; blank when quoted in the account currency
+    tick_value = models.DecimalField(max_digits=12, decimal_places=6, null=True, blank=True)
+    asset_class = models.CharField(max_length=20, choices=ASSET_CLASSES, default='forex')
+
+    class Meta:
+        ordering = ['symbol']
+
+    def __str__(self):
+        return f"{self.symbol} (pip {self.pip_size}, contract {self.contract_size})"
+
+    @property
+    def pip_multiplier(self) -> float:
+        return float(1 / self.pip_size)
+
+
+@receiver([post_save, post_delete], sender=SymbolSpec)
+def symbol_spec_written(sender, instance, **kwargs):
+    """Reload the registry here and, through the shared version, in every other process"""
+    symbol_registry.invalidate()
+
+
+def pip_multiplier_case() -> Case:
+    """Pip multiplier of each row's symbol as a CASE over the registry and the fallback rules"""
+    whens = [
+        When(symbol=symbol, then=Value(spec.pip_multiplier))
+        for symbol, spec in symbol_registry.specs.items()
+    ]
+    whens += [
+        When(symbol__contains=pattern, then=Value(1 / pip_size))
+        for pattern, pip_size, _, _ in FALLBACK_SPECS
+    ]
+    return Case(*whens, default=Value(1 / DEFAULT_SPEC[0]), output_field=models.FloatField())
+
+
+class TradeQuerySet(models.QuerySet):
+    """Trades with duration and pips computed by the database, so they can be
+    filtered, ordered and aggregated without loading model instances"""
+
+    def with_duration(self) -> 'TradeQuerySet':
+        """Annotate sql_duration_hours; open trades count up to now, as Trade.duration_hours does"""
+        return self.annotate(
+            sql_duration_hours=DurationHours('open_time', Coalesce('close_time', Now())),
+        )
+
+    def with_pips(self) -> 'TradeQuerySet':
+        """Annotate sql_pips; zero for open trades, as Trade.pips is"""
+        direction = Case(When(side='SELL', then=Value(-1.0)), default=Value(1.0))
+        pips = ExpressionWrapper(
+            (F('close_price') - F('open_price')) * direction * pip_multiplier_case(),
+            output_field=models.FloatField(),
+        )
+        return self.annotate(
+            sql_pips=Case(When(close_time__isnull=True, then=Value(0.0)), default=pips,
+                          output_field=models.FloatField()),
+        )
+
+    def symbol_trade_stats(self, percentiles: Tuple[float, ...] = (0.5,)) -> Dict[str, Dict[str, float]]:
+        """Average, total and percentiles of duration and pips per symbol.
+
+        Averages and totals are one GROUP BY query. PostgreSQL computes the
+        percentiles in the same query; other backends take them from one
+        narrow values_list pass.
+        """
+        rows = self.order_by().with_duration().with_pips().values('symbol')
+        aggregates = {
+            'trades': Count('pk'),
+            'avg_duration_hours': Avg('sql_duration_hours'),
+            'total_duration_hours': Sum('sql_duration_hours'),
+            'avg_pips': Avg('sql_pips'),
+            'total_pips': Sum('sql_pips'),
+        }
+        native = connections[self.db].vendor == 'postgresql'
+        if native:
+            for p in percentiles:
+                aggregates[f"duration_hours_p{p * 100:g}"] = PercentileCont('sql_duration_hours', p)
+                aggregates[f"pips_p{p * 100:g}"] = PercentileCont('sql_pips', p)
+
+        stats = {row.pop('symbol'): row for row in rows.annotate(**aggregates).order_by('symbol')}
+        if percentiles and not native:
+            self._add_percentiles(stats, percentiles)
+        return stats
+
+    def _add_percentiles(self, stats: Dict[str, Dict[str, float]], percentiles: Tuple[float, ...]) -> None:
+        """Percentiles per symbol from the annotated columns, grouped with NumPy"""
+        values = list(
+            self.order_by().with_duration().with_pips()
+            .values_list('symbol', 'sql_duration_hours', 'sql_pips')
+        )
+        if not values:
+            return
+        symbols, durations, pips = zip(*values)
+        # One sort by symbol, then each symbol's rows are a contiguous slice
+        symbols = np.array(symbols, dtype=object)
+        order = np.argsort(symbols, kind='stable')
+        unique, starts = np.unique(symbols[order], return_index=True)
+        durations = np.split(np.array(durations, dtype=np.float64)[order], starts[1:])
+        pips = np.split(np.array(pips, dtype=np.float64)[order], starts[1:])
+        for symbol, symbol_durations, symbol_pips in zip(unique, durations, pips):
+            if symbol not in stats:
+                continue
+            for p in percentiles:
+                stats[symbol][f"duration_hours_p{p * 100:g}"] = float(np.nanquantile(symbol_durations, p))
+                stats[symbol][f"pips_p{p * 100:g}"] = float(np.nanquantile(symbol_pips, p))
+
+
+# PortfolioAnalyzer builds TradeQuerySet directly
+TradeManager = models.Manager.from_queryset(TradeQuerySet)
+
+
+class Trade(models.Model):
+    """One broker trade; open trades have no close time, price or profit"""
+    SIDE_CHOICES = [
+        ('BUY', 'Buy'),
+        ('SELL', 'Sell'),
+    ]
+    
+    account = models.ForeignKey(TradingAccount, on_delete=models.CASCADE)
+    trade_id = models.CharField(max_length=50)
+    symbol = models.CharField(max_length=20)
+    side = models.CharField(max_length=4, choices=SIDE_CHOICES)
+    volume = models.DecimalField(max_digits=10, decimal_places=2)
+    open_price = models.DecimalField(max_digits=12, decimal_places=5)
+    close_price = models.DecimalField(max_digits=12, decimal_places=5, null=True, blank=True)
+    stop_loss = models.DecimalField(max_digits=12, decimal_places=5, null=True, blank=True)
+    take_profit = models.DecimalField(max_digits=12, decimal_places=5, null=True, blank=True)
+    open_time = models.DateTimeField()
+    close_time = models.DateTimeField(null=True, blank=True)
+    commission = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    swap = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    profit = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    reason = models.CharField(max_length=20, blank=True)
+
+    objects = TradeManager()
+
     class Meta:
         ordering = ['-close_time', '-open_time']
         indexes = [
@@ -28,6 +263,10 @@ class TradingAccount(models.Model):
             models.Index(fields=['close_time']),
             models.Index(fields=['profit']),
         ]
+        constraints = [
+            # Broker trade ids are only unique within an account
+            models.UniqueConstraint(fields=['account', 'trade_id'], name='unique_account_trade_id'),
+        ]
 
     def __str__(self):
         return f"{self.symbol} {self.side} {self.volume} - {self.profit}"
@@ -52,28 +291,518 @@ class TradingAccount(models.Model):
         if self.side == 'SELL':
             price_diff = -price_diff
             
-        # Standard pip calculation (most forex pairs)
-        if 'JPY' in self.symbol:
-            return float(price_diff * 100)  # JPY pairs
-        elif 'XAU' in self.symbol or 'GOLD' in self.symbol:
-            return float(price_diff * 10)   # Gold
+        return float(price_diff) * symbol_registry.pip_multiplier(self.symbol)
+
+
+@receiver([post_save, post_delete], sender=Trade)
+def trade_written(sender, instance, **kwargs):
+    """Single-row writes outside CSVTradeProcessor also invalidate the cache"""
+    pending = getattr(_trade_writes, 'pending', None)
+    if pending is not None:
+        pending.add(instance.account_id)
+    else:
+        bump_data_version(instance.account_id)
+
+
+class ImportJob(models.Model):
+    """A queued CSV trade import; the table doubles as the worker queue"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    # Row errors kept on the job; error_count still counts all of them
+    MAX_STORED_ERRORS = 1000
+    
+    account = models.ForeignKey(TradingAccount, on_delete=models.CASCADE)
+    csv_file = models.FileField(upload_to='trade_imports/')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    total_rows = models.PositiveIntegerField(default=0)
+    rows_done = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    failure = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Import {self.pk} ({self.status}) - account {self.account_id}"
+
+    @classmethod
+    def claim_next(cls, stale_after: timedelta = None):
+        """Atomically take the oldest queued job, or None if the queue is empty"""
+        candidates = cls.objects.filter(status='queued')
+        if stale_after is not None:
+            # Jobs whose worker stopped reporting progress are picked up again
+            stale = timezone.now() - stale_after
+            candidates = cls.objects.filter(
+                Q(status='queued') | Q(status='running', updated_at__lt=stale)
+            )
+        
+        for job in candidates.order_by('created_at')[:10]:
+            # Conditional UPDATE so two workers can never claim the same job
+            claimed = cls.objects.filter(pk=job.pk, status=job.status, updated_at=job.updated_at).update(
+                status='running',
+                started_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+        return None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Progress payload for the status endpoint"""
+        return {
+            'job_id': self.pk,
+            'status': self.status,
+            'total_rows': self.total_rows,
+            'rows_done': self.rows_done,
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'failure': self.failure,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class PortfolioEvent(models.Model):
+    """A published portfolio event; the table carries events from import workers to SSE streams"""
+    account = models.ForeignKey(TradingAccount, on_delete=models.CASCADE, related_name='events')
+    event = models.CharField(max_length=20)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['account', 'id']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.pk} - account {self.account_id}"
+
+    def as_record(self) -> Dict[str, Any]:
+        """Channel record; the row id is the SSE event id"""
+        return {'id': self.pk, 'event': self.event, 'data': self.data}
+
+
+class PortfolioSnapshot(models.Model):
+    """Running totals for an account's closed trades, updated as trades are imported"""
+    # Columns needed to fold a trade into the rollup
+    ROLLUP_FIELDS = ('symbol', 'close_time', 'volume', 'commission', 'profit')
+    
+    account = models.OneToOneField(TradingAccount, on_delete=models.CASCADE, related_name='snapshot')
+    # TradingAccount.data_version these totals reflect
+    data_version = models.PositiveIntegerField(default=0)
+    trade_count = models.PositiveIntegerField(default=0)
+    winning_trades = models.PositiveIntegerField(default=0)
+    losing_trades = models.PositiveIntegerField(default=0)
+    gross_profit = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    gross_loss = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_commission = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_volume = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    # Cumulative closed P&L in close-time order
+    equity = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    peak_equity = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    current_drawdown = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    max_drawdown = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    # Set when trades arrived out of close-time order; equity fields need a rescan
+    equity_stale = models.BooleanField(default=False)
+    last_close_time = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Account {self.account_id} snapshot v{self.data_version} ({self.trade_count} trades)"
+
+    @property
+    def total_profit(self) -> Decimal:
+        return self.gross_profit - self.gross_loss
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Summary counters pushed to live dashboards"""
+        trade_count = self.trade_count
+        return {
+            'data_version': self.data_version,
+            'total_trades': trade_count,
+            'winning_trades': self.winning_trades,
+            'losing_trades': self.losing_trades,
+            'win_rate': round(self.winning_trades / trade_count * 100, 1) if trade_count else 0,
+            'total_profit': round(float(self.total_profit), 2),
+            'total_commission': round(float(self.total_commission), 2),
+            'total_volume': round(float(self.total_volume), 2),
+            # Equity fields wait for the rescan when trades arrived out of order
+            'equity': None if self.equity_stale else round(float(self.equity), 2),
+            'max_drawdown': None if self.equity_stale else round(float(self.max_drawdown), 2),
+        }
+
+    @classmethod
+    def current(cls, account: TradingAccount):
+        """Snapshot matching the account's data version, rebuilt if missing or outdated"""
+        snapshot = cls.objects.filter(account=account).first()
+        if snapshot is None or snapshot.data_version != account.data_version:
+            return cls.rebuild(account)
+        if snapshot.equity_stale:
+            snapshot.refresh_equity()
+        return snapshot
+
+    @classmethod
+    def rebuild(cls, account: TradingAccount) -> 'PortfolioSnapshot':
+        """Recompute the snapshot and symbol rollups from a full scan"""
+        trades = Trade.objects.filter(account=account, close_time__isnull=False)
+        wins = Q(profit__gt=0)
+        losses = Q(profit__lt=0)
+        
+        with transaction.atomic():
+            version = TradingAccount.objects.values_list('data_version', flat=True).get(pk=account.pk)
+            totals = trades.aggregate(
+                trade_count=Count('pk'),
+                winning_trades=Count('pk', filter=wins),
+                losing_trades=Count('pk', filter=losses),
+                gross_profit=Sum('profit', filter=wins),
+                gross_loss=Sum('profit', filter=losses),
+                total_commission=Sum('commission'),
+                total_volume=Sum('volume'),
+                last_close_time=Max('close_time'),
+            )
+            symbols = list(trades.values('symbol').annotate(
+                trade_count=Count('pk'),
+                winning_trades=Count('pk', filter=wins),
+                total_profit=Sum('profit'),
+                total_volume=Sum('volume'),
+            ))
+            if has_archive(account.pk):
+                cls._add_archived_totals(account, totals, symbols)
+            
+            snapshot, _ = cls.objects.select_for_update().get_or_create(account=account)
+            snapshot.data_version = version
+            snapshot.trade_count = totals['trade_count']
+            snapshot.winning_trades = totals['winning_trades']
+            snapshot.losing_trades = totals['losing_trades']
+            snapshot.gross_profit = totals['gross_profit'] or 0
+            snapshot.gross_loss = abs(totals['gross_loss'] or 0)
+            snapshot.total_commission = totals['total_commission'] or 0
+            snapshot.total_volume = totals['total_volume'] or 0
+            snapshot.last_close_time = totals['last_close_time']
+            snapshot.refresh_equity()
+            
+            SymbolSnapshot.objects.filter(account=account).delete()
+            SymbolSnapshot.objects.bulk_create([
+                SymbolSnapshot(
+                    account=account,
+                    symbol=row['symbol'],
+                    trade_count=row['trade_count'],
+                    winning_trades=row['winning_trades'],
+                    total_profit=row['total_profit'] or 0,
+                    total_volume=row['total_volume'] or 0,
+                )
+                for row in symbols
+            ])
+        
+        return snapshot
+
+    @classmethod
+    def _add_archived_totals(cls, account: TradingAccount, totals: Dict[str, Any], symbols: List[Dict]) -> None:
+        """Fold trades moved to the Parquet archive into rebuild's aggregates"""
+        archived = read_archive(account.pk, cls.ROLLUP_FIELDS)
+        if archived is None or not len(archived):
+            return
+        to_decimal = lambda value: Decimal(str(round(float(value), 2)))
+        profit = archived.profit_filled
+        wins = profit > 0
+        losses = profit < 0
+        
+        totals['trade_count'] += len(archived)
+        totals['winning_trades'] += int(wins.sum())
+        totals['losing_trades'] += int(losses.sum())
+        totals['gross_profit'] = (totals['gross_profit'] or 0) + to_decimal(profit[wins].sum())
+        totals['gross_loss'] = (totals['gross_loss'] or 0) + to_decimal(profit[losses].sum())
+        totals['total_commission'] = (totals['total_commission'] or 0) + to_decimal(np.nansum(archived.commission))
+        totals['total_volume'] = (totals['total_volume'] or 0) + to_decimal(np.nansum(archived.volume))
+        last_archived = datetime.fromtimestamp(archived.close_time.max(), tz=dt_timezone.utc)
+        totals['last_close_time'] = max(filter(None, [totals['last_close_time'], last_archived]))
+        
+        by_symbol = {row['symbol']: row for row in symbols}
+        names, symbol_profit = archived.group_sum(archived.symbol, profit)
+        _, symbol_trades = archived.group_count(archived.symbol)
+        _, symbol_wins = archived.group_count(archived.symbol, wins)
+        _, symbol_volume = archived.group_sum(archived.symbol, np.nan_to_num(archived.volume))
+        for name, trade_count, win_count, total_profit, total_volume in zip(
+                names, symbol_trades, symbol_wins, symbol_profit, symbol_volume):
+            row = by_symbol.get(name)
+            if row is None:
+                row = {'symbol': name, 'trade_count': 0, 'winning_trades': 0,
+                       'total_profit': 0, 'total_volume': 0}
+                symbols.append(row)
+            row['trade_count'] += int(trade_count)
+            row['winning_trades'] += int(win_count)
+            row['total_profit'] = (row['total_profit'] or 0) + to_decimal(total_profit)
+            row['total_volume'] = (row['total_volume'] or 0) + to_decimal(total_volume)
+
+    @classmethod
+    def apply_trades(cls, account: TradingAccount, rows: List[Tuple]) -> 'PortfolioSnapshot':
+        """Fold newly inserted trades (ROLLUP_FIELDS tuples) into the rollup.
+
+        Must run in the transaction that inserted the rows, after
+        bump_data_version. Falls back to a rebuild if the snapshot did not
+        reflect the previous version.
+        """
+        version = TradingAccount.objects.values_list('data_version', flat=True).get(pk=account.pk)
+        snapshot = cls.objects.select_for_update().filter(account=account).first()
+        if snapshot is None or snapshot.data_version != version - 1:
+            return cls.rebuild(account)
+        
+        closed = sorted((row for row in rows if row[1] is not None), key=lambda row: row[1])
+        symbol_totals = {}
+        for symbol, close_time, volume, commission, profit in closed:
+            profit = profit or Decimal(0)
+            snapshot.trade_count += 1
+            if profit > 0:
+                snapshot.winning_trades += 1
+                snapshot.gross_profit += profit
+            elif profit < 0:
+                snapshot.losing_trades += 1
+                snapshot.gross_loss -= profit
+            snapshot.total_commission += commission or 0
+            snapshot.total_volume += volume or 0
+            
+            totals = symbol_totals.setdefault(symbol, [0, 0, Decimal(0), Decimal(0)])
+            totals[0] += 1
+            totals[1] += profit > 0
+            totals[2] += profit
+            totals[3] += volume or 0
+        
+        if closed:
+            # The equity path can only be extended if nothing closed before
+            # the trades already folded in
+            if snapshot.last_close_time is None or closed[0][1] >= snapshot.last_close_time:
+                snapshot._walk_equity(row[4] or Decimal(0) for row in closed)
+            else:
+                snapshot.equity_stale = True
+            snapshot.last_close_time = max(closed[-1][1], snapshot.last_close_time or closed[-1][1])
+        
+        snapshot.data_version = version
+        snapshot.save()
+        SymbolSnapshot.add_totals(account, symbol_totals)
+        return snapshot
+
+    def refresh_equity(self) -> None:
+        """Recompute the equity path from the account's profits in close-time order"""
+        trades = Trade.objects.filter(account=self.account_id, close_time__isnull=False)
+        
+        self.equity = self.peak_equity = self.current_drawdown = self.max_drawdown = Decimal(0)
+        if has_archive(self.account_id):
+            # Interleave archived and hot trades by close time
+            fields = ('close_time', 'profit')
+            columns = merge_columns(read_archive(self.account_id, fields),
+                                    TradeColumns.from_queryset(trades, fields))
+            self._walk_equity(Decimal(str(round(p, 2))) for p in columns.profit_filled.tolist())
         else:
-            return float(price_diff * 10000)  # Standard forex
+            profits = trades.order_by('close_time', 'pk').values_list('profit', flat=True)
+            self._walk_equity(profit or Decimal(0) for profit in profits.iterator(chunk_size=10000))
+        self.equity_stale = False
+        self.save()
+
+    def _walk_equity(self, profits) -> None:
+        """Advance equity, peak and drawdown over profits in close-time order"""
+        equity = self.equity
+        peak = self.peak_equity
+        max_drawdown = self.max_drawdown
+        for profit in profits:
+            equity += profit
+            if equity > peak:
+                peak = equity
+            elif peak - equity > max_drawdown:
+                max_drawdown = peak - equity
+        
+        self.equity = equity
+        self.peak_equity = peak
+        self.current_drawdown = peak - equity
+        self.max_drawdown = max_drawdown
+
+
+class SymbolSnapshot(models.Model):
+    """Per-symbol running totals belonging to a PortfolioSnapshot"""
+    account = models.ForeignKey(TradingAccount, on_delete=models.CASCADE, related_name='symbol_snapshots')
+    symbol = models.CharField(max_length=20)
+    trade_count = models.PositiveIntegerField(default=0)
+    winning_trades = models.PositiveIntegerField(default=0)
+    total_profit = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_volume = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'symbol'], name='unique_account_symbol_snapshot'),
+        ]
+
+    def __str__(self):
+        return f"{self.symbol} ({self.trade_count} trades) - {self.total_profit}"
+
+    @property
+    def win_rate(self) -> float:
+        return (self.winning_trades / self.trade_count * 100) if self.trade_count > 0 else 0
+
+    @classmethod
+    def add_totals(cls, account: TradingAccount, symbol_totals: Dict[str, list]) -> None:
+        """Add [trades, wins, profit, volume] deltas per symbol"""
+        if not symbol_totals:
+            return
+        existing = {
+            row.symbol: row
+            for row in cls.objects.filter(account=account, symbol__in=list(symbol_totals))
+        }
+        created = []
+        for symbol, (trades, wins, profit, volume) in symbol_totals.items():
+            row = existing.get(symbol)
+            if row is None:
+                row = cls(account=account, symbol=symbol)
+                created.append(row)
+            row.trade_count += trades
+            row.winning_trades += wins
+            row.total_profit += profit
+            row.total_volume += volume
+        
+        cls.objects.bulk_create(created)
+        cls.objects.bulk_update(
+            list(existing.values()),
+            ['trade_count', 'winning_trades', 'total_profit', 'total_volume'],
+        )
+
+
+class RiskAlertRule(models.Model):
+    """Alert rule stored as data; an account's rule overrides the global rule of the same name.
+
+    Global rules replace DEFAULT_RULES entries of the same name and add
+    to them otherwise.
+    """
+    account = models.ForeignKey(TradingAccount, on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='alert_rules')
+    name = models.SlugField(max_length=50)
+    metric = models.CharField(max_length=50, choices=[(metric, metric) for metric in METRICS])
+    comparator = models.CharField(max_length=2, choices=[(op, op) for op in COMPARATORS])
+    threshold = models.FloatField()
+    severity = models.CharField(max_length=10, choices=[(level, level.title()) for level in SEVERITIES],
+                                default='warning')
+    # str.format template over the metrics, e.g. "Low win rate: {win_rate:.1f}%"
+    message = models.CharField(max_length=255, blank=True)
+    min_trades = models.PositiveIntegerField(default=0)
+    enabled = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'name'], name='unique_account_alert_rule'),
+            models.UniqueConstraint(fields=['name'], condition=Q(account__isnull=True),
+                                    name='unique_global_alert_rule'),
+        ]
+
+    def __str__(self):
+        scope = f"account {self.account_id}" if self.account_id else "global"
+        return f"{self.name} ({scope}): {self.metric} {self.comparator} {self.threshold:g}"
+
+    def as_rule(self) -> AlertRule:
+        return AlertRule(self.name, self.metric, self.comparator, self.threshold, self.severity,
+                         self.message, self.min_trades, self.enabled)
+
+    @classmethod
+    def rules_for(cls, account_ids: List[int]):
+        """Global rules and per-account overrides for these accounts, in one query"""
+        stored = cls.objects.filter(Q(account__isnull=True) | Q(account__in=account_ids))
+        return resolve_rules((rule.account_id, rule.as_rule()) for rule in stored)
+
+
+@receiver([post_save, post_delete], sender=RiskAlertRule)
+def alert_rule_written(sender, instance, **kwargs):
+    """Cached risk sections carry evaluated alerts; move them to a new rules version.
+
+    Trades didn't change, so data versions (snapshots, column files and
+    every other cached section) stay as they are.
+    """
+    bump_rules_version()
+
+
+def bulk_risk_alerts(accounts) -> Dict[int, List[Dict[str, str]]]:
+    """Risk alerts for many accounts from their snapshots, symbol rollups and cached exposure.
+
+    A fixed handful of queries whatever the number of accounts or rules;
+    exposure rules only see accounts whose correlation section is cached.
+    """
+    accounts = {account.pk: account for account in accounts}
+    ids = list(accounts)
+    snapshots = {
+        snapshot.account_id: snapshot
+        for snapshot in PortfolioSnapshot.objects.filter(account__in=ids)
+    }
+    symbol_trades = defaultdict(dict)
+    for account_id, symbol, trades in SymbolSnapshot.objects.filter(account__in=ids).values_list(
+            'account_id', 'symbol', 'trade_count'):
+        symbol_trades[account_id][symbol] = trades
+    # The correlation section get_alert_metrics uses (default 90-day window)
+    cache = get_portfolio_cache()
+    section = correlation_section(90)
+    exposure_keys = {pk: cache_key(account, section) for pk, account in accounts.items()}
+    exposure = cache.get_many(list(exposure_keys.values()))
+    
+    metrics = {}
+    for pk, account in accounts.items():
+        snapshot = snapshots.get(pk)
+        if snapshot is None or snapshot.data_version != account.data_version:
+            # Rare: the rollup lags the trades
+            snapshot = PortfolioSnapshot.current(account)
+            symbol_trades[pk] = dict(
+                SymbolSnapshot.objects.filter(account=account).values_list('symbol', 'trade_count')
+            )
+        totals = {
+            'total_trades': snapshot.trade_count,
+            'winning_trades': snapshot.winning_trades,
+            'gross_profit': snapshot.gross_profit,
+            'gross_loss': snapshot.gross_loss,
+        }
+        cached_exposure = exposure.get(exposure_keys[pk])
+        metrics[pk] = alert_metrics(
+            totals, symbol_trades[pk], snapshot.max_drawdown, account.initial_balance,
+            cached_exposure['metrics'] if cached_exposure else None,
+        )
+    
+    rules, overrides = RiskAlertRule.rules_for(ids)
+    return evaluate_rules(metrics, rules, overrides)
 
 
 # views.py
-from django.shortcuts import render, get_object_or_404
+import asyncio
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.db.models import Sum, Avg, Count, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 import json
 
 @login_required
-def portfolio_dashboard(request):
+def portfolio_dashboard(request, account_id):
     """Main portfolio dashboard view"""
-    account = get_object_or_404(TradingAccount, user=request.user, is_active=True)
+    account = get_object_or_404(TradingAccount, pk=account_id, user=request.user)
     
     # Get portfolio data
     portfolio_data = PortfolioAnalyzer(account).get_portfolio_summary()
@@ -86,45 +815,324 @@ def portfolio_dashboard(request):
     
     return render(request, 'trading/portfolio.html', context)
 
+def account_etag(section, rules: bool = False):
+    """Build an etag_func for a view whose payload is section(request) of the account in its URL.
+
+    ``rules`` marks views that add evaluated alert rules to the section.
+    """
+    def etag_func(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return None
+        account = TradingAccount.objects.filter(pk=kwargs['account_id'], user=request.user).first()
+        name = section(request)
+        if account is None or name is None:
+            return None
+        return portfolio_etag(account, name, rules)
+    return etag_func
+
+# portfolio_api sections and the analyzer method computing each
+PORTFOLIO_SECTIONS = {
+    'summary': 'get_portfolio_summary',
+    'trades': 'get_recent_trades',
+    'analytics': 'get_advanced_analytics',
+    'risk': 'get_risk_metrics',
+}
+# Sections that read the account's trade columns rather than the snapshot
+COLUMN_SECTIONS = {'analytics', 'risk'}
+
+def _section_in_thread(account, section: str, compute):
+    """cached_section for a worker thread, closing its connection if it went bad or stale"""
+    try:
+        return cached_section(account, section, compute)
+    finally:
+        close_old_connections()
+
+def section_keys(account: TradingAccount, names: List[str]) -> Dict[str, str]:
+    """Cache key of each section"""
+    return {name: cache_key(account, name) for name in names}
+
+async def portfolio_sections(account: TradingAccount, names: List[str]) -> Dict[str, Any]:
+    """Sections of one account from one analyzer, computing cache misses concurrently"""
+    cache = get_portfolio_cache()
+    # Keys of sections with alerts read the rules version from the cache, a blocking call
+    keys = await sync_to_async(section_keys)(account, names)
+    found = await cache.aget_many(list(keys.values()))
+    data = {name: found[key] for name, key in keys.items() if key in found}
+    
+    missing = [name for name in names if name not in data]
+    if missing:
+        analyzer = PortfolioAnalyzer(account)
+        # One load of the snapshot and trade columns, shared by every section
+        await sync_to_async(analyzer.load, thread_sensitive=False)(
+            columns=any(name in COLUMN_SECTIONS for name in missing)
+        )
+        results = await asyncio.gather(*(
+            sync_to_async(_section_in_thread, thread_sensitive=False)(
+                account, name, getattr(analyzer, PORTFOLIO_SECTIONS[name])
+            )
+            for name in missing
+        ))
+        data.update(zip(missing, results))
+    return {name: data[name] for name in names}
+
 @login_required
-def portfolio_api(request):
-    """API endpoint for portfolio data"""
-    account = get_object_or_404(TradingAccount, user=request.user, is_active=True)
-    analyzer = PortfolioAnalyzer(account)
+@cache_control(private=True, no_cache=True)
+async def portfolio_api(request, account_id):
+    """API endpoint for portfolio data: ?type=summary, a comma list such as ?type=summary,risk, or ?type=all"""
+    user = await request.auser()
+    account = await aget_object_or_404(TradingAccount, pk=account_id, user=user)
     
     data_type = request.GET.get('type', 'summary')
-    
-    if data_type == 'summary':
-        data = analyzer.get_portfolio_summary()
-    elif data_type == 'trades':
-        data = analyzer.get_recent_trades()
-    elif data_type == 'analytics':
-        data = analyzer.get_advanced_analytics()
-    elif data_type == 'risk':
-        data = analyzer.get_risk_metrics()
+    if data_type == 'all':
+        names = list(PORTFOLIO_SECTIONS)
     else:
-        data = {'error': 'Invalid data type'}
+        names = list(dict.fromkeys(name.strip() for name in data_type.split(',') if name.strip()))
+    if not names or any(name not in PORTFOLIO_SECTIONS for name in names):
+        return JsonResponse({'error': 'Invalid data type'})
+    
+    # condition() would run account_etag's query on the event loop; check the ETag here instead.
+    # Building it can read the rules version from the cache, so that runs in a thread too.
+    etag = quote_etag(await sync_to_async(portfolio_etag)(account, ','.join(names)))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        data = await portfolio_sections(account, names)
+        # A single section keeps its original, unwrapped payload
+        response = JsonResponse(data if len(names) > 1 or data_type == 'all' else data[names[0]])
+    if request.method in ('GET', 'HEAD'):
+        response.headers.setdefault('ETag', etag)
+    return response
+
+def rolling_windows_param(request) -> List[int]:
+    """Window lengths in days from ?windows=7,30,90"""
+    windows = request.GET.get('windows', '7,30,90')
+    return sorted({int(w) for w in windows.split(',') if w.strip().isdigit() and 0 < int(w) <= 3650})
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=account_etag(lambda request: f"rolling:{rolling_windows_param(request)}"))
+def portfolio_rolling_api(request, account_id):
+    """Rolling P&L, win rate, Sharpe and drawdown series for charts"""
+    account = get_object_or_404(TradingAccount, pk=account_id, user=request.user)
+    windows = rolling_windows_param(request)
+    if not windows:
+        return JsonResponse({'error': 'Invalid windows'}, status=400)
+    
+    analyzer = PortfolioAnalyzer(account)
+    data = cached_section(account, f"rolling:{windows}", lambda: analyzer.get_rolling_metrics(windows))
+    return JsonResponse(data)
+
+def pivot_section(request) -> str:
+    """Cache section of the pivot a request asks for, None if it is invalid"""
+    try:
+        return PivotQuery(
+            pivot_param(request.GET.get('by')),
+            pivot_param(request.GET.get('measures')) or DEFAULT_MEASURES,
+            request.GET.get('tz'),
+        ).cache_section
+    except ValueError:
+        return None
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=account_etag(pivot_section))
+def portfolio_pivot_api(request, account_id):
+    """Pivot breakdown, e.g. ?by=symbol,weekday&measures=count,wins,profit&tz=Europe/London"""
+    account = get_object_or_404(TradingAccount, pk=account_id, user=request.user)
+    analyzer = PortfolioAnalyzer(account)
+    
+    try:
+        data = analyzer.get_pivot(
+            pivot_param(request.GET.get('by')),
+            pivot_param(request.GET.get('measures')) or DEFAULT_MEASURES,
+            request.GET.get('tz'),
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(data)
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=account_etag(lambda request: f"history:{request.GET.urlencode()}"))
+def trade_history_api(request, account_id):
+    """Trade history page, e.g. ?symbol=XAUUSD&start=2025-08-01&limit=100&cursor=..."""
+    account = get_object_or_404(TradingAccount, pk=account_id, user=request.user)
+    analyzer = PortfolioAnalyzer(account)
+    
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+        data = analyzer.get_trade_history(
+            request.GET.get('cursor'), limit, **history_params(request.GET)
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(data)
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=account_etag(lambda request: f"equity_curve:{request.GET.urlencode()}"))
+def equity_curve_api(request, account_id):
+    """Downsampled equity curve, e.g. ?points=800&method=minmax&start=2025-08-01"""
+    account = get_object_or_404(TradingAccount, pk=account_id, user=request.user)
+    analyzer = PortfolioAnalyzer(account)
     
+    try:
+        data = analyzer.get_equity_curve(
+            points=min(int(request.GET.get('points', 500)), 10000),
+            method=request.GET.get('method', 'lttb'),
+            start=parse_bound(request.GET.get('start')),
+            end=parse_bound(request.GET.get('end'), end=True),
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     return JsonResponse(data)
 
 @login_required
-def upload_trades_csv(request):
-    """Upload and process trading CSV file"""
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=account_etag(lambda request: f"montecarlo:{request.GET.urlencode()}"))
+def monte_carlo_api(request, account_id):
+    """Monte Carlo risk distributions, e.g. ?paths=50000&method=permute&seed=7"""
+    account = get_object_or_404(TradingAccount, pk=account_id, user=request.user)
+    analyzer = PortfolioAnalyzer(account)
+    
+    try:
+        horizon = request.GET.get('horizon')
+        data = analyzer.get_monte_carlo(
+            paths=min(max(int(request.GET.get('paths', 10000)), 1), 200000),
+            method=request.GET.get('method', 'bootstrap'),
+            seed=int(request.GET.get('seed', 0)),
+            horizon=min(int(horizon), 100000) if horizon else None,
+            ruin_fraction=float(request.GET.get('ruin', 0.5)),
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(data)
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=account_etag(lambda request: correlation_section(request.GET.get('days', 90)), rules=True))
+def correlation_exposure_api(request, account_id):
+    """Symbol correlation matrix and net currency exposure, e.g. ?days=180"""
+    account = get_object_or_404(TradingAccount, pk=account_id, user=request.user)
+    analyzer = PortfolioAnalyzer(account)
+    
+    try:
+        days = int(request.GET.get('days', 90))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid days'}, status=400)
+    if not 1 <= days <= 3650:
+        return JsonResponse({'error': 'days must be between 1 and 3650'}, status=400)
+    data = analyzer.get_correlation_exposure(days)
+    return JsonResponse({**data, 'alerts': analyzer.get_exposure_alerts(data['metrics'])})
+
+@login_required
+def accounts_overview_api(request):
+    """Every active account of the user, and their combined totals"""
+    accounts = TradingAccount.objects.filter(user=request.user, is_active=True)
+    # A user's few accounts are computed in this process if an import hasn't cached them yet
+    analyzer = MultiAccountAnalyzer(accounts, workers=1)
+    return JsonResponse({
+        'accounts': analyzer.account_views(),
+        'combined': analyzer.firm_view(),
+    })
+
+@login_required
+def firm_risk_api(request):
+    """Firm-wide view over all active accounts, with a merged view per user (staff only)"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff access required'}, status=403)
+    accounts = TradingAccount.objects.filter(is_active=True)
+    # Only merges cached statistics; imports and precompute_portfolios compute them
+    analyzer = MultiAccountAnalyzer(accounts, compute_missing=False)
+    alerts = bulk_risk_alerts(accounts)
+    return JsonResponse({
+        'firm': analyzer.firm_view(),
+        'users': {str(user_id): view for user_id, view in analyzer.user_views().items()},
+        'pending_accounts': analyzer.pending,
+        'alerts': {str(account_id): account_alerts for account_id, account_alerts in alerts.items() if account_alerts},
+    })
+
+async def portfolio_events(request, account_id):
+    """Server-Sent Events stream of new trades, summary counters and risk alerts as imports commit"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    account = await aget_object_or_404(TradingAccount, pk=account_id, user=user)
+    
+    last_id = request.headers.get('Last-Event-ID', '')
+    last_id = int(last_id) if last_id.isdigit() else None
+    # A fresh connection starts from current counters; a reconnect replays what it missed
+    initial = None
+    if last_id is None:
+        snapshot = await sync_to_async(PortfolioSnapshot.current)(account)
+        initial = snapshot.as_dict()
+    
+    response = StreamingHttpResponse(event_stream(account.pk, last_id, initial),
+                                     content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@login_required
+def portfolio_export(request, account_id):
+    """Download trades (?data=trades) or a pivot (?data=pivot&by=...) as CSV or NDJSON"""
+    account = get_object_or_404(TradingAccount, pk=account_id, user=request.user)
+    export_format = request.GET.get('format', 'csv')
+    data = request.GET.get('data', 'trades')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': 'Invalid format'}, status=400)
+    
+    if data == 'trades':
+        # Same columns CSVTradeProcessor reads, so an export can be re-imported
+        fields = tuple(CSVTradeProcessor.COLUMN_MAPPING.values())
+        trades = Trade.objects.filter(account=account).order_by('open_time', 'pk')
+        # Archived trades first, read a month partition at a time
+        archived = (
+            tuple(row[field] for field in fields)
+            for rows in iter_archive_records(account.pk, fields) for row in rows
+        )
+        if export_format == 'csv':
+            stream = trade_csv_stream(trades, CSVTradeProcessor.COLUMN_MAPPING, archived=archived)
+        else:
+            stream = trade_ndjson_stream(trades, list(fields), archived=archived)
+    elif data == 'pivot':
+        try:
+            pivot = PortfolioAnalyzer(account).get_pivot(
+                pivot_param(request.GET.get('by')),
+                pivot_param(request.GET.get('measures')) or DEFAULT_MEASURES,
+                request.GET.get('tz'),
+            )
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        if export_format == 'csv':
+            stream = records_csv_stream(pivot['rows'], pivot['dimensions'] + pivot['measures'])
+        else:
+            stream = records_ndjson_stream(pivot['rows'])
+    else:
+        return JsonResponse({'error': 'Invalid data type'}, status=400)
+    
+    response = StreamingHttpResponse(stream, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{data}-{account.pk}-v{account.data_version}.{export_format}"'
+    )
+    return response
+
+@login_required
+def upload_trades_csv(request, account_id):
+    """Queue an uploaded trading CSV file for a background import worker"""
     if request.method == 'POST' and request.FILES.get('csv_file'):
         csv_file = request.FILES['csv_file']
-        account = get_object_or_404(TradingAccount, user=request.user, is_active=True)
+        account = get_object_or_404(TradingAccount, pk=account_id, user=request.user)
         
         try:
-            # Process CSV file
-            processor = CSVTradeProcessor(account)
-            result = processor.process_csv(csv_file)
+            # Only store the file here; run_import_worker does the parsing
+            job = ImportJob.objects.create(account=account, csv_file=csv_file)
             
             return JsonResponse({
                 'success': True,
-                'processed': result['processed'],
-                'skipped': result['skipped'],
-                'errors': result['errors']
-            })
+                'job_id': job.pk,
+                'status': job.status,
+            }, status=202)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -133,41 +1141,127 @@ def upload_trades_csv(request):
     
     return JsonResponse({'success': False, 'error': 'Invalid request'})
 
+@login_required
+def import_job_status(request, job_id):
+    """Progress of a background trade import"""
+    job = get_object_or_404(ImportJob, pk=job_id, account__user=request.user)
+    return JsonResponse(job.as_dict())
+
 
 # utils.py - Portfolio Analysis Class
 class PortfolioAnalyzer:
     """Comprehensive portfolio analysis and metrics calculation"""
     
-    def __init__(self, account: TradingAccount):
+    def __init__(self, account: TradingAccount, use_snapshot: bool = True, streaming: bool = None,
+                 use_column_store: bool = True):
         self.account = account
-        self.trades = Trade.objects.filter(
+        self.trades = TradeQuerySet(Trade).filter(
             account=account,
             close_time__isnull=False
         ).order_by('-close_time')
+        # Read summary counters from PortfolioSnapshot instead of scanning trades
+        self.use_snapshot = use_snapshot
+        # One constant-memory pass instead of column arrays; None decides by trade count
+        self.streaming = streaming
+        # Open the memory-mapped column files written after imports, if current
+        self.use_column_store = use_column_store
+        self._columns = None
+        self._stream = None
+        self._risk = None
+        self._snapshot = None
+    
+    @property
+    def columns(self) -> TradeColumns:
+        """Closed trades loaded once as column arrays"""
+        if self._columns is None and self.use_column_store:
+            self._columns = open_column_store(self.account)
+        if self._columns is None:
+            self._columns = self.trade_columns()
+        return self._columns
+    
+    def trade_columns(self, fields: Tuple[str, ...] = TradeColumns.FIELDS,
+                      start: datetime = None, end: datetime = None) -> TradeColumns:
+        """Closed trades closing in [start, end) from the Parquet archive and the trade table"""
+        hot = self.trades
+        if start is not None:
+            hot = hot.filter(close_time__gte=start)
+        if end is not None:
+            hot = hot.filter(close_time__lt=end)
+        columns = TradeColumns.from_queryset(hot, fields)
+        if has_archive(self.account.pk):
+            columns = merge_columns(read_archive(self.account.pk, fields, start, end), columns)
+        return columns
+    
+    @property
+    def is_streaming(self) -> bool:
+        """Whether analytics should stream rather than load the account into memory"""
+        if self.streaming is None:
+            threshold = getattr(settings, 'PORTFOLIO_STREAMING_THRESHOLD', None)
+            self.streaming = (
+                threshold is not None and self.use_snapshot
+                and self.snapshot.trade_count > threshold
+            )
+        return self.streaming
+    
+    @property
+    def stream(self) -> StreamingAnalytics:
+        """Accumulators from one chunked pass over the account's trades"""
+        if self._stream is None:
+            self._stream = StreamingAnalytics.from_queryset(
+                self.trades, before=iter_archive_months(self.account.pk, StreamingAnalytics.FIELDS),
+            )
+        return self._stream
+    
+    @property
+    def risk(self) -> RiskEngine:
+        """Daily P&L series and equity curves, built once per analyzer"""
+        if self._risk is None:
+            self._risk = RiskEngine.from_columns(self.columns)
+        return self._risk
+    
+    @property
+    def snapshot(self) -> 'PortfolioSnapshot':
+        """Rollup row for the account at its current data version"""
+        if self._snapshot is None:
+            self._snapshot = PortfolioSnapshot.current(self.account)
+        return self._snapshot
+    
+    def load(self, columns: bool = True) -> None:
+        """Load shared state up front, so sections computed on parallel threads reuse it"""
+        if self.use_snapshot:
+            self.snapshot
+        if not columns:
+            return
+        if self.is_streaming:
+            self.stream
+        else:
+            self.columns
+            self.risk
     
     def get_portfolio_summary(self) -> Dict[str, Any]:
         """Get main portfolio metrics"""
-        if not self.trades.exists():
+        totals = self._get_summary_totals()
+        if not totals['total_trades']:
             return self._empty_portfolio_data()
         
         # Basic metrics
-        total_trades = self.trades.count()
-        winning_trades = self.trades.filter(profit__gt=0).count()
-        losing_trades = self.trades.filter(profit__lt=0).count()
+        total_trades = totals['total_trades']
+        winning_trades = totals['winning_trades']
+        losing_trades = totals['losing_trades']
         
-        total_profit = self.trades.aggregate(Sum('profit'))['profit__sum'] or 0
-        total_commission = self.trades.aggregate(Sum('commission'))['commission__sum'] or 0
+        total_profit = totals['gross_profit'] - totals['gross_loss']
+        total_commission = totals['total_commission']
         net_profit = total_profit + total_commission
         
         win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
         
         # Average win/loss
-        avg_win = self.trades.filter(profit__gt=0).aggregate(Avg('profit'))['profit__avg'] or 0
-        avg_loss = self.trades.filter(profit__lt=0).aggregate(Avg('profit'))['profit__avg'] or 0
+        avg_win = totals['gross_profit'] / winning_trades if winning_trades else 0
+        avg_loss = -totals['gross_loss'] / losing_trades if losing_trades else 0
         
         # Profit factor
-        gross_profit = self.trades.filter(profit__gt=0).aggregate(Sum('profit'))['profit__sum'] or 0
-        gross_loss = abs(self.trades.filter(profit__lt=0).aggregate(Sum('profit'))['profit__sum'] or 0)
+        gross_profit = totals['gross_profit']
+        gross_loss = totals['gross_loss']
         profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else 0
         
         # Symbol statistics
@@ -187,14 +1281,44 @@ class PortfolioAnalyzer:
             'avg_win': round(float(avg_win), 2),
             'avg_loss': round(float(avg_loss), 2),
             'profit_factor': round(float(profit_factor), 2),
-            'total_volume': round(float(self.trades.aggregate(Sum('volume'))['volume__sum'] or 0), 2),
+            'total_volume': round(float(totals['total_volume']), 2),
             'symbol_stats': symbol_stats,
             'recent_trades': recent_trades,
         }
     
+    def _get_summary_totals(self) -> Dict[str, Any]:
+        """Counters behind the summary, from the snapshot or a column scan"""
+        if self.use_snapshot:
+            snapshot = self.snapshot
+            return {
+                'total_trades': snapshot.trade_count,
+                'winning_trades': snapshot.winning_trades,
+                'losing_trades': snapshot.losing_trades,
+                'gross_profit': snapshot.gross_profit,
+                'gross_loss': snapshot.gross_loss,
+                'total_commission': snapshot.total_commission,
+                'total_volume': snapshot.total_volume,
+            }
+        
+        cols = self.columns
+        profit = cols.profit
+        wins = profit > 0
+        losses = profit < 0
+        return {
+            'total_trades': len(cols),
+            'winning_trades': int(wins.sum()),
+            'losing_trades': int(losses.sum()),
+            'gross_profit': float(profit[wins].sum()),
+            'gross_loss': float(abs(profit[losses].sum())),
+            'total_commission': float(np.nansum(cols.commission)),
+            'total_volume': float(np.nansum(cols.volume)),
+        }
+    
     def get_advanced_analytics(self) -> Dict[str, Any]:
         """Get advanced analytics and metrics"""
-        if not self.trades.exists():
+        if self.is_streaming:
+            return self.stream.get_advanced_analytics()
+        if not len(self.columns):
             return {}
         
         # Calculate Sharpe ratio (simplified)
@@ -209,27 +1333,176 @@ class PortfolioAnalyzer:
         
         # Risk metrics
         var_95 = self._calculate_var(0.95)
+        drawdown = self.risk.max_drawdown()
         
         return {
             'sharpe_ratio': round(sharpe_ratio, 2),
+            'sortino_ratio': round(self.risk.sortino_ratio(), 2),
             'max_drawdown': round(max_drawdown, 2),
+            'max_drawdown_amount': round(drawdown['max_drawdown_amount'], 2),
+            'drawdown_peak_date': drawdown['peak_time'].isoformat() if drawdown['peak_time'] else None,
+            'drawdown_trough_date': drawdown['trough_time'].isoformat() if drawdown['trough_time'] else None,
             'avg_duration_hours': round(avg_duration, 1),
             'var_95': round(var_95, 2),
-            'daily_returns': daily_returns[:30],  # Last 30 days
+            'cvar_95': round(self.risk.conditional_value_at_risk(0.95), 2),
+            'daily_returns': daily_returns[-30:],  # Last 30 days
             'monthly_performance': self._get_monthly_performance(),
             'hourly_performance': self._get_hourly_performance(),
         }
     
-    def get_risk_metrics(self) -> Dict[str, Any]:
-        """Get risk management metrics"""
-        if not self.trades.exists():
-            return {}
+    def get_rolling_metrics(self, windows: List[int] = (7, 30, 90)) -> Dict[str, Any]:
+        """Trailing-window P&L, win rate, Sharpe and drawdown for each calendar day"""
+        return rolling_series(self.columns, windows)
+    
+    def get_equity_curve(self, points: int = 500, method: str = 'lttb',
+                         start: datetime = None, end: datetime = None) -> Dict[str, Any]:
+        """Per-trade equity curve, downsampled to at most ``points`` points.
+
+        The full-resolution curve is cached per data version, so zooming
+        into a range only slices and resamples it.
+        """
+        if method not in DOWNSAMPLERS:
+            raise ValueError(f"Unknown method: {method}")
+        curve = cached_section(self.account, 'equity_curve', self._full_equity_curve)
+        times, equity = curve['times'], curve['equity']
+        
+        lo = np.searchsorted(times, start.timestamp()) if start is not None else 0
+        hi = np.searchsorted(times, end.timestamp()) if end is not None else len(times)
+        times, equity = times[lo:hi], equity[lo:hi]
+        kept = DOWNSAMPLERS[method](times, equity, max(int(points), 2))
+        
+        return {
+            'total_points': len(times),
+            'method': method,
+            'times': [
+                datetime.fromtimestamp(t, tz=dt_timezone.utc).isoformat() for t in times[kept]
+            ],
+            'equity': np.round(equity[kept], 2).tolist(),
+        }
+    
+    def _full_equity_curve(self) -> Dict[str, np.ndarray]:
+        """Close times and cumulative P&L, the curve _calculate_max_drawdown walks"""
+        if self._risk is None and self._columns is None:
+            # Only two columns are needed; skip loading the full column set
+            risk = RiskEngine.from_columns(
+                self.trade_columns(fields=('close_time', 'profit'))
+            )
+        else:
+            risk = self.risk
+        return {'times': risk.trade_times, 'equity': risk.trade_equity}
+    
+    def get_monte_carlo(self, paths: int = 10000, method: str = 'bootstrap', seed: int = 0,
+                        horizon: int = None, ruin_fraction: float = 0.5) -> Dict[str, Any]:
+        """Simulated drawdown, risk-of-ruin and equity-band distributions from resampled trades.
+
+        Ruin means losing ruin_fraction of the initial balance; without a
+        balance risk_of_ruin is None.
+        """
+        if not 0 < ruin_fraction <= 1:
+            raise ValueError("ruin must be a fraction of the balance in (0, 1]")
+        initial_balance = float(self.account.initial_balance or 0)
+        ruin_loss = initial_balance * ruin_fraction if initial_balance > 0 else None
+        section = f"montecarlo:{paths}:{method}:{seed}:{horizon}:{ruin_loss}"
         
-        # Risk distribution
-        risk_distribution = self._calculate_risk_distribution()
+        def simulate():
+            equity = self._full_equity_curve()['equity']
+            # Per-trade P&L of the same trades the historical drawdown uses
+            result = monte_carlo(np.diff(equity, prepend=0), paths, method, seed, horizon, ruin_loss)
+            if result:
+                # Measured like the simulated paths: peak starts at zero P&L
+                peak = np.maximum.accumulate(np.maximum(equity, 0))
+                result['historical_max_drawdown'] = round(float((peak - equity).max()), 2)
+            return result
         
-        # Position sizing analysis
-        position_analysis = self._analyze_position_sizing()
+        return cached_section(self.account, section, simulate)
+    
+    def get_correlation_exposure(self, days: int = 90) -> Dict[str, Any]:
+        """Daily P&L correlation between symbols and net notional exposure per currency.
+
+        Correlation uses trades closed since UTC midnight ``days`` days ago.
+        Exposure is taken over open positions, or over the trades closed in
+        that window when nothing is open. The cache section carries today's
+        date, so the window moves forward even without new trades.
+        """
+        today = timezone.now().astimezone(dt_timezone.utc).date()
+        
+        def compute():
+            since = correlation_since(days, today)
+            fields = ('symbol', 'side', 'volume', 'open_price', 'close_time', 'profit')
+            if self._columns is not None:
+                recent = self._columns.columns
+                keep = recent['close_time'] >= since.timestamp()
+                recent = TradeColumns({field: recent[field][keep] for field in fields})
+            else:
+                recent = self.trade_columns(fields=fields, start=since)
+            
+            matrix = daily_pnl_matrix(recent)
+            correlation, shared_days = correlation_matrix(matrix['pnl'])
+            pairs = correlated_pairs(matrix['symbols'], correlation, shared_days)
+            
+            open_rows = list(
+                Trade.objects.filter(account=self.account, close_time__isnull=True)
+                .values_list('symbol', 'side', 'volume', 'open_price')
+            )
+            if open_rows:
+                basis = 'open_positions'
+                book = TradeColumns.from_rows(open_rows, ('symbol', 'side', 'volume', 'open_price'))
+            else:
+                basis = 'recent_trades'
+                book = recent
+            exposure = net_currency_exposure(book.symbol, book.side, book.volume, book.open_price)
+            
+            return {
+                'days': days,
+                'trading_days': len(matrix['days']),
+                'symbols': [str(symbol) for symbol in matrix['symbols']],
+                'correlation': np.round(correlation, 3).tolist(),
+                'top_pairs': pairs,
+                'exposure_basis': basis,
+                'exposure': exposure,
+                'metrics': exposure_metrics(pairs, exposure),
+            }
+        
+        return cached_section(self.account, correlation_section(days, today), compute)
+    
+    def get_trade_history(self, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE,
+                          **filters) -> Dict[str, Any]:
+        """Page of closed trades, newest first; filters are symbol, side, start and end"""
+        return TradeHistory(self.trades, archive_account=self.account.pk, **filters).page(cursor, limit)
+    
+    def get_recent_trades(self) -> Dict[str, Any]:
+        """First page of the trade history"""
+        return self.get_trade_history(limit=20)
+    
+    def get_symbol_trade_stats(self, percentiles: Tuple[float, ...] = (0.5, 0.9)) -> Dict[str, Any]:
+        """Duration and pip statistics per symbol, aggregated in the database"""
+        section = f"symbol_trade_stats:{','.join(f'{p:g}' for p in percentiles)}"
+        return cached_section(self.account, section, lambda: self.trades.symbol_trade_stats(percentiles))
+    
+    def get_pivot(self, dimensions: List[str], measures: List[str] = DEFAULT_MEASURES,
+                  tz: str = None) -> Dict[str, Any]:
+        """Measures grouped by any combination of dimensions, in one GROUP BY query"""
+        query = PivotQuery(dimensions, measures, tz)
+        return cached_section(self.account, query.cache_section, lambda: query.run(
+            self.trades, read_archive_frame(self.account.pk, PIVOT_ARCHIVE_FIELDS)
+        ))
+    
+    def get_risk_metrics(self) -> Dict[str, Any]:
+        """Get risk management metrics"""
+        if self.is_streaming:
+            if not self.stream.trades:
+                return {}
+            risk_distribution = self.stream.get_risk_distribution()
+            position_analysis = self.stream.get_position_analysis()
+        else:
+            if not len(self.columns):
+                return {}
+            
+            # Risk distribution
+            risk_distribution = self._calculate_risk_distribution()
+            
+            # Position sizing analysis
+            position_analysis = self._analyze_position_sizing()
         
         return {
             'risk_distribution': risk_distribution,
@@ -257,293 +1530,207 @@ class PortfolioAnalyzer:
     
     def _get_symbol_statistics(self) -> List[Dict]:
         """Calculate statistics per symbol"""
-        symbols = self.trades.values('symbol').distinct()
-        symbol_stats = []
+        if self.use_snapshot:
+            symbol_stats = [
+                {
+                    'symbol': row.symbol,
+                    'trades': row.trade_count,
+                    'profit': round(float(row.total_profit), 2),
+                    'win_rate': round(row.win_rate, 1),
+                }
+                for row in SymbolSnapshot.objects.filter(account=self.account)
+            ]
+            return sorted(symbol_stats, key=lambda x: x['profit'], reverse=True)
         
-        for symbol_data in symbols:
-            symbol = symbol_data['symbol']
-            symbol_trades = self.trades.filter(symbol=symbol)
-            
-            total_profit = symbol_trades.aggregate(Sum('profit'))['profit__sum'] or 0
-            total_trades = symbol_trades.count()
-            winning_trades = symbol_trades.filter(profit__gt=0).count()
-            win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-            
+        cols = self.columns
+        symbols, total_profit = cols.group_sum(cols.symbol, cols.profit_filled)
+        _, total_trades = cols.group_count(cols.symbol)
+        _, winning_trades = cols.group_count(cols.symbol, cols.profit > 0)
+        
+        symbol_stats = []
+        for symbol, profit, trades, wins in zip(symbols, total_profit, total_trades, winning_trades):
+            win_rate = (wins / trades * 100) if trades > 0 else 0
             symbol_stats.append({
                 'symbol': symbol,
-                'trades': total_trades,
-                'profit': round(float(total_profit), 2),
-                'win_rate': round(win_rate, 1),
+                'trades': int(trades),
+                'profit': round(float(profit), 2),
+                'win_rate': round(float(win_rate), 1),
             })
         
         return sorted(symbol_stats, key=lambda x: x['profit'], reverse=True)
     
     def _get_recent_trades_data(self) -> List[Dict]:
         """Get recent trades for display"""
-        recent_trades = self.trades[:20]  # Last 20 trades
+        if self._columns is None:
+            # Only the newest rows are needed; don't load the whole account
+            rows = list(self.trades.values_list(*TradeColumns.FIELDS)[:20])
+            recent_trades = TradeColumns.from_rows(rows[::-1]).tail(20)
+        else:
+            recent_trades = self.columns.tail(20)  # Last 20 trades
         
         trades_data = []
         for trade in recent_trades:
+            open_time = datetime.fromtimestamp(trade['open_time'], tz=dt_timezone.utc)
+            close_time = datetime.fromtimestamp(trade['close_time'], tz=dt_timezone.utc)
             trades_data.append({
-                'id': trade.trade_id,
-                'symbol': trade.symbol,
-                'side': trade.side,
-                'volume': float(trade.volume),
-                'open_price': float(trade.open_price),
-                'close_price': float(trade.close_price or 0),
-                'profit': round(float(trade.profit or 0), 2),
-                'open_time': trade.open_time.strftime('%m/%d/%Y'),
-                'close_time': trade.close_time.strftime('%m/%d/%Y') if trade.close_time else '',
+                'id': trade['trade_id'],
+                'symbol': trade['symbol'],
+                'side': trade['side'],
+                'volume': float(trade['volume']),
+                'open_price': float(trade['open_price']),
+                'close_price': float(np.nan_to_num(trade['close_price'])),
+                'profit': round(float(np.nan_to_num(trade['profit'])), 2),
+                'open_time': open_time.strftime('%m/%d/%Y'),
+                'close_time': close_time.strftime('%m/%d/%Y'),
             })
         
         return trades_data
     
     def _calculate_daily_returns(self) -> List[float]:
-        """Calculate daily returns for risk metrics"""
-        # Group trades by date and calculate daily P&L
-        daily_pnl = {}
-        
-        for trade in self.trades:
-            if trade.close_time:
-                date = trade.close_time.date()
-                if date not in daily_pnl:
-                    daily_pnl[date] = 0
-                daily_pnl[date] += float(trade.profit or 0)
-        
-        # Convert to returns list
-        returns = list(daily_pnl.values())
-        return sorted(returns)[-60:]  # Last 60 days
+        """Daily P&L of the last 60 trading days, in date order"""
+        return self.risk.recent_returns.tolist()
     
     def _calculate_sharpe_ratio(self, returns: List[float]) -> float:
         """Calculate Sharpe ratio (simplified)"""
-        if not returns or len(returns) < 2:
-            return 0
-        
-        avg_return = sum(returns) / len(returns)
-        variance = sum((r - avg_return) ** 2 for r in returns) / len(returns)
-        std_dev = variance ** 0.5
-        
-        if std_dev == 0:
-            return 0
-        
-        # Assuming risk-free rate of 2% annually (simplified)
-        risk_free_rate = 0.02 / 365  # Daily risk-free rate
-        return (avg_return - risk_free_rate) / std_dev
+        return sharpe_ratio(returns)
     
     def _calculate_max_drawdown(self) -> float:
         """Calculate maximum drawdown"""
-        cumulative_returns = []
-        running_total = 0
-        
-        for trade in self.trades.order_by('close_time'):
-            if trade.profit:
-                running_total += float(trade.profit)
-                cumulative_returns.append(running_total)
-        
-        if not cumulative_returns:
-            return 0
-        
-        peak = cumulative_returns[0]
-        max_drawdown = 0
-        
-        for value in cumulative_returns:
-            if value > peak:
-                peak = value
-            drawdown = (peak - value) / peak * 100 if peak > 0 else 0
-            max_drawdown = max(max_drawdown, drawdown)
-        
-        return max_drawdown
+        return self.risk.max_drawdown()['max_drawdown']
     
     def _calculate_average_duration(self) -> float:
         """Calculate average trade duration in hours"""
-        durations = [trade.duration_hours for trade in self.trades if trade.is_closed]
-        return sum(durations) / len(durations) if durations else 0
+        cols = self.columns
+        if not len(cols):
+            return 0
+        return float(((cols.close_time - cols.open_time) / 3600).mean())
     
     def _calculate_var(self, confidence_level: float) -> float:
         """Calculate Value at Risk"""
-        returns = self._calculate_daily_returns()
-        if not returns:
-            return 0
-        
-        sorted_returns = sorted(returns)
-        index = int((1 - confidence_level) * len(sorted_returns))
-        return abs(sorted_returns[index]) if index < len(sorted_returns) else 0
+        return self.risk.value_at_risk(confidence_level)
     
     def _get_monthly_performance(self) -> List[Dict]:
         """Get monthly performance data"""
-        monthly_data = {}
-        
-        for trade in self.trades:
-            if trade.close_time and trade.profit:
-                month_key = trade.close_time.strftime('%Y-%m')
-                if month_key not in monthly_data:
-                    monthly_data[month_key] = 0
-                monthly_data[month_key] += float(trade.profit)
+        cols = self.columns
+        profit = cols.profit_filled
+        traded = profit != 0
+        months, monthly_profit = cols.group_sum(cols.close_month[traded], profit[traded])
         
         # Convert to list format for charts
         return [
-            {'month': month, 'profit': round(profit, 2)}
-            for month, profit in sorted(monthly_data.items())
+            {'month': str(month), 'profit': round(float(profit), 2)}
+            for month, profit in zip(months, monthly_profit)
         ]
     
     def _get_hourly_performance(self) -> Dict[int, float]:
         """Get performance by hour of day"""
-        hourly_data = {hour: 0 for hour in range(24)}
-        
-        for trade in self.trades:
-            if trade.close_time and trade.profit:
-                hour = trade.close_time.hour
-                hourly_data[hour] += float(trade.profit)
-        
-        return hourly_data
+        cols = self.columns
+        hourly = np.bincount(cols.close_hour, weights=cols.profit_filled, minlength=24)
+        return {hour: float(hourly[hour]) for hour in range(24)}
     
     def _calculate_risk_distribution(self) -> Dict[str, float]:
         """Calculate risk distribution"""
-        low_risk = 0
-        medium_risk = 0
-        high_risk = 0
-        
-        for trade in self.trades:
-            # Simple risk classification based on volume
-            if float(trade.volume) <= 0.1:
-                low_risk += 1
-            elif float(trade.volume) <= 0.5:
-                medium_risk += 1
-            else:
-                high_risk += 1
-        
-        total = self.trades.count()
-        if total == 0:
-            return {'low': 0, 'medium': 0, 'high': 0}
-        
-        return {
-            'low': round(low_risk / total * 100, 1),
-            'medium': round(medium_risk / total * 100, 1),
-            'high': round(high_risk / total * 100, 1),
-        }
+        cols = self.columns
+        # Classify by notional exposure, so a lot of XAUUSD and a lot of EURUSD differ
+        notional = notional_exposure(cols.symbol, cols.volume, cols.open_price)
+        return bucket_percentages(risk_bucket_counts(notional))
     
     def _analyze_position_sizing(self) -> Dict[str, Any]:
         """Analyze position sizing patterns"""
-        volumes = [float(trade.volume) for trade in self.trades]
+        volumes = self.columns.volume
         
-        if not volumes:
+        if not len(volumes):
             return {}
         
         return {
-            'avg_volume': round(sum(volumes) / len(volumes), 2),
-            'max_volume': max(volumes),
-            'min_volume': min(volumes),
+            'avg_volume': round(float(volumes.mean()), 2),
+            'max_volume': float(volumes.max()),
+            'min_volume': float(volumes.min()),
             'volume_consistency': round(self._calculate_volume_consistency(volumes), 2),
         }
     
-    def _calculate_volume_consistency(self, volumes: List[float]) -> float:
+    def _calculate_volume_consistency(self, volumes: np.ndarray) -> float:
         """Calculate volume consistency score"""
-        if len(volumes) < 2:
-            return 100
-        
-        avg_volume = sum(volumes) / len(volumes)
-        variance = sum((v - avg_volume) ** 2 for v in volumes) / len(volumes)
-        std_dev = variance ** 0.5
-        
-        # Return consistency as percentage (lower std dev = higher consistency)
-        if avg_volume == 0:
-            return 0
-        
-        cv = std_dev / avg_volume  # Coefficient of variation
-        return max(0, 100 - (cv * 100))
+        return volume_consistency(volumes)
+    
+    def get_alert_metrics(self) -> Dict[str, Any]:
+        """Metrics the alert rules are evaluated against, from data the other sections already load"""
+        if self.use_snapshot:
+            symbol_trades = dict(
+                SymbolSnapshot.objects.filter(account=self.account).values_list('symbol', 'trade_count')
+            )
+            max_drawdown = self.snapshot.max_drawdown
+        else:
+            symbols, counts = self.columns.group_count(self.columns.symbol)
+            symbol_trades = dict(zip(symbols.tolist(), counts.tolist()))
+            max_drawdown = self.risk.max_drawdown_amount()
+        return alert_metrics(
+            self._get_summary_totals(), symbol_trades, max_drawdown, self.account.initial_balance,
+            self.get_correlation_exposure()['metrics'],
+        )
     
     def _generate_risk_alerts(self) -> List[Dict[str, str]]:
-        """Generate risk management alerts"""
-        alerts = []
-        
-        # Check for overconcentration in single symbol
-        symbol_stats = self._get_symbol_statistics()
-        if symbol_stats:
-            top_symbol = symbol_stats[0]
-            if top_symbol['trades'] > self.trades.count() * 0.8:
-                alerts.append({
-                    'type': 'warning',
-                    'message': f"High concentration in {top_symbol['symbol']} ({top_symbol['trades']} trades)"
-                })
-        
-        # Check win rate
-        total_trades = self.trades.count()
-        if total_trades > 10:
-            winning_trades = self.trades.filter(profit__gt=0).count()
-            win_rate = winning_trades / total_trades * 100
-            
-            if win_rate < 40:
-                alerts.append({
-                    'type': 'danger',
-                    'message': f"Low win rate: {win_rate:.1f}% - Review strategy"
-                })
-            elif win_rate > 70:
-                alerts.append({
-                    'type': 'success',
-                    'message': f"Excellent win rate: {win_rate:.1f}%"
-                })
-        
-        return alerts
+        """Evaluate the account's alert rules (defaults, global and account rules)"""
+        rules, overrides = RiskAlertRule.rules_for([self.account.pk])
+        return evaluate_rules({self.account.pk: self.get_alert_metrics()}, rules, overrides)[self.account.pk]
+    
+    def get_exposure_alerts(self, exposure: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Alerts of the correlation and currency rules for one correlation window's metrics"""
+        rules, overrides = exposure_rules(*RiskAlertRule.rules_for([self.account.pk]))
+        metrics = {'total_trades': self._get_summary_totals()['total_trades'], **exposure}
+        return evaluate_rules({self.account.pk: metrics}, rules, overrides)[self.account.pk]
 
 
 # CSV Processor Class
 class CSVTradeProcessor:
     """Process trading CSV files and import trades"""
     
-    def __init__(self, account: TradingAccount):
+    # Map CSV columns to model fields
+    COLUMN_MAPPING = {
+        'ID': 'trade_id',
+        'Symbol': 'symbol',
+        'Side': 'side',
+        'Volume': 'volume',
+        'Open price': 'open_price',
+        'Close Price': 'close_price',
+        'Stop loss': 'stop_loss',
+        'Take profit': 'take_profit',
+        'Open time': 'open_time',
+        'Close time': 'close_time',
+        'Commission': 'commission',
+        'Swap': 'swap',
+        'Profit': 'profit',
+        'Reason': 'reason'
+    }
+    
+    DATETIME_FIELDS = ['open_time', 'close_time']
+    DECIMAL_FIELDS = ['volume', 'open_price', 'close_price', 'stop_loss',
+                      'take_profit', 'commission', 'swap', 'profit']
+    REQUIRED_FIELDS = ['trade_id', 'symbol', 'side', 'volume', 'open_price', 'open_time']
+    
+    # Rows read, mapped and inserted per transaction
+    CHUNK_SIZE = 5000
+    
+    def __init__(self, account: TradingAccount, chunk_size: int = CHUNK_SIZE):
         self.account = account
+        self.chunk_size = chunk_size
     
-    def process_csv(self, csv_file) -> Dict[str, int]:
-        """Process uploaded CSV file"""
+    def process_csv(self, csv_file) -> Dict[str, Any]:
+        """Process uploaded CSV file chunk by chunk"""
         try:
-            # Read CSV file
-            df = pd.read_csv(csv_file)
-            
-            # Clean column names
-            df.columns = df.columns.str.strip()
-            
-            # Map CSV columns to model fields
-            column_mapping = {
-                'ID': 'trade_id',
-                'Symbol': 'symbol',
-                'Side': 'side',
-                'Volume': 'volume',
-                'Open price': 'open_price',
-                'Close Price': 'close_price',
-                'Stop loss': 'stop_loss',
-                'Take profit': 'take_profit',
-                'Open time': 'open_time',
-                'Close time': 'close_time',
-                'Commission': 'commission',
-                'Swap': 'swap',
-                'Profit': 'profit',
-                'Reason': 'reason'
-            }
-            
             processed = 0
             skipped = 0
             errors = []
             
-            for index, row in df.iterrows():
-                try:
-                    # Check if trade already exists
-                    if Trade.objects.filter(
-                        account=self.account,
-                        trade_id=row.get('ID', '')
-                    ).exists():
-                        skipped += 1
-                        continue
-                    
-                    # Create trade object
-                    trade_data = self._map_row_to_trade(row, column_mapping)
-                    if trade_data:
-                        Trade.objects.create(account=self.account, **trade_data)
-                        processed += 1
-                    else:
-                        skipped += 1
-                        
-                except Exception as e:
-                    errors.append(f"Row {index + 1}: {str(e)}")
+            # Stream the file so only one chunk is held in memory
+            # Read every cell as text; _parse_chunk does the typing
+            for chunk in pd.read_csv(csv_file, chunksize=self.chunk_size, dtype=str):
+                result = self.process_chunk(chunk)
+                processed += result['processed']
+                skipped += result['skipped']
+                errors.extend(result['errors'])
+            
+            self._finish_import()
             
             return {
                 'processed': processed,
@@ -554,34 +1741,202 @@ class CSVTradeProcessor:
         except Exception as e:
             raise Exception(f"Error processing CSV: {str(e)}")
     
-    def _map_row_to_trade(self, row, column_mapping) -> Dict[str, Any]:
-        """Map CSV row to trade model fields"""
+    def process_job(self, job: ImportJob) -> None:
+        """Run a claimed ImportJob chunk by chunk, saving progress with each chunk"""
         try:
-            trade_data = {}
-            
-            # Map basic fields
-            for csv_col, model_field in column_mapping.items():
-                if csv_col in row and pd.notna(row[csv_col]):
-                    value = row[csv_col]
+            with job.csv_file.open('rb') as f:
+                if not job.total_rows:
+                    job.total_rows = self._count_records(f)
+                    job.save(update_fields=['total_rows', 'updated_at'])
+                    f.seek(0)
+                
+                # Progress commits with its chunk, so a requeued job resumes
+                # after the last committed chunk and keeps its counts
+                resume = job.rows_done
+                for chunk in pd.read_csv(f, chunksize=self.chunk_size, dtype=str):
+                    if resume >= len(chunk):
+                        resume -= len(chunk)
+                        continue
+                    chunk, resume = chunk.iloc[resume:], 0
                     
-                    if model_field in ['open_time', 'close_time']:
-                        # Parse datetime
-                        trade_data[model_field] = pd.to_datetime(value)
-                    elif model_field in ['volume', 'open_price', 'close_price', 'stop_loss', 
-                                       'take_profit', 'commission', 'swap', 'profit']:
-                        # Convert to decimal
-                        trade_data[model_field] = Decimal(str(value))
-                    else:
-                        trade_data[model_field] = str(value)
+                    with transaction.atomic():
+                        result = self.process_chunk(chunk)
+                        job.rows_done += len(chunk)
+                        job.processed += result['processed']
+                        job.skipped += result['skipped']
+                        job.error_count += len(result['errors'])
+                        room = ImportJob.MAX_STORED_ERRORS - len(job.errors)
+                        job.errors.extend(result['errors'][:max(room, 0)])
+                        job.save(update_fields=['rows_done', 'processed', 'skipped',
+                                                'error_count', 'errors', 'updated_at'])
             
-            # Validate required fields
-            required_fields = ['trade_id', 'symbol', 'side', 'volume', 'open_price', 'open_time']
-            for field in required_fields:
-                if field not in trade_data:
-                    return None
+            self._finish_import()
+            job.status = 'done'
+        except Exception as e:
+            job.status = 'failed'
+            job.failure = f"Error processing CSV: {str(e)}"
+        
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'failure', 'finished_at', 'updated_at'])
+    
+    def _count_records(self, f) -> int:
+        """CSV records after the header; a quoted field may span several lines"""
+        text = io.TextIOWrapper(f, encoding='utf-8', errors='replace', newline='')
+        try:
+            # read_csv skips blank lines, so they are not records either
+            return max(sum(1 for row in csv.reader(text) if row) - 1, 0)
+        finally:
+            text.detach()
+    
+    def process_chunk(self, df) -> Dict[str, Any]:
+        """Map one DataFrame chunk and insert it with a single bulk_create"""
+        # Clean column names
+        df.columns = df.columns.str.strip()
+        
+        records, errors = self._parse_chunk(df)
+        trades = [Trade(account=self.account, **trade_data) for trade_data in records]
+        
+        # Duplicate trade ids are dropped by the unique constraint, so the rows
+        # actually inserted are this chunk's trade ids stored past the previous
+        # last pk. Locking the account row keeps another import of the same
+        # account from inserting into that range before the chunk commits,
+        # and archive_trades from moving trades between the check and the insert.
+        with transaction.atomic():
+            TradingAccount.objects.select_for_update().filter(pk=self.account.pk).exists()
+            # Archived trades are no longer in the table, so the constraint can't catch them
+            archived = set(ArchivedTradeId.objects.filter(
+                account=self.account, trade_id__in=[trade.trade_id for trade in trades]
+            ).values_list('trade_id', flat=True))
+            new = [trade for trade in trades if trade.trade_id not in archived]
+            last_pk = self._last_trade_pk()
+            Trade.objects.bulk_create(new, batch_size=self.chunk_size, ignore_conflicts=True)
+            new_trades = Trade.objects.filter(
+                account=self.account, pk__gt=last_pk, trade_id__in=[trade.trade_id for trade in new]
+            )
+            inserted = list(new_trades.values_list(*PortfolioSnapshot.ROLLUP_FIELDS))
+            processed = len(inserted)
+            if processed:
+                bump_data_version(self.account.pk)
+                snapshot = PortfolioSnapshot.apply_trades(self.account, inserted)
+                self._publish_trades(new_trades, processed, snapshot)
+        
+        return {
+            'processed': processed,
+            'skipped': len(trades) - processed,
+            'errors': errors
+        }
+    
+    def _publish_trades(self, new_trades, processed: int, snapshot: 'PortfolioSnapshot') -> None:
+        """Push the newest inserted trades and updated counters once the chunk commits"""
+        newest = new_trades.order_by('-close_time', '-pk').values(*HISTORY_FIELDS)[:LIVE_TRADE_LIMIT]
+        event = {
+            'count': processed,
+            'trades': [format_trade(row) for row in newest],
+            'summary': snapshot.as_dict(),
+        }
+        transaction.on_commit(lambda: publish_event(self.account.pk, 'trades', event))
+    
+    def _last_trade_pk(self) -> int:
+        """Highest trade pk stored for the account, 0 if none"""
+        last = Trade.objects.filter(account=self.account).order_by('-pk').values_list('pk', flat=True).first()
+        return last or 0
+    
+    def _finish_import(self) -> None:
+        """Rescan the equity path if the import arrived out of close-time order, then write column files"""
+        snapshot = PortfolioSnapshot.objects.filter(account=self.account, equity_stale=True).first()
+        if snapshot is not None:
+            snapshot.refresh_equity()
+        
+        # Column files for the new data version, shared by every web worker
+        account = TradingAccount.objects.get(pk=self.account.pk)
+        analyzer = PortfolioAnalyzer(account, use_column_store=False)
+        write_column_store(account, analyzer.columns)
+        # Merged by the overview and firm views, which don't compute statistics themselves
+        get_portfolio_cache().set(cache_key(account, 'account_stats'), account_stats(account.pk))
+        self._publish_summary(account, analyzer)
+    
+    def _publish_summary(self, account: TradingAccount, analyzer: 'PortfolioAnalyzer') -> None:
+        """Push final counters, and risk alerts not raised before this import"""
+        summary = PortfolioSnapshot.current(account).as_dict()
+        # Computed once here for every open dashboard, and cached for the next portfolio_api call
+        alerts = cached_section(account, 'risk', analyzer.get_risk_metrics).get('risk_alerts', [])
+        
+        cache = get_portfolio_cache()
+        seen_key = f"portfolio:alerts:{account.pk}"
+        seen = cache.get(seen_key, [])
+        new_alerts = [alert for alert in alerts if alert['message'] not in seen]
+        cache.set(seen_key, [alert['message'] for alert in alerts], None)
+        
+        def publish():
+            publish_event(account.pk, 'summary', summary)
+            if new_alerts:
+                publish_event(account.pk, 'alerts', {'alerts': new_alerts, 'active': alerts})
+        transaction.on_commit(publish)
+    
+    def _parse_chunk(self, df) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Parse a chunk column by column into trade field dicts and row errors"""
+        df = df.rename(columns=self.COLUMN_MAPPING)
+        fields = [field for field in self.COLUMN_MAPPING.values() if field in df.columns]
+        
+        # One boolean mask per check, evaluated over the whole column
+        checks = []
+        for field in self.REQUIRED_FIELDS:
+            if field not in df.columns:
+                checks.append((pd.Series(True, index=df.index), f"missing {field}"))
+        
+        columns = {}
+        for field in fields:
+            raw = df[field]
+            if raw.dtype == object or pd.api.types.is_string_dtype(raw):
+                raw = raw.str.strip().replace('', None)
+            present = raw.notna()
             
-            return trade_data
+            if field in self.DATETIME_FIELDS:
+                values = self._parse_datetimes(raw)
+                invalid = present & values.isna()
+                values = values.astype(object).where(values.notna(), None)
+            elif field in self.DECIMAL_FIELDS:
+                invalid = present & pd.to_numeric(raw, errors='coerce').isna()
+                values = raw.astype(object).where(present & ~invalid, None)
+                values = pd.Series(
+                    [Decimal(str(v)) if v is not None else None for v in values],
+                    index=df.index, dtype=object,
+                )
+            else:
+                invalid = pd.Series(False, index=df.index)
+                values = raw.astype(object).where(present, None)
+                values = values.map(lambda v: str(v) if v is not None else None)
             
-        except Exception:
-            return None
-
+            columns[field] = values
+            if field in self.REQUIRED_FIELDS:
+                checks.append((~present, f"missing {field}"))
+            checks.append((invalid, f"invalid {field}"))
+        
+        # Report every failed check against its CSV row number
+        bad = pd.Series(False, index=df.index)
+        for mask, _ in checks:
+            bad |= mask
+        errors = []
+        for index in df.index[bad]:
+            reasons = [reason for mask, reason in checks if mask[index]]
+            errors.append(f"Row {index + 1}: {', '.join(reasons)}")
+        
+        good = ~bad
+        names = list(columns)
+        value_lists = [columns[name][good].tolist() for name in names]
+        records = [
+            {name: value for name, value in zip(names, row) if value is not None}
+            for row in zip(*value_lists)
+        ]
+        
+        return records, errors
+    
+    def _parse_datetimes(self, raw):
+        """Parse a datetime column in one call, retrying stragglers per element"""
+        values = pd.to_datetime(raw, errors='coerce')
+        # The inferred format comes from the first value; rows written in a
+        # different layout (e.g. without milliseconds) fall back to mixed parsing
+        retry = raw.notna() & values.isna()
+        if retry.any():
+            values[retry] = pd.to_datetime(raw[retry], errors='coerce', format='mixed')
+        return values